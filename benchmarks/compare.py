@@ -0,0 +1,77 @@
+"""
+Diff two scrape_pipeline JSON reports and flag regressions.
+
+    python -m benchmarks.compare base.json head.json --threshold 10
+
+Exits with status 1 when any p50/p99 latency grew (or throughput dropped)
+by more than ``--threshold`` percent.
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+# metric name -> True when bigger is better
+METRICS = {
+    "p50_ms": False,
+    "p99_ms": False,
+    "pages_per_sec": True,
+    "products_per_sec": True,
+}
+
+
+def _rows(report) -> Dict[str, dict]:
+    rows = {f"parse:{row['page']}": row for row in report["parse"]}
+    rows.update({f"validate:{row['query']}": row for row in report["validate"]})
+    return rows
+
+
+def compare(base, head, threshold: float) -> Tuple[List[str], List[str]]:
+    lines, regressions = [], []
+    base_rows, head_rows = _rows(base), _rows(head)
+
+    for name in sorted(base_rows.keys() & head_rows.keys()):
+        for metric, higher_is_better in METRICS.items():
+            before, after = base_rows[name][metric], head_rows[name][metric]
+            if not before:
+                continue
+            change = (after - before) / before * 100
+            worse = -change if higher_is_better else change
+            line = f"{name:50} {metric:17} {before:>10} -> {after:<10} {change:+7.1f}%"
+            lines.append(line)
+            if worse > threshold:
+                regressions.append(line)
+
+    rss_change = head["peak_rss_mb"] - base["peak_rss_mb"]
+    lines.append(
+        f"{'peak_rss_mb':68} {base['peak_rss_mb']:>10} -> "
+        f"{head['peak_rss_mb']:<10} {rss_change:+7.1f}MB"
+    )
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    print(f"{base['revision']} -> {head['revision']}")
+    lines, regressions = compare(base, head, args.threshold)
+    print("\n".join(lines))
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold}%:")
+        print("\n".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import json
+import os
+from typing import Any, Dict, List
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixtures(fixtures_dir: str = FIXTURES_DIR) -> List[Dict[str, Any]]:
+    """Recorded pages listed in manifest.json, with their HTML loaded as bytes"""
+    with open(os.path.join(fixtures_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    fixtures = []
+    for entry in manifest:
+        with open(os.path.join(fixtures_dir, entry["file"]), "rb") as f:
+            fixtures.append({**entry, "html": f.read()})
+    return fixtures
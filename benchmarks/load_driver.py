@@ -0,0 +1,143 @@
+"""
+Closed-loop load driver for the API: at each concurrency level, that many
+clients POST /search back to back for ``--duration`` seconds.
+
+    python -m benchmarks.load_driver --url http://127.0.0.1:8000 \\
+        --concurrency 1,4,16,64 --duration 20 --unique-queries --output load.json
+
+Run it against an API whose SCRAPER_BASE_URLS points at
+``benchmarks.mock_retailer``. ``--unique-queries`` gives every request its
+own query so the search cache and single-flight can't absorb the load.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+import aiohttp
+
+from .scrape_pipeline import git_revision, percentile
+
+
+async def _client(
+    session: aiohttp.ClientSession,
+    url: str,
+    payloads,
+    stop_at: float,
+    latencies: List[float],
+    outcomes: Counter,
+):
+    while time.perf_counter() < stop_at:
+        payload = next(payloads)
+        start = time.perf_counter()
+        try:
+            async with session.post(url, json=payload) as response:
+                body = await response.read()
+                if response.status != 200:
+                    outcomes[f"http_{response.status}"] += 1
+                elif response.headers.get("X-Partial-Results") == "true":
+                    outcomes["partial"] += 1
+                elif not json.loads(body):
+                    outcomes["empty"] += 1
+                else:
+                    outcomes["ok"] += 1
+        except Exception as e:
+            outcomes[type(e).__name__] += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run_level(
+    url: str, concurrency: int, duration: float, payloads
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    outcomes: Counter = Counter()
+    timeout = aiohttp.ClientTimeout(total=None)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        started = time.perf_counter()
+        stop_at = started + duration
+        await asyncio.gather(
+            *(
+                _client(session, url, payloads, stop_at, latencies, outcomes)
+                for _ in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    if not latencies:
+        return {"concurrency": concurrency, "requests": 0, "outcomes": {}}
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p90_ms": round(percentile(latencies, 90), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_ms": round(max(latencies), 1),
+        "outcomes": dict(outcomes),
+    }
+
+
+def make_payloads(args):
+    deadline = {"deadline_ms": args.deadline_ms} if args.deadline_ms else {}
+    if args.unique_queries:
+        return (
+            {"country": args.country, "query": f"{args.query} {n}", **deadline}
+            for n in itertools.count()
+        )
+    return itertools.repeat({"country": args.country, "query": args.query, **deadline})
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per level")
+    parser.add_argument("--country", default="US")
+    parser.add_argument("--query", default="iPhone 16 Pro 128GB")
+    parser.add_argument("--deadline-ms", type=int, default=None)
+    parser.add_argument("--unique-queries", action="store_true")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    search_url = f"{args.url.rstrip('/')}/search"
+    payloads = make_payloads(args)
+    levels = []
+    print(
+        f"{'conc':>5} {'requests':>9} {'rps':>8} {'p50 ms':>9} {'p90 ms':>9} "
+        f"{'p99 ms':>9}  outcomes"
+    )
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        row = asyncio.run(run_level(search_url, concurrency, args.duration, payloads))
+        levels.append(row)
+        if not row["requests"]:
+            print(f"{concurrency:>5} {0:>9}")
+            continue
+        print(
+            f"{concurrency:>5} {row['requests']:>9} {row['rps']:>8} "
+            f"{row['p50_ms']:>9} {row['p90_ms']:>9} {row['p99_ms']:>9}  "
+            f"{row['outcomes']}"
+        )
+
+    if args.output:
+        report = {
+            "revision": git_revision(),
+            "url": search_url,
+            "country": args.country,
+            "unique_queries": args.unique_queries,
+            "duration_s": args.duration,
+            "levels": levels,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Stand-in retailer server for end-to-end load tests. Every site is mounted
+under its own path prefix and answers any URL with that site's fixture
+page, after an injected delay and with injected failures:
+
+    python -m benchmarks.mock_retailer --port 9000 --latency-ms 300 \\
+        --error-rate 0.02 --unavailable-rate 0.01 --rps-limit 50 \\
+        --site-latency-ms amazon=900,walmart=150
+
+Point the API at it before starting uvicorn:
+
+    SCRAPER_BASE_URLS=amazon=http://127.0.0.1:9000/amazon,\\
+    flipkart=http://127.0.0.1:9000/flipkart,ebay=http://127.0.0.1:9000/ebay,\\
+    bestbuy=http://127.0.0.1:9000/bestbuy,walmart=http://127.0.0.1:9000/walmart
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+from utils.settings import parse_mapping
+
+from .fixtures import FIXTURES_DIR, load_fixtures
+
+
+class TokenBucket:
+    """Allows ``rate`` requests per second with bursts of up to ``burst``"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class SiteProfile:
+    """Latency and failure injection for one mocked retailer"""
+
+    def __init__(
+        self,
+        html: bytes,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        error_rate: float = 0.0,
+        unavailable_rate: float = 0.0,
+        rps_limit: float = 0,
+    ):
+        self.html = html
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.unavailable_rate = unavailable_rate
+        self.bucket = TokenBucket(rps_limit) if rps_limit > 0 else None
+        self.responses: Counter = Counter()
+
+    def delay(self, rng: random.Random) -> float:
+        jitter = rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+
+class MockRetailer:
+    def __init__(self, profiles: Dict[str, SiteProfile], seed: Optional[int] = None):
+        self.profiles = profiles
+        self.rng = random.Random(seed)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        profile = self.profiles.get(request.match_info["site"])
+        if profile is None:
+            raise web.HTTPNotFound()
+
+        # Throttling is decided on arrival, like a retailer's edge would
+        if profile.bucket is not None and not profile.bucket.take():
+            status = 429
+        else:
+            await asyncio.sleep(profile.delay(self.rng))
+            roll = self.rng.random()
+            if roll < profile.error_rate:
+                status = 500
+            elif roll < profile.error_rate + profile.unavailable_rate:
+                status = 503
+            else:
+                status = 200
+
+        profile.responses[status] += 1
+        if status == 200:
+            return web.Response(
+                body=profile.html, content_type="text/html", charset="utf-8"
+            )
+        return web.Response(status=status, headers={"Retry-After": "1"})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                site: {str(status): n for status, n in profile.responses.items()}
+                for site, profile in self.profiles.items()
+            }
+        )
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/_stats", self.stats)
+        app.router.add_get("/{site}/{tail:.*}", self.handle)
+        return app
+
+
+def build_profiles(args: Any) -> Dict[str, SiteProfile]:
+    """One profile per fixture site; per-site flags override the global ones"""
+    overrides = {
+        "latency_ms": parse_mapping(args.site_latency_ms),
+        "error_rate": parse_mapping(args.site_error_rate),
+        "unavailable_rate": parse_mapping(args.site_unavailable_rate),
+        "rps_limit": parse_mapping(args.site_rps_limit),
+    }
+    profiles = {}
+    for fixture in load_fixtures(args.fixtures):
+        site = fixture["site"]
+        if site in profiles:
+            continue
+        profiles[site] = SiteProfile(
+            fixture["html"],
+            latency_ms=overrides["latency_ms"].get(site, args.latency_ms),
+            jitter_ms=args.jitter_ms,
+            error_rate=overrides["error_rate"].get(site, args.error_rate),
+            unavailable_rate=overrides["unavailable_rate"].get(
+                site, args.unavailable_rate
+            ),
+            rps_limit=overrides["rps_limit"].get(site, args.rps_limit),
+        )
+    return profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 500s")
+    parser.add_argument(
+        "--unavailable-rate", type=float, default=0.0, help="share of 503s"
+    )
+    parser.add_argument(
+        "--rps-limit", type=float, default=0, help="per-site 429 threshold, 0 is off"
+    )
+    parser.add_argument("--site-latency-ms", default="")
+    parser.add_argument("--site-error-rate", default="")
+    parser.add_argument("--site-unavailable-rate", default="")
+    parser.add_argument("--site-rps-limit", default="")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    retailer = MockRetailer(build_profiles(args), seed=args.seed)
+    sites = ",".join(
+        f"{site}=http://{args.host}:{args.port}/{site}" for site in retailer.profiles
+    )
+    print(f"SCRAPER_BASE_URLS={sites}")
+    web.run_app(retailer.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Per-page parse time of every installed HTML parser backend on the recorded
+fixture pages.
+
+    python -m benchmarks.parser_backends --repeat 20
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from scrapers.html_parser import available_backends
+from scrapers.scraper_manager import ScraperManager
+
+from .fixtures import FIXTURES_DIR, load_fixtures
+
+
+def bench_backend(backend: str, fixture, repeat: int):
+    scraper = ScraperManager().scrapers[fixture["site"]]
+    scraper.parser_backend = backend
+    args = (fixture["html"], fixture["query"], fixture["country"])
+
+    # Warm-up run also compiles the selector table for this backend
+    products = scraper.parse_search_results(*args)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scraper.parse_search_results(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "backend": backend,
+        "page": fixture["file"],
+        "products": len(products),
+        "median_ms": round(statistics.median(timings), 2),
+        "min_ms": round(min(timings), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print raw JSON rows")
+    args = parser.parse_args()
+
+    rows = [
+        bench_backend(backend, fixture, args.repeat)
+        for fixture in load_fixtures(args.fixtures)
+        for backend in available_backends()
+    ]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'page':40} {'backend':16} {'products':>8} {'median ms':>10} {'min ms':>8}")
+    for row in rows:
+        print(
+            f"{row['page']:40} {row['backend']:16} {row['products']:>8} "
+            f"{row['median_ms']:>10} {row['min_ms']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Price history query latency over a large synthetic store: ``--products``
+products with ``--days`` daily observations each, then per-product history
+queries timed as /price-history runs them.
+
+    python -m benchmarks.price_history --products 20000 --days 100
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from utils.price_history import PriceDB, PriceHistoryStore
+
+from .scrape_pipeline import percentile
+
+SITES = ["amazon", "ebay", "flipkart", "walmart", "bestbuy"]
+
+
+def populate(db: PriceDB, products: int, days: int, seed: int = 0) -> int:
+    rng = random.Random(seed)
+    now = int(time.time())
+    rows = 0
+    batch = []
+    for i in range(products):
+        site = SITES[i % len(SITES)]
+        price = rng.uniform(10, 2000)
+        for day in range(days):
+            price *= rng.choice([1, 1, 1, 0.97, 1.03])
+            batch.append(
+                (site, "US", f"P{i:08d}", now - day * 86400, round(price, 2), "USD")
+            )
+        if len(batch) >= 100000:
+            db.insert(batch, [])
+            rows += len(batch)
+            batch = []
+    db.insert(batch, [])
+    return rows + len(batch)
+
+
+async def bench_queries(store: PriceHistoryStore, products: int, queries: int):
+    rng = random.Random(1)
+    timings = []
+    for _ in range(queries):
+        i = rng.randrange(products)
+        start = time.perf_counter()
+        await store.history(
+            SITES[i % len(SITES)], f"P{i:08d}", "US", since=time.time() - 30 * 86400
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "price_history.sqlite3")
+        start = time.perf_counter()
+        rows = populate(PriceDB(path), args.products, args.days)
+        elapsed = time.perf_counter() - start
+        print(f"wrote {rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+
+        async def run():
+            store = PriceHistoryStore(db_path=path)
+            await store.start()
+            try:
+                return await bench_queries(store, args.products, args.queries)
+            finally:
+                await store.close()
+
+        timings = asyncio.run(run())
+        print(
+            f"history queries: p50 {percentile(timings, 50):.2f} ms  "
+            f"p99 {percentile(timings, 99):.2f} ms  max {max(timings):.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Cross-site grouping cost as the candidate set grows: the listings parsed
+from the fixtures, re-titled with other models, storage sizes, colors and
+sellers' noise words, grouped by ProductGrouper at each ``--sizes`` count.
+Time per product should stay roughly flat, not grow with the set.
+
+    python -m benchmarks.product_grouping --sizes 1000,10000,50000
+"""
+
+import argparse
+import random
+import time
+
+from utils.product import Product
+from utils.product_grouping import ProductGrouper
+
+from .fixtures import FIXTURES_DIR
+from .product_records import parsed_products
+
+BRANDS = ["Apple iPhone", "Samsung Galaxy S", "Google Pixel", "OnePlus", "Sony Xperia"]
+VARIANTS = ["", " Pro", " Pro Max", " Plus", " Ultra", " Mini"]
+STORAGE = ["64GB", "128GB", "256GB", "512GB", "1TB"]
+COLORS = ["Black", "White", "Blue", "Natural Titanium", "Pink", "Green"]
+NOISE = ["Unlocked", "Renewed", "- Brand New", "(AT&T)", "Dual SIM", "5G", ""]
+
+
+def candidates(parsed, count: int, seed: int = 0):
+    """``count`` listings, each a fixture listing with a generated title"""
+    rng = random.Random(seed)
+    products = []
+    for i in range(count):
+        base = parsed[i % len(parsed)]
+        title = (
+            f"{rng.choice(BRANDS)} {rng.randint(1, 40)}{rng.choice(VARIANTS)} "
+            f"{rng.choice(STORAGE)} {rng.choice(COLORS)} {rng.choice(NOISE)}"
+        )
+        products.append(
+            Product(
+                f"{base.link}?i={i}",
+                base.price,
+                base.currency,
+                title,
+                base.website,
+            )
+        )
+    return products
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    args = parser.parse_args()
+
+    parsed = parsed_products(args.fixtures)
+    if not parsed:
+        raise SystemExit(f"No products parsed from {args.fixtures}")
+    grouper = ProductGrouper()
+
+    print(f"{'products':>8} {'groups':>7} {'total_ms':>9} {'us_per_product':>15}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        products = candidates(parsed, size)
+        start = time.perf_counter()
+        groups = grouper.group(products)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{size:>8} {len(groups):>7} {elapsed * 1000:>9.1f} "
+            f"{elapsed / size * 1e6:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
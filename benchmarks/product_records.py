@@ -0,0 +1,132 @@
+"""
+Memory and serialization cost of product records: the listings parsed
+from the fixtures, repeated to ``--products`` entries, held as plain dicts
+and as ``Product`` objects, then serialized the old way (a ``ProductResult``
+model per dict) and with ``Product.to_dict``.
+
+    python -m benchmarks.product_records --products 100000
+"""
+
+import argparse
+import json
+import pickle
+import time
+import tracemalloc
+
+from scrapers.scraper_manager import ScraperManager
+from utils.product import Product
+
+from .fixtures import FIXTURES_DIR, load_fixtures
+
+
+def parsed_products(fixtures_dir: str):
+    manager = ScraperManager()
+    products = []
+    for fixture in load_fixtures(fixtures_dir):
+        scraper = manager.scrapers[fixture["site"]]
+        products.extend(
+            scraper.parse_search_results(
+                fixture["html"], fixture["query"], fixture["country"]
+            )
+        )
+    return products
+
+
+def fresh(text: str) -> str:
+    """A new copy of ``text``, as each parsed page would produce"""
+    return text.encode().decode()
+
+
+def build_dicts(rows):
+    # What the scrapers produced before: one dict per listing, price as text
+    return [
+        {
+            "link": link,
+            "price": price,
+            "currency": currency,
+            "productName": name,
+            "website": website,
+            "availability": "In Stock",
+            "rating": None,
+            "image_url": image_url,
+        }
+        for link, price, currency, name, website, image_url in rows
+    ]
+
+
+def build_products(rows):
+    return [
+        Product(link, price, currency, name, website, image_url=image_url)
+        for link, price, currency, name, website, image_url in rows
+    ]
+
+
+def measure_memory(build, rows):
+    """Bytes still allocated after ``build(rows)``, and the records"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = build(rows)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, records
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # ProductResult lives with the routes; importing main builds its singletons
+    from main import ProductResult
+
+    parsed = parsed_products(args.fixtures)
+    if not parsed:
+        raise SystemExit(f"No products parsed from {args.fixtures}")
+    rows = []
+    for i in range(args.products):
+        p = parsed[i % len(parsed)]
+        rows.append(
+            (
+                f"{p.link}?i={i}",
+                fresh(p.price),
+                fresh(p.currency),
+                f"{p.productName} #{i}",
+                fresh(p.website),
+                p.image_url,
+            )
+        )
+
+    dict_bytes, dicts = measure_memory(build_dicts, rows)
+    product_bytes, products = measure_memory(build_products, rows)
+
+    def via_model():
+        return [ProductResult(**d).model_dump() for d in dicts]
+
+    def via_to_dict():
+        return [p.to_dict() for p in products]
+
+    report = {
+        "products": args.products,
+        "dict_bytes_per_record": round(dict_bytes / args.products, 1),
+        "product_bytes_per_record": round(product_bytes / args.products, 1),
+        "serialize_model_ms": round(timed(via_model, args.repeat), 2),
+        "serialize_to_dict_ms": round(timed(via_to_dict, args.repeat), 2),
+        "pickle_dict_bytes": len(pickle.dumps(dicts[:1000], protocol=5)),
+        "pickle_product_bytes": len(pickle.dumps(products[:1000], protocol=5)),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
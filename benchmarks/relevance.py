@@ -0,0 +1,130 @@
+"""
+Relevance scoring throughput and accuracy on a large candidate set: product
+names parsed from the fixtures, expanded with shuffled variants to
+``--names`` entries, scored by the exact SequenceMatcher scorer and by the
+n-gram batch scorer (with and without pruning). The fixture names
+themselves are checked against ``--tolerance``.
+
+    python -m benchmarks.relevance --names 10000
+"""
+
+import argparse
+import random
+import time
+
+from scrapers.scraper_manager import ScraperManager
+from utils.ai_validator import AIValidator
+
+from .fixtures import FIXTURES_DIR, load_fixtures
+
+NOISE = [
+    "Case",
+    "Cover",
+    "Screen Protector",
+    "Charger 20W",
+    "Renewed",
+    "(Unlocked)",
+    "5G",
+    "Dual SIM",
+    "with AppleCare+",
+    "Galaxy S24 Ultra",
+    "Pixel 9 Pro",
+    "for iPhone 15",
+]
+
+
+def fixture_names(fixtures_dir: str):
+    manager = ScraperManager()
+    names = []
+    queries = set()
+    for fixture in load_fixtures(fixtures_dir):
+        scraper = manager.scrapers[fixture["site"]]
+        products = scraper.parse_search_results(
+            fixture["html"], fixture["query"], fixture["country"]
+        )
+        names.extend(p.productName for p in products if p.productName)
+        queries.add(fixture["query"])
+    return names, sorted(queries)
+
+
+def candidate_names(fixtures_dir: str, count: int, seed: int = 0):
+    names, queries = fixture_names(fixtures_dir)
+
+    rng = random.Random(seed)
+    expanded = []
+    while len(expanded) < count:
+        words = rng.choice(names).split()
+        rng.shuffle(words)
+        words.insert(rng.randint(0, len(words)), rng.choice(NOISE))
+        expanded.append(" ".join(words[: rng.randint(3, len(words))]))
+    return expanded, queries
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def agreement(exact, approx, threshold: float):
+    """Largest and mean score difference, and the share of names on the
+    same side of the relevance threshold"""
+    diffs = [abs(a - b) for a, b in zip(exact, approx)]
+    same = sum((a >= threshold) == (b >= threshold) for a, b in zip(exact, approx))
+    return max(diffs), sum(diffs) / len(diffs), same / len(diffs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--names", type=int, default=10000)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.03,
+        help="largest allowed score difference on the fixture names",
+    )
+    args = parser.parse_args()
+
+    names, queries = candidate_names(args.fixtures, args.names)
+    real_names, _ = fixture_names(args.fixtures)
+    validator = AIValidator()
+    threshold = validator.relevance_threshold
+
+    print(f"{len(names)} names")
+    print(
+        f"{'query':22} {'exact ms':>9} {'batch ms':>9} {'pruned ms':>10} "
+        f"{'max diff':>9} {'mean diff':>10} {'same side':>10}"
+    )
+    for query in queries:
+        exact, exact_ms = timed(lambda: validator.score_batch(names, query, exact=True))
+        batch, batch_ms = timed(lambda: validator.score_batch(names, query))
+        pruned, pruned_ms = timed(
+            lambda: validator.score_batch(names, query, min_score=threshold)
+        )
+
+        kept = [s >= threshold for s in batch]
+        assert kept == [s >= threshold for s in pruned], "pruning changed the result"
+        assert batch == [
+            validator.calculate_relevance(n, query) for n in names
+        ], "batch scores differ from per-name scores"
+        max_diff, mean_diff, same = agreement(exact, batch, threshold)
+        print(
+            f"{query:22} {exact_ms:>9.1f} {batch_ms:>9.1f} {pruned_ms:>10.1f} "
+            f"{max_diff:>9.3f} {mean_diff:>10.4f} {same:>10.2%}"
+        )
+
+        real_max, real_mean, real_same = agreement(
+            validator.score_batch(real_names, query, exact=True),
+            validator.score_batch(real_names, query),
+            threshold,
+        )
+        print(
+            f"{'  fixture names':22} {'':>9} {'':>9} {'':>10} "
+            f"{real_max:>9.3f} {real_mean:>10.4f} {real_same:>10.2%}"
+        )
+        assert real_max <= args.tolerance, "n-gram scores outside the tolerance"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Cost of encoding a /search response of N products, per path:
+
+- ``pydantic``: what FastAPI does for ``response_model=List[ProductResult]``
+  when the route returns dicts: validate, serialize, then JSONResponse
+- ``to_dict``: JSONResponse over ``Product.to_dict`` (the default path)
+- ``fast``: FastJSONResponse over the records (``FAST_JSON_RESPONSES=1``)
+
+    python -m benchmarks.response_serialization --sizes 10,100,1000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from utils import fast_json
+
+from .fixtures import FIXTURES_DIR
+from .product_records import parsed_products
+
+
+def timed(fn, repeat: int) -> float:
+    """Best per-call time in microseconds over ``repeat`` rounds"""
+    calls = max(1, 2000 // repeat)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # ProductResult lives with the routes; importing main builds its singletons
+    from main import ProductResult
+
+    field = create_response_field(name="Response_search", type_=List[ProductResult])
+    loop = asyncio.new_event_loop()
+    parsed = parsed_products(args.fixtures)
+    if not parsed:
+        raise SystemExit(f"No products parsed from {args.fixtures}")
+
+    print(f"orjson: {'yes' if fast_json.HAS_ORJSON else 'no (json fallback)'}")
+    print(f"{'products':>8} {'pydantic_us':>12} {'to_dict_us':>11} {'fast_us':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        products = [parsed[i % len(parsed)] for i in range(size)]
+        dicts = [p.to_dict() for p in products]
+
+        def via_pydantic():
+            content = loop.run_until_complete(
+                serialize_response(field=field, response_content=dicts)
+            )
+            return JSONResponse(content).body
+
+        def via_to_dict():
+            return JSONResponse([p.to_dict() for p in products]).body
+
+        def via_fast():
+            return fast_json.FastJSONResponse(products).body
+
+        # Same document from every path
+        expected = json.loads(via_pydantic())
+        assert json.loads(via_to_dict()) == expected
+        assert json.loads(via_fast()) == expected
+
+        print(
+            f"{size:>8} {timed(via_pydantic, args.repeat):>12.1f} "
+            f"{timed(via_to_dict, args.repeat):>11.1f} "
+            f"{timed(via_fast, args.repeat):>9.1f}"
+        )
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
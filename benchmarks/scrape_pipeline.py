@@ -0,0 +1,163 @@
+"""
+Offline benchmark of the scrape pipeline: replays every recorded fixture
+through its scraper's parse step and then through
+AIValidator.validate_and_rank, without touching the network.
+
+    python -m benchmarks.scrape_pipeline --iterations 50 --output bench.json
+    python -m benchmarks.compare base.json bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from scrapers.html_parser import get_backend
+from scrapers.scraper_manager import ScraperManager
+from utils.ai_validator import AIValidator
+
+from .fixtures import FIXTURES_DIR, load_fixtures
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(timings_ms: List[float], items: int) -> Dict[str, float]:
+    total_s = sum(timings_ms) / 1000
+    return {
+        "runs": len(timings_ms),
+        "p50_ms": round(percentile(timings_ms, 50), 3),
+        "p99_ms": round(percentile(timings_ms, 99), 3),
+        "mean_ms": round(sum(timings_ms) / len(timings_ms), 3),
+        "pages_per_sec": round(len(timings_ms) / total_s, 2) if total_s else 0.0,
+        "products_per_sec": round(items / total_s, 2) if total_s else 0.0,
+    }
+
+
+def bench_parse(scraper, fixture, iterations: int) -> Dict[str, Any]:
+    args = (fixture["html"], fixture["query"], fixture["country"])
+    products = scraper.extract_products(*args)  # warm-up
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        scraper.extract_products(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "site": fixture["site"],
+        "page": fixture["file"],
+        "bytes": len(fixture["html"]),
+        "products_per_page": len(products),
+        **summarize(timings, len(products) * iterations),
+    }, products
+
+
+async def bench_validate(products, query: str, iterations: int) -> Dict[str, Any]:
+    validator = AIValidator()
+    timings = []
+    for _ in range(iterations):
+        batch = [product.copy() for product in products]
+        start = time.perf_counter()
+        await validator.validate_and_rank(batch, query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "candidates": len(products),
+        **summarize(timings, len(products) * iterations),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run(fixtures_dir: str, iterations: int, backend: str = None) -> Dict[str, Any]:
+    manager = ScraperManager()
+    parse_rows = []
+    products_by_query: Dict[str, list] = {}
+
+    for fixture in load_fixtures(fixtures_dir):
+        scraper = manager.scrapers[fixture["site"]]
+        scraper.parser_backend = backend
+        row, products = bench_parse(scraper, fixture, iterations)
+        parse_rows.append(row)
+        products_by_query.setdefault(fixture["query"], []).extend(products)
+
+    validate_rows = []
+    for query, products in products_by_query.items():
+        row = asyncio.run(bench_validate(products, query, iterations))
+        validate_rows.append({"query": query, **row})
+
+    return {
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "parser_backend": get_backend(backend).name,
+        "iterations": iterations,
+        "parse": parse_rows,
+        "validate": validate_rows,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(
+        f"revision {report['revision']}  backend {report['parser_backend']}  "
+        f"peak RSS {report['peak_rss_mb']} MB"
+    )
+    print(f"{'site':10} {'pages/s':>9} {'products/s':>11} {'p50 ms':>9} {'p99 ms':>9}")
+    for row in report["parse"]:
+        print(
+            f"{row['site']:10} {row['pages_per_sec']:>9} {row['products_per_sec']:>11} "
+            f"{row['p50_ms']:>9} {row['p99_ms']:>9}"
+        )
+    for row in report["validate"]:
+        print(
+            f"{'validate':10} {row['pages_per_sec']:>9} {row['products_per_sec']:>11} "
+            f"{row['p50_ms']:>9} {row['p99_ms']:>9}  ({row['candidates']} candidates)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--backend", default=None, help="HTML parser backend")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run(args.fixtures, args.iterations, args.backend)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Generate deterministic stand-in search pages for retailers we have no
+recording of yet. The markup mirrors what each scraper's selectors expect,
+padded with the inline scripts and navigation real result pages carry, so
+parse costs are in the right ballpark.
+
+    python -m benchmarks.synthetic_fixtures
+"""
+
+import json
+import os
+import random
+
+from .fixtures import FIXTURES_DIR
+
+QUERY = "iPhone 16 Pro 128GB"
+COLORS = ["Black Titanium", "White Titanium", "Natural Titanium", "Desert Titanium"]
+STORAGE = ["128GB", "256GB", "512GB", "1TB"]
+BASE_PRICES = {"128GB": 999, "256GB": 1099, "512GB": 1299, "1TB": 1499}
+
+
+def _padding(rng: random.Random, kb: int) -> str:
+    """Inline script and navigation noise of roughly ``kb`` kilobytes"""
+    words = ["ue", "csm", "p13n", "widget", "slot", "render", "metric", "load"]
+    chunks = []
+    size = 0
+    while size < kb * 1024:
+        line = "var {0}_{1}=function(a,b){{return a.{2}(b)||{3};}};".format(
+            rng.choice(words),
+            rng.randint(0, 99999),
+            rng.choice(words),
+            rng.randint(0, 9),
+        )
+        chunks.append(line)
+        size += len(line)
+    nav = "".join(
+        f'<li><a href="/browse/{rng.randint(1000, 9999)}">Category {i}</a></li>'
+        for i in range(200)
+    )
+    return f"<script>{''.join(chunks)}</script><nav><ul>{nav}</ul></nav>"
+
+
+def _variants(rng: random.Random, count: int):
+    for i in range(count):
+        storage = STORAGE[i % len(STORAGE)]
+        color = COLORS[(i // len(STORAGE)) % len(COLORS)]
+        price = BASE_PRICES[storage] + rng.choice([0, 0, -50, -100, 20])
+        yield i, storage, color, price
+
+
+def flipkart_page(rng: random.Random) -> str:
+    rows = ['<div class="_1AtVbE"><div class="_2kHMtA">Filters</div></div>']
+    for i, storage, color, price in _variants(rng, 24):
+        pid = f"MOBGTAGP{i:08d}"
+        inr = f"{price * 84:,}"
+        rows.append(
+            '<div class="_1AtVbE"><div class="_13oc-S"><div data-id="{pid}">'
+            '<a class="_1fQZEK" href="/apple-iphone-16-pro/p/itm{i:010d}?pid={pid}">'
+            '<div class="CXW8mj"><img class="_396cs4" src="https://rukminim2.flixcart.com/image/312/312/{pid}.jpeg"/></div>'
+            '<div class="_3pLy-c row"><div class="col col-7-12">'
+            '<div class="_4rR01T">Apple iPhone 16 Pro ({color}, {storage})</div>'
+            '<div class="gUuXy-"><span><div class="_3LWZlK">4.{r}</div></span></div></div>'
+            '<div class="col col-5-12 nlI3QM"><div class="_30jeq3 _1_WHN1">&#8377;{inr}</div>'
+            "</div></div></a></div></div></div>".format(
+                pid=pid, i=i, color=color, storage=storage, r=rng.randint(3, 8), inr=inr
+            )
+        )
+    return _page("Flipkart", "".join(rows), rng, 250)
+
+
+def ebay_page(rng: random.Random) -> str:
+    # Real result pages start with a hidden "Shop on eBay" placeholder item
+    items = [
+        '<li class="s-item"><div class="s-item__wrapper"><div class="s-item__info">'
+        '<a class="s-item__link" href="https://ebay.com/itm/123456">'
+        '<h3 class="s-item__title">Shop on eBay</h3></a>'
+        '<span class="s-item__price">$20.00</span></div></div></li>'
+    ]
+    for i, storage, color, price in _variants(rng, 60):
+        item_id = 386000000000 + i * 7919
+        condition = rng.choice(["Brand New", "Open Box", "Pre-Owned"])
+        items.append(
+            '<li class="s-item s-item__pl-on-bottom" data-viewport="{{}}">'
+            '<div class="s-item__wrapper clearfix"><div class="s-item__image-section">'
+            '<div class="s-item__image"><img src="https://i.ebayimg.com/images/g/{item_id}/s-l225.jpg"/></div></div>'
+            '<div class="s-item__info clearfix">'
+            '<a class="s-item__link" href="https://www.ebay.com/itm/{item_id}?hash=item{item_id:x}">'
+            '<h3 class="s-item__title">Apple iPhone 16 Pro {storage} {color} Unlocked - {condition}</h3></a>'
+            '<div class="s-item__details"><span class="s-item__price">${price}.{cents:02d}</span>'
+            '<span class="s-item__shipping">Free shipping</span></div></div></div></li>'.format(
+                item_id=item_id,
+                storage=storage,
+                color=color,
+                condition=condition,
+                price=price,
+                cents=rng.randint(0, 99),
+            )
+        )
+    body = f'<ul class="srp-results srp-list clearfix">{"".join(items)}</ul>'
+    return _page("eBay", body, rng, 400)
+
+
+def bestbuy_page(rng: random.Random) -> str:
+    items = []
+    ld_items = []
+    for i, storage, color, price in _variants(rng, 18):
+        sku = 6443300 + i
+        carrier = rng.choice(["Verizon", "AT&amp;T", "T-Mobile", "Unlocked"])
+        name = f"Apple - iPhone 16 Pro {storage} - {color} ({carrier})"
+        href = f"/site/apple-iphone-16-pro-{storage.lower()}/{sku}.p?skuId={sku}"
+        items.append(
+            f'<li class="sku-item" data-sku-id="{sku}"><div class="shop-sku-list-item">'
+            f'<a class="image-link" href="{href}"><img class="product-image" '
+            f'src="https://pisces.bbystatic.com/image2/BestBuy_US/images/products/{sku}_sd.jpg"/></a>'
+            f'<h4 class="sku-header"><a href="{href}">{name}</a></h4>'
+            f'<div class="priceView-hero-price priceView-customer-price">'
+            f'<span class="sr-only">Your price for this item is ${price}.99</span>'
+            f'<span aria-hidden="true">${price}.99</span></div></div></li>'
+        )
+        ld_items.append(
+            {
+                "@type": "ListItem",
+                "position": i + 1,
+                "item": {
+                    "@type": "Product",
+                    "name": name.replace("&amp;", "&"),
+                    "sku": str(sku),
+                    "url": f"https://www.bestbuy.com{href}",
+                    "image": f"https://pisces.bbystatic.com/image2/BestBuy_US/images/products/{sku}_sd.jpg",
+                    "offers": {
+                        "@type": "Offer",
+                        "price": f"{price}.99",
+                        "priceCurrency": "USD",
+                        "availability": "http://schema.org/InStock",
+                    },
+                },
+            }
+        )
+    json_ld = json.dumps(
+        {
+            "@context": "http://schema.org",
+            "@type": "ItemList",
+            "itemListElement": ld_items,
+        }
+    )
+    body = (
+        f'<script type="application/ld+json">{json_ld}</script>'
+        f'<ol class="sku-item-list">{"".join(items)}</ol>'
+    )
+    return _page("Best Buy", body, rng, 600)
+
+
+def walmart_page(rng: random.Random) -> str:
+    tiles = []
+    next_items = []
+    for i, storage, color, price in _variants(rng, 40):
+        item_id = 5689919100 + i
+        name = f"Apple iPhone 16 Pro, {storage}, {color} - Unlocked"
+        href = f"/ip/Apple-iPhone-16-Pro-{storage}/{item_id}"
+        tiles.append(
+            f'<div data-item-id="{item_id}" class="mb0 ph1 pa0-xl bb b--near-white w-25">'
+            f'<a link-identifier="{item_id}" href="{href}"><span class="w_iUH7">{name}</span></a>'
+            f'<div data-automation-id="product-price"><div class="price-main">'
+            f'<span class="w_iUH7">current price ${price}.00</span></div></div>'
+            f'<span data-automation-id="product-title">{name}</span>'
+            f"</div>"
+        )
+        next_items.append(
+            {
+                "__typename": "Product",
+                "usItemId": str(item_id),
+                "name": name,
+                "canonicalUrl": href,
+                "image": f"https://i5.walmartimages.com/seo/{item_id}.jpeg",
+                "priceInfo": {
+                    "linePrice": f"${price}.00",
+                    "currentPrice": {"price": price},
+                },
+                "averageRating": round(rng.uniform(3.5, 4.9), 1),
+                "availabilityStatusV2": {"value": "IN_STOCK"},
+            }
+        )
+    next_data = json.dumps(
+        {
+            "props": {
+                "pageProps": {
+                    "initialData": {
+                        "searchResult": {"itemStacks": [{"items": next_items}]}
+                    }
+                }
+            }
+        }
+    )
+    body = (
+        f'<div id="results">{"".join(tiles)}</div>'
+        f'<script id="__NEXT_DATA__" type="application/json">{next_data}</script>'
+    )
+    return _page("Walmart", body, rng, 700)
+
+
+def _page(title: str, body: str, rng: random.Random, padding_kb: int) -> str:
+    return (
+        f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"/>'
+        f"<title>{QUERY} - {title}</title>{_padding(rng, padding_kb // 2)}</head>"
+        f"<body><header>{title}</header><main>{body}</main>"
+        f"{_padding(rng, padding_kb // 2)}</body></html>"
+    )
+
+
+GENERATORS = {
+    "flipkart": ("IN", "flipkart_in_iphone_16_pro.html", flipkart_page),
+    "ebay": ("US", "ebay_us_iphone_16_pro.html", ebay_page),
+    "bestbuy": ("US", "bestbuy_us_iphone_16_pro.html", bestbuy_page),
+    "walmart": ("US", "walmart_us_iphone_16_pro.html", walmart_page),
+}
+
+
+def main():
+    manifest_path = os.path.join(FIXTURES_DIR, "manifest.json")
+    with open(manifest_path) as f:
+        manifest = [e for e in json.load(f) if e.get("source") != "synthetic"]
+
+    for site, (country, filename, generate) in GENERATORS.items():
+        html = generate(random.Random(site))
+        with open(os.path.join(FIXTURES_DIR, filename), "w", encoding="utf-8") as f:
+            f.write(html)
+        manifest.append(
+            {
+                "file": filename,
+                "site": site,
+                "country": country,
+                "query": QUERY,
+                "source": "synthetic",
+            }
+        )
+        print(f"Wrote {filename} ({len(html) // 1024} KB)")
+
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,75 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Tuple
 import asyncio
+import json
 import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from scrapers.batch_search import BatchSearcher
+from scrapers.governor import governor
+from scrapers.http_pool import http_pool
+from scrapers.parse_pool import parse_pool
+from scrapers.refresh_scheduler import RefreshScheduler
+from scrapers.retry import hedger, retry_policy
 from scrapers.scraper_manager import ScraperManager
+from scrapers.selector_config import selector_config
+from scrapers.structured_data import extraction_stats
 from utils.ai_validator import AIValidator
+from utils import fast_json
 from utils.country_mapper import CountryMapper
+from utils.logging_config import configure_logging
+from utils.metrics import REQUEST_SECONDS, new_trace, registry
+from utils.metrics import trace_summary
+from utils.price_history import PriceHistoryStore
+from utils.product import Product
+from utils.product_grouping import ProductGrouper
+from utils.product_identity import extract_asin, listing_key, site_key
+from utils.search_cache import SearchCache
+from utils.settings import env_bool
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Universal Price Scraper", version="1.0.0")
+# Built once per process; scrapers borrow connections from the shared pool
+search_cache = SearchCache()
+price_history = PriceHistoryStore()
+scraper_manager = ScraperManager(cache=search_cache, price_history=price_history)
+refresh_scheduler = RefreshScheduler(scraper_manager, cache=search_cache)
+# Both are stateless, so every request shares one instance
+ai_validator = AIValidator()
+country_mapper = CountryMapper()
+batch_searcher = BatchSearcher(scraper_manager, country_mapper, ai_validator)
+product_grouper = ProductGrouper()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fails startup on a broken selector file instead of failing every parse
+    selector_config.maybe_reload()
+    # Fork/spawn parse workers before any other threads or sockets exist
+    await parse_pool.start()
+    await http_pool.start()
+    await search_cache.start()
+    await search_cache.purge_expired()
+    await price_history.start()
+    await refresh_scheduler.start()
+    try:
+        yield
+    finally:
+        await refresh_scheduler.close()
+        await scraper_manager.close()
+        await search_cache.close()
+        await price_history.close()
+        await http_pool.close()
+        parse_pool.close()
+
+
+app = FastAPI(title="Universal Price Scraper", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -21,12 +78,80 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Partial-Results",
+        "X-Timed-Out-Sites",
+        "X-Skipped-Sites",
+        "X-Trace-Id",
+    ],
 )
 
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Give every request a trace ID (or adopt a well-formed X-Request-ID) and time it"""
+    trace_id = new_trace(request.headers.get("X-Request-ID"))
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Trace-Id"] = trace_id
+        return response
+    finally:
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            request.method,
+            route.path if route is not None else "unmatched",
+            str(status),
+        )
+
+
+DEFAULT_DEADLINE_MS = float(os.getenv("SEARCH_DEADLINE_MS", "15000"))
+MAX_PAGES = int(os.getenv("SEARCH_MAX_PAGES", "5"))
+MAX_DETAIL_LINKS = int(os.getenv("DETAILS_MAX_LINKS", "50"))
+MAX_BATCH_SEARCHES = int(os.getenv("BATCH_MAX_SEARCHES", "1000"))
+# Encode search responses and stream frames with orjson (see utils/fast_json.py)
+FAST_JSON_RESPONSES = env_bool("FAST_JSON_RESPONSES")
+
+
+def ndjson_frame(frame: Dict[str, Any]):
+    """One newline-delimited JSON frame for the streaming endpoints"""
+    if FAST_JSON_RESPONSES:
+        return fast_json.dumps(frame) + b"\n"
+    return json.dumps(frame) + "\n"
+
+
 class SearchRequest(BaseModel):
     country: str
     query: str
+    # Request-level latency budget; sites still running at the deadline are
+    # dropped and reported as timed out
+    deadline_ms: Optional[int] = Field(default=None, gt=0)
+    # Result pages fetched per site (where the site paginates); paging stops
+    # early once a site has max_results relevant products
+    max_pages: int = Field(default=1, ge=1, le=MAX_PAGES)
+    max_results: Optional[int] = Field(default=None, gt=0)
+    # Fetch each Amazon product page and attach its details (slower)
+    enrich: bool = False
+
+
+class BatchSearchItem(BaseModel):
+    country: str
+    query: str
+
+
+class BatchSearchRequest(BaseModel):
+    searches: List[BatchSearchItem] = Field(min_length=1, max_length=MAX_BATCH_SEARCHES)
+    # Per search and site, including the wait for the site's batch slot
+    deadline_ms: Optional[int] = Field(default=None, gt=0)
+    max_pages: int = Field(default=1, ge=1, le=MAX_PAGES)
+    max_results: Optional[int] = Field(default=None, gt=0)
+
+
+class ProductDetailsRequest(BaseModel):
+    links: List[str] = Field(min_length=1, max_length=MAX_DETAIL_LINKS)
 
 
 class ProductResult(BaseModel):
@@ -36,70 +161,340 @@ class ProductResult(BaseModel):
     productName: str
     website: str
     availability: str = "In Stock"
-    rating: float = None
-    image_url: str = None
+    rating: Optional[float] = None
+    image_url: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
+
+
+class ProductGroupResult(BaseModel):
+    title: str
+    brand: Optional[str] = None
+    model: Optional[str] = None
+    storage: Optional[str] = None
+    color: Optional[str] = None
+    best_price: str
+    currency: str
+    best_offer: ProductResult
+    websites: List[str]
+    offers: List[ProductResult]
+
+
+async def run_search(
+    request: SearchRequest,
+) -> Tuple[List[Product], List[Product], Dict[str, str]]:
+    """
+    Scrape every website of the country within the request deadline.
+    Returns all products, the relevant ones ranked, and the partial-result
+    headers (timed out and skipped sites).
+    """
+    # Get relevant websites for the country
+    websites = country_mapper.get_websites_for_country(request.country)
+
+    if not websites:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No supported websites found for country: {request.country}",
+        )
+    refresh_scheduler.observe(request.country, request.query)
+
+    # Scrape all websites concurrently, each bounded by its latency budget
+    start = time.perf_counter()
+    tasks = []
+    logger.debug("Scraping websites: %s", websites)
+    deadline_ms = request.deadline_ms or DEFAULT_DEADLINE_MS
+    for website in websites:
+        task = scraper_manager.scrape_with_status(
+            website,
+            request.query,
+            request.country,
+            deadline_ms,
+            max_pages=request.max_pages,
+            max_results=request.max_results,
+            validator=ai_validator,
+        )
+        tasks.append(task)
+
+    # Wait for all scraping tasks to complete or time out
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Flatten and filter results
+    all_products = []
+    timed_out = []
+    skipped = []
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error(f"Scraping error: {result}")
+            continue
+        all_products.extend(result["products"])
+        if result["status"] == "timeout":
+            timed_out.append(result["website"])
+        elif result["status"] == "circuit_open":
+            skipped.append(result["website"])
+
+    headers = {}
+    if timed_out or skipped:
+        headers["X-Partial-Results"] = "true"
+    if timed_out:
+        headers["X-Timed-Out-Sites"] = ",".join(timed_out)
+    if skipped:
+        headers["X-Skipped-Sites"] = ",".join(skipped)
+
+    if request.enrich:
+        # Detail pages only get whatever is left of the request deadline
+        remaining_ms = deadline_ms - (time.perf_counter() - start) * 1000
+        await scraper_manager.enrich(all_products, timeout=max(0, remaining_ms) / 1000)
+
+    # Validate and rank results using AI
+    validated_products = await ai_validator.validate_and_rank(
+        all_products, request.query
+    )
+
+    # # Sort by price (ascending)
+    # validated_products.sort(
+    #     key=lambda x: float(
+    #         x.price.replace("$", "").replace(",", "").replace("₹", "")
+    #     )
+    # )
+
+    return all_products, validated_products, headers
 
 
 @app.post("/search", response_model=List[ProductResult])
 async def search_products(request: SearchRequest):
     """
-    Search for products across multiple e-commerce websites
+    Search for products across multiple e-commerce websites.
+    Sites that miss the deadline are listed in the X-Timed-Out-Sites header.
+    """
+    try:
+        logger.info("Searching for %r in country %r", request.query, request.country)
+        all_products, validated_products, headers = await run_search(request)
+
+        logger.info(
+            "Found %d products; stages: %s", len(validated_products), trace_summary()
+        )
+        # Products already have the ProductResult shape; returning a response
+        # skips validating every one of them through the model again
+        if FAST_JSON_RESPONSES:
+            return fast_json.FastJSONResponse(all_products, headers=headers)
+        return JSONResponse(
+            [product.to_dict() for product in all_products], headers=headers
+        )
+
+    except Exception as e:
+        logger.error(f"Search error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/search/grouped", response_model=List[ProductGroupResult])
+async def search_products_grouped(request: SearchRequest):
+    """
+    Search like /search, then cluster the relevant products into one group
+    per item across websites, each with its offers and best price. Groups
+    are ordered by their most relevant offer.
     """
     try:
-        logger.info(f"Searching for '{request.query}' in country '{request.country}'")
+        logger.info(
+            "Grouped search for %r in country %r", request.query, request.country
+        )
+        _, validated_products, headers = await run_search(request)
+        groups = product_grouper.group(validated_products)
 
-        # Initialize components
-        scraper_manager = ScraperManager()
-        ai_validator = AIValidator()
-        country_mapper = CountryMapper()
+        logger.info(
+            "Grouped %d products into %d groups; stages: %s",
+            len(validated_products),
+            len(groups),
+            trace_summary(),
+        )
+        content = [group.to_dict() for group in groups]
+        if FAST_JSON_RESPONSES:
+            return fast_json.FastJSONResponse(content, headers=headers)
+        return JSONResponse(content, headers=headers)
 
-        # Get relevant websites for the country
-        websites = country_mapper.get_websites_for_country(request.country)
+    except Exception as e:
+        logger.error(f"Grouped search error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        if not websites:
-            raise HTTPException(
-                status_code=400,
-                detail=f"No supported websites found for country: {request.country}",
+
+@app.post("/search/stream")
+async def search_products_stream(request: SearchRequest):
+    """
+    Stream products as newline-delimited JSON, one frame per website as soon as
+    that website finishes, followed by a summary frame with per-site timing
+    """
+    websites = country_mapper.get_websites_for_country(request.country)
+
+    if not websites:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No supported websites found for country: {request.country}",
+        )
+
+    refresh_scheduler.observe(request.country, request.query)
+    logger.info("Streaming search for %r in country %r", request.query, request.country)
+
+    async def frames():
+        start = time.perf_counter()
+        deadline_ms = request.deadline_ms or DEFAULT_DEADLINE_MS
+        tasks = [
+            asyncio.create_task(
+                scraper_manager.scrape_with_status(
+                    website,
+                    request.query,
+                    request.country,
+                    deadline_ms,
+                    max_pages=request.max_pages,
+                    max_results=request.max_results,
+                    validator=ai_validator,
+                )
             )
+            for website in websites
+        ]
+        sites = {}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                products = [product.to_dict() for product in result["products"]]
+                sites[result["website"]] = {
+                    "status": result["status"],
+                    "error": result["error"],
+                    "elapsed_ms": result["elapsed_ms"],
+                    "count": len(products),
+                }
+                yield ndjson_frame(
+                    {
+                        "type": "products",
+                        "website": result["website"],
+                        "products": products,
+                    }
+                )
+
+            yield ndjson_frame(
+                {
+                    "type": "summary",
+                    "total_products": sum(site["count"] for site in sites.values()),
+                    "timed_out": [
+                        website
+                        for website, site in sites.items()
+                        if site["status"] == "timeout"
+                    ],
+                    "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+                    "sites": sites,
+                }
+            )
+        finally:
+            # Client went away: stop waiting (shared scrapes keep running)
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(frames(), media_type="application/x-ndjson")
+
+
+@app.post("/search/batch")
+async def search_products_batch(request: BatchSearchRequest):
+    """
+    Run many (country, query) searches and stream one newline-delimited JSON
+    frame per input index as its search finishes (in completion order),
+    followed by a summary frame. Repeated searches are scraped once.
+    """
+    searches = [(item.country, item.query) for item in request.searches]
+    groups = BatchSearcher.group(searches)
+    for country, query in groups:
+        refresh_scheduler.observe(country, query)
+    logger.info("Batch search of %d queries", len(searches))
 
-        # Scrape all websites concurrently
-        tasks = []
-        logger.info(f"Scraping websites: {websites}")
-        for website in websites:
-            task = scraper_manager.scrape_website(
-                website, request.query, request.country
+    async def frames():
+        start = time.perf_counter()
+        total = 0
+        batch = batch_searcher.run(
+            searches,
+            deadline_ms=request.deadline_ms or DEFAULT_DEADLINE_MS,
+            max_pages=request.max_pages,
+            max_results=request.max_results,
+        )
+        try:
+            async for indexes, result in batch:
+                if "products" in result:
+                    result["products"] = [
+                        product.to_dict() for product in result["products"]
+                    ]
+                    total += len(result["products"]) * len(indexes)
+                for index in indexes:
+                    country, query = searches[index]
+                    frame = {"type": "result", "index": index, **result}
+                    frame.update(country=country, query=query)
+                    yield ndjson_frame(frame)
+
+            yield ndjson_frame(
+                {
+                    "type": "summary",
+                    "searches": len(searches),
+                    "unique_searches": len(groups),
+                    "total_products": total,
+                    "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+                }
             )
-            tasks.append(task)
-
-        # Wait for all scraping tasks to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Flatten and filter results
-        all_products = []
-        for result in results:
-            if isinstance(result, list):
-                all_products.extend(result)
-            elif isinstance(result, Exception):
-                logger.error(f"Scraping error: {result}")
-
-        # Validate and rank results using AI
-        validated_products = await ai_validator.validate_and_rank(
-            all_products, request.query
+        finally:
+            await batch.aclose()
+
+    return StreamingResponse(frames(), media_type="application/x-ndjson")
+
+
+@app.post("/products/details")
+async def get_product_details(request: ProductDetailsRequest):
+    """
+    Fetch product pages (Amazon links) concurrently and return their title,
+    price, feature bullets and description, cached per ASIN
+    """
+    amazon = scraper_manager.scrapers["amazon"]
+    invalid = [link for link in request.links if not amazon.is_product_url(link)]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Not Amazon product links: {', '.join(invalid)}",
         )
+    details = await amazon.get_products_details(
+        request.links, timeout=DEFAULT_DEADLINE_MS / 1000
+    )
+    return [
+        {"link": link, "asin": extract_asin(link), "details": details.get(link)}
+        for link in request.links
+    ]
 
-        # # Sort by price (ascending)
-        # validated_products.sort(
-        #     key=lambda x: float(
-        #         x.price.replace("$", "").replace(",", "").replace("₹", "")
-        #     )
-        # )
 
-        logger.info(f"Found {len(validated_products)} products")
-        return all_products
+@app.get("/price-history")
+async def get_price_history(
+    site: str,
+    country: str,
+    product_id: Optional[str] = None,
+    link: Optional[str] = None,
+    days: float = Query(default=30, gt=0),
+    limit: int = Query(default=500, ge=1, le=10000),
+):
+    """
+    Price points, min/max/avg over the last ``days`` and price-drop detection
+    for one product, identified by its ID (ASIN, eBay item...) or its link
+    """
+    if product_id is None:
+        if link is None:
+            raise HTTPException(
+                status_code=400, detail="Either product_id or link is required"
+            )
+        site, product_id = listing_key(site, link)
+    else:
+        site = site_key(site)
 
-    except Exception as e:
-        logger.error(f"Search error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    history = await price_history.history(
+        site, product_id, country, since=time.time() - days * 86400, limit=limit
+    )
+    if history is None:
+        raise HTTPException(status_code=404, detail="No price history for product")
+    return history
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics of this worker process"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/health")
@@ -107,10 +502,95 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/admin/cache")
+async def get_cache_stats():
+    """Search cache hit/miss/eviction counters"""
+    return {
+        **search_cache.stats(),
+        "single_flight": scraper_manager.single_flight.stats(),
+    }
+
+
+@app.get("/admin/price-history")
+async def get_price_history_stats():
+    """Price history writer queue and batch counters"""
+    return price_history.stats()
+
+
+class WatchRequest(BaseModel):
+    country: str
+    query: str
+
+
+@app.get("/admin/refresh")
+async def get_refresh_stats():
+    """Background refresh scheduler counters"""
+    return refresh_scheduler.stats()
+
+
+@app.get("/admin/watchlist")
+async def get_watchlist(limit: int = Query(default=100, ge=1, le=5000)):
+    """Watched queries, most popular first, with their refresh intervals"""
+    return refresh_scheduler.watchlist(limit)
+
+
+@app.post("/admin/watchlist")
+async def add_to_watchlist(request: WatchRequest):
+    """Pin a query so it is kept fresh in the background"""
+    entry = refresh_scheduler.watch(request.country, request.query, pinned=True)
+    if entry is None:
+        raise HTTPException(status_code=409, detail="Watchlist is full or disabled")
+    return entry.to_dict(time.time(), refresh_scheduler.half_life)
+
+
+@app.delete("/admin/watchlist")
+async def remove_from_watchlist(request: WatchRequest):
+    """Stop refreshing a query"""
+    if not refresh_scheduler.unwatch(request.country, request.query):
+        raise HTTPException(status_code=404, detail="Query is not watched")
+    return {"removed": True}
+
+
+@app.get("/admin/governor")
+async def get_governor_stats():
+    """Per-domain request rate, concurrency and back-off state, plus retries and hedging"""
+    return {
+        **governor.stats(),
+        "retries": retry_policy.stats(),
+        "hedging": hedger.stats(),
+    }
+
+
+@app.get("/admin/batch")
+async def get_batch_stats():
+    """Batch search counters and per-site fetches in flight"""
+    return batch_searcher.stats()
+
+
+@app.get("/admin/selectors")
+async def get_selector_stats():
+    """Selector config version and how often each selector matched, per site
+    and list, across the server and its parse workers"""
+    return selector_config.report()
+
+
+@app.get("/admin/extraction")
+async def get_extraction_stats():
+    """Attempts, outcomes and mean time of each extraction tier per site;
+    a structured-data success rate that drops means a site changed its
+    embedded data and pages are falling back to the HTML selectors"""
+    return extraction_stats.stats()
+
+
+@app.get("/admin/breakers")
+async def get_breaker_stats():
+    """Per-site circuit breaker state"""
+    return scraper_manager.breaker_stats()
+
+
 @app.get("/supported-countries")
 async def get_supported_countries():
     """Get list of supported countries"""
-    country_mapper = CountryMapper()
     return {"countries": country_mapper.get_supported_countries()}
 
 
@@ -1,15 +1,25 @@
 import asyncio
-import random
 import json
+import os
 import re
-from typing import List, Dict, Any, Optional
-from urllib.parse import quote_plus, urljoin
-from bs4 import BeautifulSoup
+import time
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import quote_plus, urljoin, urlsplit
 import logging
+from utils.product_identity import extract_asin
+from utils.search_cache import CacheEntry, LRUCache
+from utils.product import Product
 from .base_scraper import BaseScraper
+from .governor import domain_of
+from .html_parser import Node, SelectorTable, extract_element, extract_elements
 
 logger = logging.getLogger(__name__)
 
+# Start-tag attribute of each organic result on a search page
+SEARCH_RESULT_MARKER = b'data-component-type="s-search-result"'
+ASIN_ATTR_RE = re.compile(rb'data-asin="([A-Z0-9]{10})"')
+
 # # Add logs to log.txt file
 # logging.basicConfig(
 #     filename="log.txt",
@@ -19,8 +29,39 @@ logger = logging.getLogger(__name__)
 
 
 class AmazonScraper(BaseScraper):
-    def __init__(self):
+    site_name = "amazon"
+    results_per_page = 15
+
+    # Served instead of results when Amazon suspects a bot
+    captcha_markers = (
+        b"/errors/validateCaptcha",
+        b"Type the characters you see in this image",
+    )
+
+    # Element ids of the product page regions get_product_details reads
+    detail_regions = {
+        "title": ["productTitle"],
+        "price": [
+            "corePriceDisplay_desktop_feature_div",
+            "corePrice_feature_div",
+            "corePrice_desktop",
+            "priceblock_dealprice",
+            "priceblock_ourprice",
+        ],
+        "features": ["feature-bullets"],
+        "description": ["feature-bullets", "productDescription"],
+    }
+
+    def __init__(
+        self,
+        details_cache_size: int = int(os.getenv("DETAILS_CACHE_MAX_ENTRIES", "4096")),
+        details_ttl: float = float(os.getenv("DETAILS_CACHE_TTL", "3600")),
+        details_concurrency: int = int(os.getenv("DETAILS_CONCURRENCY", "4")),
+    ):
         super().__init__()
+        self.details_cache = LRUCache(details_cache_size)
+        self.details_ttl = details_ttl
+        self.details_concurrency = max(1, details_concurrency)
         self.domain_map = {
             "US": "amazon.com",
             "IN": "amazon.in",
@@ -65,50 +106,6 @@ class AmazonScraper(BaseScraper):
             "SE": "SEK",
         }
 
-        # Amazon-specific selectors for different page layouts
-        self.product_selectors = [
-            'div[data-component-type="s-search-result"]',
-            'div[data-asin]:not([data-asin=""])',
-            ".s-result-item",
-            ".sg-col-inner .s-widget-container",
-        ]
-
-        self.title_selectors = [
-            "h2 a span",
-            "h2 .a-link-normal span",
-            ".s-size-mini span",
-            "h2 span",
-            ".a-size-base-plus",
-            ".a-size-medium",
-        ]
-
-        self.price_selectors = [
-            ".a-price-whole",
-            ".a-price .a-offscreen",
-            ".a-price-symbol + .a-price-whole",
-            ".a-color-price",
-            ".sx-price-whole",
-        ]
-
-        self.link_selectors = [
-            "h2 a",
-            ".a-link-normal",
-            'a[href*="/dp/"]',
-            'a[href*="/gp/product/"]',
-        ]
-
-        self.image_selectors = [
-            ".s-image",
-            'img[data-image-latency="s-product-image"]',
-            ".a-dynamic-image",
-        ]
-
-        self.rating_selectors = [
-            ".a-icon-alt",
-            'span[aria-label*="stars"]',
-            ".a-star-medium .a-icon-alt",
-        ]
-
     def get_headers(self) -> Dict[str, str]:
         """Get randomized headers for Amazon requests"""
         headers = super().get_headers()
@@ -130,75 +127,111 @@ class AmazonScraper(BaseScraper):
         headers.update(amazon_headers)
         return headers
 
+    def get_page_url(self, query: str, country: str, page: int) -> str:
+        if page == 1:
+            return self.get_search_url(query, country)
+        domain = self.domain_map.get(country.upper(), "amazon.com")
+        encoded_query = quote_plus(query)
+        return (
+            f"{self.base_url(domain)}/s?k={encoded_query}&page={page}&ref=sr_pg_{page}"
+        )
+
     def get_search_url(self, query: str, country: str) -> str:
         """Generate Amazon search URL for specific country"""
         domain = self.domain_map.get(country.upper(), "amazon.com")
         encoded_query = quote_plus(query)
 
-        # Different URL patterns for different Amazon domains
-        if domain == "amazon.co.jp":
-            return f"https://www.{domain}/s?k={encoded_query}&ref=sr_pg_1"
-        else:
-            logger.info(
-                f"URL for Scrape: {f'https://www.{domain}/s?k={encoded_query}&ref=sr_pg_1'}"
-            )
-            return f"https://www.{domain}/s?k={encoded_query}&ref=sr_pg_1"
+        return f"{self.base_url(domain)}/s?k={encoded_query}&ref=sr_pg_1"
 
-    async def search_products(self, query: str, country: str) -> List[Dict[str, Any]]:
+    async def search_products(
+        self, query: str, country: str, page: int = 1
+    ) -> List[Product]:
         """Search for products on Amazon"""
-        print(f"Searching Amazon for query: {query} in country: {country}")
-        products = []
         country_upper = country.upper()
 
         if country_upper not in self.domain_map:
-            logger.warning(f"Country {country} not supported for Amazon")
-            return products
-
-        try:
-            url = self.get_search_url(query, country)
-            logger.info(f"Searching Amazon {country_upper}: {url}")
+            logger.warning("Country %s not supported for Amazon", country)
+            return []
+
+        url = self.get_page_url(query, country, page)
+        logger.debug("Searching Amazon %s: %s", country_upper, url)
+
+        html = await self.fetch_bytes(url)
+        if not html:
+            logger.warning("No HTML content received from Amazon %s", country_upper)
+            return []
+
+        return await self.parse_page(html, query, country)
+
+    def parse_structured(
+        self, html: bytes, query: str, country: str
+    ) -> Optional[List[Product]]:
+        """
+        Amazon embeds no product JSON, but every organic result is one element
+        carrying ``data-asin`` and the search-result component marker. Those
+        are cut out of the page by a byte scan and only they are parsed, not
+        the whole (mostly navigation and script) document.
+        """
+        country_upper = country.upper()
+        selectors = self.selector_table(country_upper)
+        domain = self.domain_map.get(country_upper, "amazon.com")
 
-            # Add random delay to avoid being blocked
-            await asyncio.sleep(random.uniform(1, 3))
+        products = []
+        results = extract_elements(html, SEARCH_RESULT_MARKER)
+        for i, fragment in enumerate(islice(results, self.results_per_page)):
+            try:
+                container = self.parse_html(fragment)
+                product = self._parse_product(selectors, container, country_upper)
+                if product is None:
+                    continue
+                if not product.link:
+                    asin = ASIN_ATTR_RE.search(fragment, 0, fragment.find(b">"))
+                    if asin:
+                        product.link = (
+                            f"{self.base_url(domain)}/dp/{asin.group(1).decode()}"
+                        )
+                if self._is_valid_product(product, query):
+                    products.append(product)
+            except Exception as e:
+                logger.debug("Error parsing product %d: %s", i + 1, e)
+        return products
 
-            html = await self.fetch_page(url)
-            if not html:
-                logger.warning(f"No HTML content received from Amazon {country_upper}")
-                return products
+    def parse_search_results(
+        self, html: bytes, query: str, country: str
+    ) -> List[Product]:
+        """Parse an Amazon search results page"""
+        products = []
+        country_upper = country.upper()
 
-            soup = BeautifulSoup(html, "html.parser")
-            logger.info(f"Parsing HTML content for Amazon {soup}")
+        try:
+            selectors = self.selector_table(country_upper)
+            document = self.parse_html(html)
+            logger.debug("Parsing %d bytes of Amazon HTML", len(html))
 
             # Try different product container selectors
-            product_containers = []
-            for selector in self.product_selectors:
-                containers = soup.select(selector)
-                if containers:
-                    product_containers = containers
-                    logger.info(
-                        f"Found {len(containers)} products using selector: {selector}"
-                    )
-                    break
+            product_containers = selectors.first_nonempty(document, "product")
+            if product_containers:
+                logger.debug("Found %d product containers", len(product_containers))
 
             if not product_containers:
-                logger.warning(f"No product containers found on Amazon {country_upper}")
+                logger.warning(
+                    "No product containers found on Amazon %s", country_upper
+                )
                 return products
 
             # Parse each product
-            for i, container in enumerate(
-                product_containers[:15]
-            ):  # Limit to 15 results
+            for i, container in enumerate(product_containers[: self.results_per_page]):
                 try:
-                    product = await self._parse_product(container, country_upper)
+                    product = self._parse_product(selectors, container, country_upper)
                     if product and self._is_valid_product(product, query):
                         products.append(product)
 
                 except Exception as e:
-                    logger.debug(f"Error parsing product {i+1}: {e}")
+                    logger.debug("Error parsing product %d: %s", i + 1, e)
                     continue
 
-            logger.info(
-                f"Successfully parsed {len(products)} products from Amazon {country_upper}"
+            logger.debug(
+                "Parsed %d products from Amazon %s", len(products), country_upper
             )
 
         except Exception as e:
@@ -206,116 +239,133 @@ class AmazonScraper(BaseScraper):
 
         return products
 
-    async def _parse_product(self, container, country: str) -> Optional[Dict[str, Any]]:
+    def _parse_product(
+        self, selectors: SelectorTable, container: Node, country: str
+    ) -> Optional[Product]:
         """Parse individual product from container"""
         try:
             # Extract product name
-            product_name = self._extract_product_name(container)
+            product_name = self._extract_product_name(selectors, container)
             if not product_name:
                 return None
 
             # Extract price
-            price = self._extract_price(container)
-            if not price or float(price) <= 0:
+            price = self._extract_price(selectors, container)
+            if not price:
                 return None
 
             # Extract link
-            link = self._extract_link(container, country)
+            link = self._extract_link(selectors, container, country)
 
             # Extract image URL
-            image_url = self._extract_image_url(container)
+            image_url = self._extract_image_url(selectors, container)
 
             # Extract rating
-            rating = self._extract_rating(container)
+            rating = self._extract_rating(selectors, container)
 
             # Extract availability
-            availability = self._extract_availability(container)
+            availability = self._extract_availability(selectors, container)
 
             # Get currency for country
             currency = self.currency_map.get(country, "USD")
 
-            return {
-                "link": link,
-                "price": price,
-                "currency": currency,
-                "productName": product_name,
-                "website": "Amazon",
-                "availability": availability,
-                "rating": rating,
-                "image_url": image_url,
-            }
+            return Product(
+                link=link,
+                price=price,
+                currency=currency,
+                productName=product_name,
+                website="Amazon",
+                availability=availability,
+                rating=rating,
+                image_url=image_url,
+            )
 
         except Exception as e:
-            logger.debug(f"Error in _parse_product: {e}")
+            logger.debug("Error in _parse_product: %s", e)
             return None
 
-    def _extract_product_name(self, container) -> str:
+    def _extract_product_name(self, selectors: SelectorTable, container: Node) -> str:
         """Extract product name using multiple selectors"""
-        for selector in self.title_selectors:
+        for key, selector in selectors.entries("title"):
             elements = container.select(selector)
             for element in elements:
-                text = element.get_text(strip=True)
+                text = element.text()
                 if text and len(text) > 10:  # Ensure meaningful title
                     # Clean up the title
                     text = re.sub(r"\s+", " ", text)  # Remove extra whitespace
                     text = text.replace("\n", " ").strip()
+                    selectors.hit(key)
                     return text[:200]  # Limit length
+        selectors.miss("title")
         return ""
 
-    def _extract_price(self, container) -> str:
+    def _extract_price(self, selectors: SelectorTable, container: Node) -> str:
         """Extract price using multiple selectors"""
-        for selector in self.price_selectors:
+        for key, selector in selectors.entries("price"):
             elements = container.select(selector)
             for element in elements:
-                price_text = element.get_text(strip=True)
+                price_text = element.text()
                 if price_text:
                     # Clean and extract numeric price
                     price = self._clean_price(price_text)
                     if price and float(price) > 0:
+                        selectors.hit(key)
                         return price
+        selectors.miss("price")
         return "0"
 
-    def _extract_link(self, container, country: str) -> str:
+    def _extract_link(
+        self, selectors: SelectorTable, container: Node, country: str
+    ) -> str:
         """Extract product link"""
         domain = self.domain_map.get(country, "amazon.com")
 
-        for selector in self.link_selectors:
+        for key, selector in selectors.entries("link"):
             elements = container.select(selector)
             for element in elements:
                 href = element.get("href", "")
                 if href and ("/dp/" in href or "/gp/product/" in href):
                     if href.startswith("http"):
+                        selectors.hit(key)
                         return href
                     elif href.startswith("/"):
-                        return f"https://www.{domain}{href}"
+                        selectors.hit(key)
+                        return f"{self.base_url(domain)}{href}"
+        selectors.miss("link")
         return ""
 
-    def _extract_image_url(self, container) -> str:
+    def _extract_image_url(self, selectors: SelectorTable, container: Node) -> str:
         """Extract product image URL"""
-        for selector in self.image_selectors:
+        for key, selector in selectors.entries("image"):
             elements = container.select(selector)
             for element in elements:
                 # Try different image URL attributes
                 for attr in ["src", "data-src", "data-image-source"]:
                     img_url = element.get(attr, "")
                     if img_url and img_url.startswith("http"):
+                        selectors.hit(key)
                         return img_url
+        selectors.miss("image")
         return ""
 
-    def _extract_rating(self, container) -> Optional[float]:
+    def _extract_rating(
+        self, selectors: SelectorTable, container: Node
+    ) -> Optional[float]:
         """Extract product rating"""
-        for selector in self.rating_selectors:
+        for key, selector in selectors.entries("rating"):
             elements = container.select(selector)
             for element in elements:
-                rating_text = element.get_text(strip=True)
+                rating_text = element.text()
                 if rating_text:
                     # Extract rating from text like "4.5 out of 5 stars"
                     rating_match = re.search(r"(\d+\.?\d*)\s*out of", rating_text)
                     if rating_match:
                         try:
-                            return float(rating_match.group(1))
+                            rating = float(rating_match.group(1))
                         except ValueError:
                             continue
+                        selectors.hit(key)
+                        return rating
 
                     # Try to extract just the number
                     rating_match = re.search(r"^(\d+\.?\d*)", rating_text)
@@ -323,34 +373,32 @@ class AmazonScraper(BaseScraper):
                         try:
                             rating = float(rating_match.group(1))
                             if 0 <= rating <= 5:
+                                selectors.hit(key)
                                 return rating
                         except ValueError:
                             continue
+        selectors.miss("rating")
         return None
 
-    def _extract_availability(self, container) -> str:
+    def _extract_availability(self, selectors: SelectorTable, container: Node) -> str:
         """Extract availability information"""
         # Look for availability indicators
-        availability_selectors = [
-            ".a-color-success",
-            ".a-color-price",
-            '[data-cy="availability-recipe"]',
-            ".a-size-base.a-color-secondary",
-        ]
-
-        for selector in availability_selectors:
+        for key, selector in selectors.entries("availability"):
             elements = container.select(selector)
             for element in elements:
-                text = element.get_text(strip=True).lower()
+                text = element.text().lower()
                 if any(
                     keyword in text for keyword in ["in stock", "available", "ships"]
                 ):
+                    selectors.hit(key)
                     return "In Stock"
                 elif any(
                     keyword in text for keyword in ["out of stock", "unavailable"]
                 ):
+                    selectors.hit(key)
                     return "Out of Stock"
 
+        selectors.miss("availability")
         return "In Stock"  # Default assumption
 
     def _clean_price(self, price_text: str) -> str:
@@ -373,17 +421,13 @@ class AmazonScraper(BaseScraper):
 
         return "0"
 
-    def _is_valid_product(self, product: Dict[str, Any], query: str) -> bool:
+    def _is_valid_product(self, product: Product, query: str) -> bool:
         """Validate if product matches search criteria"""
-        if not product.get("productName") or not product.get("price"):
-            return False
-
-        price = float(product["price"])
-        if price <= 0:
+        if not product.productName or product.price_minor <= 0:
             return False
 
         # Basic relevance check
-        product_name_lower = product["productName"].lower()
+        product_name_lower = product.productName.lower()
         query_lower = query.lower()
 
         # Extract key terms from query
@@ -397,46 +441,138 @@ class AmazonScraper(BaseScraper):
         matches = sum(1 for term in query_terms if term in product_name_lower)
         return matches > 0
 
-    async def get_product_details(self, product_url: str) -> Dict[str, Any]:
-        """Get detailed information for a specific product"""
-        try:
-            html = await self.fetch_page(product_url)
-            if not html:
-                return {}
-
-            soup = BeautifulSoup(html, "html.parser")
-
-            details = {}
-
-            # Extract detailed information
-            # Title
-            title_element = soup.select_one("#productTitle")
-            if title_element:
-                details["title"] = title_element.get_text(strip=True)
+    def parse_product_details(self, html: bytes) -> Dict[str, Any]:
+        """Parse a product page, building DOMs only for the regions we read"""
+        details = {}
+        selectors = self.selector_table()
 
-            # Price
-            price_element = soup.select_one(
-                ".a-price .a-offscreen, #priceblock_dealprice, #priceblock_ourprice"
-            )
-            if price_element:
-                details["price"] = self._clean_price(price_element.get_text(strip=True))
+        def region(name: str) -> Optional[Node]:
+            for element_id in self.detail_regions[name]:
+                fragment = extract_element(html, element_id)
+                if fragment:
+                    return self.parse_html(fragment)
+            return None
 
-            # Features
-            feature_bullets = soup.select("#feature-bullets ul li")
+        # Title
+        document = region("title")
+        title_element = document and selectors.first(document, "detail_title")
+        if title_element:
+            details["title"] = title_element.text()
+
+        # Price
+        document = region("price")
+        price_element = document and selectors.first(document, "detail_price")
+        if price_element:
+            details["price"] = self._clean_price(price_element.text())
+
+        # Features
+        document = region("features")
+        if document:
+            feature_bullets = selectors.first_nonempty(document, "detail_features")
             if feature_bullets:
-                details["features"] = [
-                    li.get_text(strip=True) for li in feature_bullets[:5]
-                ]
+                details["features"] = [li.text() for li in feature_bullets[:5]]
+
+        # Description
+        document = region("description")
+        description_element = document and selectors.first(
+            document, "detail_description"
+        )
+        if description_element:
+            details["description"] = description_element.text()[:500]
+
+        return details
+
+    def _details_key(self, product_url: str) -> Optional[Tuple[str, str]]:
+        # Prices differ per marketplace, so amazon.in and amazon.com don't share
+        asin = extract_asin(product_url)
+        return (domain_of(product_url), asin) if asin else None
+
+    def is_product_url(self, url: str) -> bool:
+        """Whether ``url`` is an Amazon product link (it has an ASIN) on one of
+        the marketplaces in ``domain_map`` or the configured base URL override.
+        Only such links are fetched for details; anything else could point the
+        server at internal hosts."""
+        if not extract_asin(url):
+            return False
+        try:
+            parts = urlsplit(url)
+            port = parts.port
+        except ValueError:
+            return False
+        if parts.scheme not in ("http", "https") or parts.username is not None:
+            return False
 
-            # Description
-            description_element = soup.select_one(
-                "#feature-bullets, #productDescription"
-            )
-            if description_element:
-                details["description"] = description_element.get_text(strip=True)[:500]
+        override = self.base_url_overrides.get(self.site_name)
+        if override:
+            base = urlsplit(override.rstrip("/"))
+            if (parts.scheme, parts.netloc.lower()) == (
+                base.scheme,
+                base.netloc.lower(),
+            ) and (parts.path + "/").startswith(base.path + "/"):
+                return True
+
+        host = (parts.hostname or "").lower()
+        if host.startswith("www."):
+            host = host[4:]
+        return (
+            parts.scheme == "https"
+            and port is None
+            and host in self.domain_map.values()
+        )
 
-            return details
+    async def get_product_details(self, product_url: str) -> Dict[str, Any]:
+        """Get detailed information for a specific product, cached per ASIN"""
+        if not self.is_product_url(product_url):
+            logger.warning("Refusing to fetch details of %s", product_url)
+            return {}
+        key = self._details_key(product_url)
+        if key is not None:
+            entry = self.details_cache.get(key)
+            if entry is not None and entry.is_fresh(time.time()):
+                return dict(entry.value)
 
+        try:
+            html = await self.fetch_bytes(product_url)
+            if not html:
+                return {}
+            details = self.parse_product_details(html)
         except Exception as e:
             logger.error(f"Error getting product details: {e}")
             return {}
+
+        if details and key is not None:
+            self.details_cache.set(
+                key, CacheEntry(details, time.time(), self.details_ttl, 0)
+            )
+        return dict(details)
+
+    async def get_products_details(
+        self, product_urls: List[str], timeout: Optional[float] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Details for many product pages, at most ``details_concurrency`` fetched
+        at once. Pages still loading after ``timeout`` seconds are left out.
+        """
+        semaphore = asyncio.Semaphore(self.details_concurrency)
+
+        async def fetch(url: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.get_product_details(url)
+
+        tasks = {
+            url: asyncio.ensure_future(fetch(url))
+            for url in dict.fromkeys(product_urls)
+        }
+        if not tasks:
+            return {}
+        try:
+            await asyncio.wait(tasks.values(), timeout=timeout)
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+        return {
+            url: task.result()
+            for url, task in tasks.items()
+            if task.done() and not task.cancelled() and task.result()
+        }
@@ -1,24 +1,68 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from contextlib import nullcontext
+from typing import List, Dict, Optional, Tuple
 import aiohttp
 import asyncio
 from bs4 import BeautifulSoup
 import logging
 import random
 import time
+from .governor import domain_of, governor
+from .html_parser import Node, SelectorTable, get_backend
+from .http_pool import http_pool
+from .parse_pool import parse_pool
+from .retry import hedger, retry_policy
+from .selector_config import selector_config
+from .structured_data import extraction_stats
+from utils.logging_config import html_capture
+from utils.metrics import FETCH_BYTES, FETCH_SECONDS, PARSE_SECONDS, PRODUCTS_FOUND
+from utils.metrics import stage
+from utils.product import Product
+from utils.settings import env_mapping
 
 logger = logging.getLogger(__name__)
 
+# Responses that mean "slow down" rather than "this request failed"
+THROTTLE_STATUSES = {429, 503}
+
+
+def retry_after(response: aiohttp.ClientResponse) -> Optional[float]:
+    """Seconds from a numeric Retry-After header, if the server sent one"""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
 
 class BaseScraper(ABC):
+    # Key used by ScraperManager, CountryMapper and per-site settings
+    site_name = ""
+
+    # Products taken from one results page
+    results_per_page = 10
+
+    # Byte strings that only appear on the site's captcha / bot-check page
+    captcha_markers: Tuple[bytes, ...] = ()
+
     def __init__(self):
         self.session = None
+        # None means the HTML_PARSER_BACKEND default
+        self.parser_backend: Optional[str] = None
+        # e.g. SCRAPER_BASE_URLS=amazon=http://127.0.0.1:9000/amazon for load tests
+        self.base_url_overrides = env_mapping("SCRAPER_BASE_URLS", str)
+        self.retry_policy = retry_policy
+        self.hedger = hedger
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
         ]
 
+    def base_url(self, domain: str) -> str:
+        """Origin for a retailer domain, unless overridden to point at a stand-in server"""
+        override = self.base_url_overrides.get(self.site_name)
+        return override.rstrip("/") if override else f"https://www.{domain}"
+
     def get_headers(self) -> Dict[str, str]:
         return {
             "User-Agent": random.choice(self.user_agents),
@@ -30,33 +74,131 @@ class BaseScraper(ABC):
         }
 
     async def get_session(self):
-        if not self.session:
-            connector = aiohttp.TCPConnector(limit=10, limit_per_host=5)
-            timeout = aiohttp.ClientTimeout(total=30)
-            self.session = aiohttp.ClientSession(
-                connector=connector, timeout=timeout, headers=self.get_headers()
-            )
+        """Borrow the process-wide session; scrapers never own sockets"""
+        self.session = await http_pool.get_session()
         return self.session
 
+    def is_captcha(self, body: bytes) -> bool:
+        """Whether a 200 response is really a bot-check page"""
+        return any(marker in body for marker in self.captcha_markers)
+
+    async def fetch_bytes(self, url: str) -> bytes:
+        """Fetch raw webpage bytes, retrying transient failures per the retry policy"""
+        with stage("fetch", FETCH_SECONDS, self.site_name):
+            body = await self._fetch_with_retries(url)
+        FETCH_BYTES.observe(len(body), self.site_name)
+        return body
+
+    async def _fetch_with_retries(self, url: str) -> bytes:
+        policy = self.retry_policy
+        deadline = time.monotonic() + policy.total_ms / 1000
+        for attempt in range(policy.max_attempts):
+            try:
+                status, body = await asyncio.wait_for(
+                    self._fetch_hedged(url), deadline - time.monotonic()
+                )
+                if status == 200 or not policy.should_retry_status(status):
+                    return body
+                failure = f"HTTP {status}"
+            except Exception as e:
+                if not policy.should_retry_error(e):
+                    logger.error(f"Error fetching {url}: {e}")
+                    return b""
+                failure = f"{type(e).__name__} {e}".strip()
+
+            delay = policy.backoff(attempt)
+            if attempt + 1 >= policy.max_attempts or (
+                time.monotonic() + delay >= deadline
+            ):
+                policy.counters["gave_up"] += 1
+                logger.warning(
+                    f"Giving up on {url} after {attempt + 1} attempt(s): {failure}"
+                )
+                return b""
+            policy.counters["retries"] += 1
+            logger.info("Retrying %s in %.2fs after %s", url, delay, failure)
+            await asyncio.sleep(delay)
+        return b""
+
+    async def _fetch_hedged(self, url: str) -> Tuple[int, bytes]:
+        """One attempt; once it outlives the domain's p95 a duplicate races it"""
+        domain = domain_of(url)
+        delay = self.hedger.delay_for(domain)
+        first = asyncio.ensure_future(self._fetch_once(url))
+        if delay is None:
+            return await first
+
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self.hedger.try_spend(domain):
+                return await first
+
+            logger.info("Hedging %s after %.0fms", url, delay * 1000)
+            tasks.append(asyncio.ensure_future(self._fetch_once(url)))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # The first usable answer wins; a copy that raised or got a
+                # retryable status lets the other one finish
+                for task in done:
+                    if task.exception() is None and not (
+                        self.retry_policy.should_retry_status(task.result()[0])
+                    ):
+                        if task is not first:
+                            self.hedger.counters["hedge_wins"] += 1
+                        return task.result()
+            return first.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _fetch_once(self, url: str) -> Tuple[int, bytes]:
+        """A single GET paced by the domain's governor; returns (status, body)"""
+        domain = governor.for_url(url)
+        session = await self.get_session()
+        async with domain.slot() if domain else nullcontext():
+            start = time.monotonic()
+            async with session.get(url, headers=self.get_headers()) as response:
+                status = response.status
+                if status in THROTTLE_STATUSES and domain:
+                    domain.throttled(retry_after(response))
+                if status != 200:
+                    logger.warning("HTTP %d for URL: %s", status, url)
+                    return status, b""
+                body = await response.read()
+            self.hedger.observe(domain_of(url), time.monotonic() - start)
+
+        if self.is_captcha(body):
+            logger.warning("Captcha page for URL: %s", url)
+            if domain:
+                domain.throttled(captcha=True)
+            return status, b""
+        if domain:
+            domain.succeeded()
+        return status, body
+
     async def fetch_page(self, url: str) -> str:
         """Fetch webpage content with error handling"""
-        try:
-            session = await self.get_session()
-            async with session.get(url) as response:
-                if response.status == 200:
-                    return await response.text()
-                else:
-                    logger.warning(f"HTTP {response.status} for URL: {url}")
-                    return ""
-        except Exception as e:
-            logger.error(f"Error fetching {url}: {e}")
-            return ""
+        body = await self.fetch_bytes(url)
+        return body.decode("utf-8", errors="replace") if body else ""
 
     async def close(self):
-        """Ensure the session is properly closed"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """Release the borrowed session; the shared pool keeps its connections"""
+        self.session = None
+
+    def selector_table(self, country: str = "") -> SelectorTable:
+        """This site's named CSS selector lists for ``country`` (each tried in
+        order until one matches), from scrapers/selectors.yaml"""
+        return selector_config.table(
+            self.site_name, country, get_backend(self.parser_backend)
+        )
+
+    def parse_html(self, html) -> Node:
+        """Build a document with the configured parser backend"""
+        return get_backend(self.parser_backend).parse(html)
 
     def parse_price(self, price_text: str) -> str:
         """Extract numeric price from text"""
@@ -72,9 +214,75 @@ class BaseScraper(ABC):
         match = re.search(r"[\d.]+", price_text)
         return match.group() if match else "0"
 
+    def get_page_url(self, query: str, country: str, page: int) -> str:
+        """URL of results page ``page`` (1-based); "" when the site isn't paginated"""
+        return self.get_search_url(query, country) if page == 1 else ""
+
+    async def search_products(
+        self, query: str, country: str, page: int = 1
+    ) -> List[Product]:
+        """Search for products on the website: fetch here, parse in the parse pool"""
+        url = self.get_page_url(query, country, page)
+        if not url:
+            return []
+
+        html = await self.fetch_bytes(url)
+        if not html:
+            return []
+
+        return await self.parse_page(html, query, country)
+
+    async def parse_page(self, html: bytes, query: str, country: str) -> List[Product]:
+        """parse_search_results in the parse pool, timed per site"""
+        with stage("parse", PARSE_SECONDS, self.site_name):
+            products = await parse_pool.parse(type(self), html, query, country)
+        PRODUCTS_FOUND.observe(len(products), self.site_name)
+        if html_capture.enabled:
+            await html_capture.save(
+                self.site_name, html, f"{country}-{query}", empty=not products
+            )
+        return products
+
+    def extract_products(self, html: bytes, query: str, country: str) -> List[Product]:
+        """Products of a results page: the structured-data tier first, the
+        HTML selectors only when it finds nothing. Each tier's time and
+        result go to ``extraction_stats``."""
+        if type(self).parse_structured is not BaseScraper.parse_structured:
+            products = self._run_tier(
+                "structured", self.parse_structured, html, query, country
+            )
+            if products:
+                return products
+        return self._run_tier("html", self.parse_search_results, html, query, country)
+
+    def _run_tier(
+        self, tier: str, parse, html: bytes, query: str, country: str
+    ) -> List[Product]:
+        start = time.perf_counter()
+        try:
+            products = parse(html, query, country) or []
+            result = "ok" if products else "empty"
+        except Exception as e:
+            logger.warning("%s %s extraction failed: %s", self.site_name, tier, e)
+            products, result = [], "error"
+        extraction_stats.record(
+            self.site_name, tier, result, time.perf_counter() - start
+        )
+        return products
+
+    def parse_structured(
+        self, html: bytes, query: str, country: str
+    ) -> Optional[List[Product]]:
+        """Products from data the page embeds (JSON blobs, data attributes),
+        located by scanning bytes rather than building a DOM. Sites that
+        embed some override this; None or [] falls back to the HTML tier."""
+        return None
+
     @abstractmethod
-    async def search_products(self, query: str, country: str) -> List[Dict[str, Any]]:
-        """Search for products on the website"""
+    def parse_search_results(
+        self, html: bytes, query: str, country: str
+    ) -> List[Product]:
+        """Parse a search results page into Product records; must not do I/O"""
         pass
 
     @abstractmethod
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from utils.ai_validator import AIValidator
+from utils.country_mapper import CountryMapper
+from utils.search_cache import SearchCache
+from utils.settings import env_mapping
+
+logger = logging.getLogger(__name__)
+
+
+class SiteSlot:
+    """One site's share of batch fetches, counting those holding it.
+
+    Handed to the scraper manager, which takes it inside the shared fetch,
+    so a fetch keeps its slot until it finishes even after its batch search
+    stopped waiting for it.
+    """
+
+    def __init__(self, limit: int, in_flight: Dict[str, int], website: str):
+        self.semaphore = asyncio.Semaphore(max(1, int(limit)))
+        self.in_flight = in_flight
+        self.website = website
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        self.in_flight[self.website] = self.in_flight.get(self.website, 0) + 1
+
+    async def __aexit__(self, *exc_info):
+        self.in_flight[self.website] -= 1
+        self.semaphore.release()
+
+
+class BatchSearcher:
+    """Runs many (country, query) searches as one job.
+
+    Repeated searches in a batch are run once and answered for every index
+    that asked for them. Site fetches wait for a per-site slot that all
+    batches share, so a bulk job can't flood one retailer however many
+    batches run at once; cache hits need no slot, and each site's latency
+    budget includes the wait for one. The domain governor and single-flight
+    still apply underneath.
+    """
+
+    def __init__(
+        self,
+        manager,
+        country_mapper: CountryMapper,
+        validator: AIValidator,
+        concurrency: int = int(os.getenv("BATCH_CONCURRENCY", "16")),
+        site_concurrency: int = int(os.getenv("BATCH_SITE_CONCURRENCY", "4")),
+        site_concurrencies: Optional[Dict[str, int]] = None,
+    ):
+        self.manager = manager
+        self.country_mapper = country_mapper
+        self.validator = validator
+        self.concurrency = max(1, concurrency)
+        self.site_concurrency = site_concurrency
+        self.site_concurrencies = (
+            site_concurrencies
+            if site_concurrencies is not None
+            else env_mapping("BATCH_SITE_CONCURRENCIES", int)
+        )
+        self._site_slots: Dict[str, SiteSlot] = {}
+        self.in_flight: Dict[str, int] = {}
+        self.counters = {"batches": 0, "searches": 0, "unique_searches": 0}
+
+    @staticmethod
+    def group(searches: List[Tuple[str, str]]) -> Dict[Tuple[str, str], List[int]]:
+        """Input indexes per distinct (country, normalized query)"""
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for index, (country, query) in enumerate(searches):
+            key = (country.upper(), SearchCache.normalize_query(query))
+            groups.setdefault(key, []).append(index)
+        return groups
+
+    async def run(
+        self,
+        searches: List[Tuple[str, str]],
+        deadline_ms: Optional[float] = None,
+        max_pages: int = 1,
+        max_results: Optional[int] = None,
+    ) -> AsyncIterator[Tuple[List[int], Dict[str, Any]]]:
+        """Yield (input indexes, result) for each distinct search as it finishes"""
+        groups = self.group(searches)
+        self.counters["batches"] += 1
+        self.counters["searches"] += len(searches)
+        self.counters["unique_searches"] += len(groups)
+
+        jobs: asyncio.Queue = asyncio.Queue()
+        for indexes in groups.values():
+            # The first spelling of a repeated search is the one scraped
+            jobs.put_nowait((indexes, searches[indexes[0]]))
+        done: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            while True:
+                try:
+                    indexes, (country, query) = jobs.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    result = await self.search(
+                        country, query, deadline_ms, max_pages, max_results
+                    )
+                except Exception as e:
+                    logger.error(f"Batch search for '{query}' ({country}) failed: {e}")
+                    result = {"country": country, "query": query, "error": str(e)}
+                await done.put((indexes, result))
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(self.concurrency, len(groups)))
+        ]
+        try:
+            for _ in range(len(groups)):
+                yield await done.get()
+        finally:
+            # Client went away: stop starting searches (shared scrapes keep running)
+            for task in workers:
+                task.cancel()
+
+    async def search(
+        self,
+        country: str,
+        query: str,
+        deadline_ms: Optional[float] = None,
+        max_pages: int = 1,
+        max_results: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """One search across the country's sites, validated and ranked"""
+        websites = self.country_mapper.get_websites_for_country(country)
+        start = time.perf_counter()
+
+        results = await asyncio.gather(
+            *(
+                self.manager.scrape_with_status(
+                    website,
+                    query,
+                    country,
+                    deadline_ms,
+                    max_pages=max_pages,
+                    max_results=max_results,
+                    validator=self.validator,
+                    slot=self._site_slot(website),
+                )
+                for website in websites
+            )
+        )
+        products = [product for result in results for product in result["products"]]
+        ranked = await self.validator.validate_and_rank(products, query)
+        return {
+            "country": country,
+            "query": query,
+            "products": ranked,
+            "sites": {
+                result["website"]: {
+                    "status": result["status"],
+                    "error": result["error"],
+                    "elapsed_ms": result["elapsed_ms"],
+                    "count": len(result["products"]),
+                }
+                for result in results
+            },
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+
+    def _site_slot(self, website: str) -> SiteSlot:
+        slot = self._site_slots.get(website)
+        if slot is None:
+            limit = self.site_concurrencies.get(website, self.site_concurrency)
+            slot = self._site_slots[website] = SiteSlot(limit, self.in_flight, website)
+        return slot
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "in_flight": dict(self.in_flight)}
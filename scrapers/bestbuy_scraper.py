@@ -1,43 +1,77 @@
-from typing import List, Dict, Any
-from bs4 import BeautifulSoup
+from typing import List, Optional
 import urllib.parse
 import logging
+from utils.product import Product
 from .base_scraper import BaseScraper
+from .structured_data import dig, json_ld, json_ld_products
 
 logger = logging.getLogger(__name__)
 
 
 class BestBuyScraper(BaseScraper):
+    site_name = "bestbuy"
+
     def get_search_url(self, query: str, country: str) -> str:
         if country != "US":
             return ""  # Best Buy is US-specific
 
         # Properly encode the query to avoid issues with special characters
         encoded_query = urllib.parse.quote_plus(query)
-        return f"https://www.bestbuy.com/site/searchpage.jsp?st={encoded_query}"
+        base_url = self.base_url("bestbuy.com")
+        return f"{base_url}/site/searchpage.jsp?st={encoded_query}"
+
+    def parse_structured(
+        self, html: bytes, query: str, country: str
+    ) -> Optional[List[Product]]:
+        """Results from the page's schema.org ItemList (JSON-LD)"""
+        if country != "US":
+            return []
 
-    async def search_products(self, query: str, country: str) -> List[Dict[str, Any]]:
+        items = [item for block in json_ld(html) for item in json_ld_products(block)]
+        products = []
+        for item in items[: self.results_per_page]:
+            offers = item.get("offers") or {}
+            if isinstance(offers, list):
+                offers = offers[0] if offers else {}
+            # Absolute bestbuy.com links; keep the path on our base URL
+            url = urllib.parse.urlsplit(item.get("url") or "")
+            path = url.path + (f"?{url.query}" if url.query else "")
+            rating = dig(item, "aggregateRating", "ratingValue")
+            image = item.get("image") or ""
+            if isinstance(image, list):
+                image = image[0] if image else ""
+            product = Product(
+                link=f"{self.base_url('bestbuy.com')}{path}" if path else "",
+                price=self.parse_price(str(offers.get("price") or "0")),
+                currency=offers.get("priceCurrency") or "USD",
+                productName=item.get("name") or "",
+                website="Best Buy",
+                availability=(
+                    "Out of Stock"
+                    if "OutOfStock" in str(offers.get("availability") or "")
+                    else "In Stock"
+                ),
+                rating=float(rating) if rating is not None else None,
+                image_url=image if isinstance(image, str) else "",
+            )
+            if product.productName and product.price_minor > 0:
+                products.append(product)
+        return products
+
+    def parse_search_results(
+        self, html: bytes, query: str, country: str
+    ) -> List[Product]:
         products = []
 
         if country != "US":
             return products
 
         try:
-            url = self.get_search_url(query, country)
-            if not url:
-                return products
-
-            logger.info(f"Fetching Best Buy URL: {url}")
-            html = await self.fetch_page(url)
-
-            if not html:
-                logger.warning(f"Failed to fetch Best Buy page for query: {query}")
-                return products
-
-            soup = BeautifulSoup(html, "html.parser")
+            selectors = self.selector_table(country)
+            document = self.parse_html(html)
 
             # Best Buy product containers
-            product_containers = soup.find_all("li", class_="sku-item")
+            product_containers = selectors.first_nonempty(document, "product")
 
             if not product_containers:
                 logger.warning(
@@ -45,47 +79,40 @@ class BestBuyScraper(BaseScraper):
                 )
                 return products
 
-            for container in product_containers[:10]:  # Limit to first 10 results
+            for container in product_containers[: self.results_per_page]:
                 try:
                     # Product name
-                    name_elem = container.find("h4", class_="sku-header")
-                    product_name = name_elem.get_text(strip=True) if name_elem else ""
+                    name_elem = selectors.first(container, "title")
+                    product_name = name_elem.text() if name_elem else ""
 
                     # Price
-                    price_elem = container.find(
-                        "span", class_="sr-only"
-                    ) or container.find("span", attrs={"aria-label": True})
-                    price = self.parse_price(
-                        price_elem.get_text(strip=True) if price_elem else "0"
-                    )
+                    price_elem = selectors.first(container, "price")
+                    price = self.parse_price(price_elem.text() if price_elem else "0")
 
                     # Link
-                    link_elem = (
-                        container.find("h4").find("a") if container.find("h4") else None
-                    )
+                    link_elem = selectors.first(container, "link")
                     link = (
-                        f"https://www.bestbuy.com{link_elem['href']}"
+                        f"{self.base_url('bestbuy.com')}{link_elem['href']}"
                         if link_elem
                         else ""
                     )
 
                     # Image
-                    img_elem = container.find("img")
+                    img_elem = selectors.first(container, "image")
                     image_url = img_elem.get("src", "") if img_elem else ""
 
-                    if product_name and price and float(price) > 0:
-                        products.append(
-                            {
-                                "link": link,
-                                "price": price,
-                                "currency": "USD",
-                                "productName": product_name,
-                                "website": "Best Buy",
-                                "availability": "In Stock",
-                                "rating": None,
-                                "image_url": image_url,
-                            }
-                        )
+                    product = Product(
+                        link=link,
+                        price=price,
+                        currency="USD",
+                        productName=product_name,
+                        website="Best Buy",
+                        availability="In Stock",
+                        rating=None,
+                        image_url=image_url,
+                    )
+                    if product_name and product.price_minor > 0:
+                        products.append(product)
 
                 except Exception as e:
                     logger.warning(f"Error parsing Best Buy product: {e}")
@@ -0,0 +1,121 @@
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of scraping a site whose breaker is open"""
+
+    def __init__(self, name: str, retry_in_s: float):
+        super().__init__(f"{name} circuit open, retrying in {retry_in_s:.0f}s")
+        self.name = name
+        self.retry_in_s = retry_in_s
+
+
+class CircuitBreaker:
+    """Stops calling a site after repeated failures, then probes it again.
+
+    closed: every call goes through; ``failure_threshold`` consecutive
+    failures open the circuit.
+    open: calls are rejected without any I/O for ``cooldown_s``.
+    half_open: up to ``half_open_probes`` calls go through; a success closes
+    the circuit, a failure opens it for another cooldown.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = int(os.getenv("BREAKER_FAILURES", "5")),
+        cooldown_s: float = float(os.getenv("BREAKER_COOLDOWN", "60")),
+        half_open_probes: int = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1")),
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_s = cooldown_s
+        self.half_open_probes = max(1, half_open_probes)
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.last_failure: Optional[str] = None
+        self.counters = {"successes": 0, "failures": 0, "trips": 0, "rejected": 0}
+
+    def retry_in(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.cooldown_s - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; admitted half-open calls are probes"""
+        if self.state == OPEN:
+            if self.retry_in() > 0:
+                self.counters["rejected"] += 1
+                return False
+            self.state = HALF_OPEN
+            logger.info(f"Circuit for {self.name} half-open, probing")
+
+        if self.state == HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                self.counters["rejected"] += 1
+                return False
+            self.probes_in_flight += 1
+        return True
+
+    def check(self):
+        """allow(), raising CircuitOpenError when the call is rejected"""
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_in())
+
+    def record_success(self):
+        self.counters["successes"] += 1
+        self.consecutive_failures = 0
+        if self.state == HALF_OPEN:
+            self.state = CLOSED
+            # Probes still running report into the closed circuit
+            self.probes_in_flight = 0
+            logger.info(f"Circuit for {self.name} closed")
+
+    def record_failure(self, reason: str):
+        self.counters["failures"] += 1
+        self.consecutive_failures += 1
+        self.last_failure = reason
+        if self.state == HALF_OPEN:
+            self._trip()
+        elif (
+            self.state == CLOSED and self.consecutive_failures >= self.failure_threshold
+        ):
+            self._trip()
+
+    def abandon(self):
+        """A probe was cancelled before it could report an outcome"""
+        if self.state == HALF_OPEN:
+            self.probes_in_flight = max(0, self.probes_in_flight - 1)
+
+    def _trip(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        # Outcomes of other probes still running no longer matter; the next
+        # half-open window starts with all of its probe slots free
+        self.probes_in_flight = 0
+        self.counters["trips"] += 1
+        logger.warning(
+            f"Circuit for {self.name} opened for {self.cooldown_s:.0f}s "
+            f"after {self.consecutive_failures} failure(s), last: {self.last_failure}"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "last_failure": self.last_failure,
+            "retry_in_s": round(self.retry_in(), 1),
+            **self.counters,
+        }
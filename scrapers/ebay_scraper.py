@@ -1,13 +1,18 @@
-from typing import List, Dict, Any
-from bs4 import BeautifulSoup
+from typing import List
 import urllib.parse
 import logging
+from utils.product import Product
 from .base_scraper import BaseScraper
 
 logger = logging.getLogger(__name__)
 
 
 class EbayScraper(BaseScraper):
+    site_name = "ebay"
+
+    # eBay's bot-check interstitial
+    captcha_markers = (b"Pardon Our Interruption",)
+
     def __init__(self):
         super().__init__()
         self.domain_map = {
@@ -23,60 +28,58 @@ class EbayScraper(BaseScraper):
     def get_search_url(self, query: str, country: str) -> str:
         domain = self.domain_map.get(country, "ebay.com")
         encoded_query = urllib.parse.quote_plus(query)
-        return f"https://www.{domain}/sch/i.html?_nkw={encoded_query}&_sacat=0"
+        return f"{self.base_url(domain)}/sch/i.html?_nkw={encoded_query}&_sacat=0"
 
-    async def search_products(self, query: str, country: str) -> List[Dict[str, Any]]:
+    def get_page_url(self, query: str, country: str, page: int) -> str:
+        url = self.get_search_url(query, country)
+        return url if page == 1 else f"{url}&_pgn={page}"
+
+    def parse_search_results(
+        self, html: bytes, query: str, country: str
+    ) -> List[Product]:
         products = []
 
         try:
-            url = self.get_search_url(query, country)
-            html = await self.fetch_page(url)
-
-            if not html:
-                return products
-
-            soup = BeautifulSoup(html, "html.parser")
+            selectors = self.selector_table(country)
+            document = self.parse_html(html)
 
             # eBay product containers
-            product_containers = soup.find_all("div", class_="s-item__wrapper")
+            product_containers = selectors.first_nonempty(document, "product")
 
-            for container in product_containers[:10]:
+            for container in product_containers[: self.results_per_page]:
                 try:
                     # Product name
-                    name_elem = container.find("h3", class_="s-item__title")
-                    product_name = name_elem.get_text(strip=True) if name_elem else ""
+                    name_elem = selectors.first(container, "title")
+                    product_name = name_elem.text() if name_elem else ""
 
                     # Price
-                    price_elem = container.find("span", class_="s-item__price")
-                    price = self.parse_price(
-                        price_elem.get_text(strip=True) if price_elem else "0"
-                    )
+                    price_elem = selectors.first(container, "price")
+                    price = self.parse_price(price_elem.text() if price_elem else "0")
 
                     # Link
-                    link_elem = container.find("a", class_="s-item__link")
+                    link_elem = selectors.first(container, "link")
                     link = link_elem["href"] if link_elem else ""
 
                     # Image
-                    img_elem = container.find("img")
+                    img_elem = selectors.first(container, "image")
                     image_url = img_elem.get("src", "") if img_elem else ""
 
-                    if product_name and price and float(price) > 0:
-                        products.append(
-                            {
-                                "link": link,
-                                "price": price,
-                                "currency": (
-                                    "USD"
-                                    if country == "US"
-                                    else "INR" if country == "IN" else "USD"
-                                ),
-                                "productName": product_name,
-                                "website": "eBay",
-                                "availability": "In Stock",
-                                "rating": None,
-                                "image_url": image_url,
-                            }
-                        )
+                    product = Product(
+                        link=link,
+                        price=price,
+                        currency=(
+                            "USD"
+                            if country == "US"
+                            else "INR" if country == "IN" else "USD"
+                        ),
+                        productName=product_name,
+                        website="eBay",
+                        availability="In Stock",
+                        rating=None,
+                        image_url=image_url,
+                    )
+                    if product_name and product.price_minor > 0:
+                        products.append(product)
 
                 except Exception as e:
                     logger.warning(f"Error parsing eBay product: {e}")
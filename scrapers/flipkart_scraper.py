@@ -1,93 +1,80 @@
-from typing import List, Dict, Any
-from bs4 import BeautifulSoup
+from typing import List
 import urllib.parse
 import logging
+from utils.product import Product
 from .base_scraper import BaseScraper
 
 logger = logging.getLogger(__name__)
 
 
 class FlipkartScraper(BaseScraper):
+    site_name = "flipkart"
+
     def get_search_url(self, query: str, country: str) -> str:
         if country != "IN":
             return ""  # Flipkart is India-specific
 
         encoded_query = urllib.parse.quote_plus(query)
-        return f"https://www.flipkart.com/search?q={encoded_query}"
+        return f"{self.base_url('flipkart.com')}/search?q={encoded_query}"
 
-    async def search_products(self, query: str, country: str) -> List[Dict[str, Any]]:
+    def parse_search_results(
+        self, html: bytes, query: str, country: str
+    ) -> List[Product]:
         products = []
 
         if country != "IN":
             return products
 
         try:
-            url = self.get_search_url(query, country)
-            if not url:
-                return products
-
-            html = await self.fetch_page(url)
-
-            if not html:
-                return products
-
-            soup = BeautifulSoup(html, "html.parser")
+            selectors = self.selector_table(country)
+            document = self.parse_html(html)
 
             # Flipkart product containers
-            product_containers = soup.find_all(
-                "div", class_="_1AtVbE"
-            ) or soup.find_all("div", class_="_4rR01T")
+            product_containers = selectors.first_nonempty(document, "product")
 
-            for container in product_containers[:10]:
+            for container in product_containers[: self.results_per_page]:
                 try:
                     # Product name
-                    name_elem = container.find(
-                        "div", class_="_4rR01T"
-                    ) or container.find("a", class_="IRpwTa")
-                    product_name = name_elem.get_text(strip=True) if name_elem else ""
+                    name_elem = selectors.first(container, "title")
+                    product_name = name_elem.text() if name_elem else ""
 
                     # Price
-                    price_elem = container.find(
-                        "div", class_="_30jeq3"
-                    ) or container.find("div", class_="_30jeq3 _1_WHN1")
-                    price = self.parse_price(
-                        price_elem.get_text(strip=True) if price_elem else "0"
-                    )
+                    price_elem = selectors.first(container, "price")
+                    price = self.parse_price(price_elem.text() if price_elem else "0")
 
                     # Link
-                    link_elem = container.find("a")
+                    link_elem = selectors.first(container, "link")
                     link = (
-                        f"https://www.flipkart.com{link_elem['href']}"
+                        f"{self.base_url('flipkart.com')}{link_elem['href']}"
                         if link_elem and link_elem.get("href")
                         else ""
                     )
 
                     # Image
-                    img_elem = container.find("img")
+                    img_elem = selectors.first(container, "image")
                     image_url = img_elem.get("src", "") if img_elem else ""
 
                     # Rating
-                    rating_elem = container.find("div", class_="_3LWZlK")
+                    rating_elem = selectors.first(container, "rating")
                     rating = None
                     if rating_elem:
                         try:
-                            rating = float(rating_elem.get_text(strip=True))
+                            rating = float(rating_elem.text())
                         except:
                             rating = None
 
-                    if product_name and price and float(price) > 0:
-                        products.append(
-                            {
-                                "link": link,
-                                "price": price,
-                                "currency": "INR",
-                                "productName": product_name,
-                                "website": "Flipkart",
-                                "availability": "In Stock",
-                                "rating": rating,
-                                "image_url": image_url,
-                            }
-                        )
+                    product = Product(
+                        link=link,
+                        price=price,
+                        currency="INR",
+                        productName=product_name,
+                        website="Flipkart",
+                        availability="In Stock",
+                        rating=rating,
+                        image_url=image_url,
+                    )
+                    if product_name and product.price_minor > 0:
+                        products.append(product)
 
                 except Exception as e:
                     logger.warning(f"Error parsing Flipkart product: {e}")
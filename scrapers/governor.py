@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from utils.settings import env_bool, env_mapping
+
+logger = logging.getLogger(__name__)
+
+# Longest pause honoured from a Retry-After header
+MAX_PAUSE_S = 60.0
+
+
+def domain_of(url: str) -> str:
+    """Governor key for a URL: its host without "www.", e.g. amazon.in"""
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class DomainGovernor:
+    """Token bucket plus in-flight cap for one retailer domain, tuned by AIMD.
+
+    Throttling signals (429, 503, captcha pages) halve the request rate and
+    the concurrency cap and pause the domain; every success adds a little
+    back until the configured rate is reached again.
+    """
+
+    def __init__(
+        self,
+        domain: str,
+        rate: float,
+        min_rate: float,
+        burst: float,
+        max_concurrency: int,
+        backoff: float,
+        ramp: float,
+    ):
+        self.domain = domain
+        self.target_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = max(1.0, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self.concurrency = float(self.max_concurrency)
+        self.backoff = backoff
+        self.ramp = ramp
+
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.in_flight = 0
+        self.counters = {
+            "requests": 0,
+            "successes": 0,
+            "throttled": 0,
+            "captchas": 0,
+            "wait_ms": 0.0,
+        }
+        # The lock queues waiters FIFO; only its holder waits for a free slot
+        self._lock = asyncio.Lock()
+        self._released = asyncio.Event()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                elif self.in_flight >= int(self.concurrency):
+                    self._released.clear()
+                    await self._released.wait()
+                elif self.tokens < 1:
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+                else:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    break
+        self.counters["requests"] += 1
+        self.counters["wait_ms"] += (time.monotonic() - start) * 1000
+
+    def release(self):
+        self.in_flight -= 1
+        self._released.set()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def succeeded(self):
+        """Additive increase back towards the configured rate"""
+        self.counters["successes"] += 1
+        self.rate = min(self.target_rate, self.rate + self.ramp)
+        self.concurrency = min(
+            self.max_concurrency, self.concurrency + 1 / self.concurrency
+        )
+
+    def throttled(self, retry_after: Optional[float] = None, captcha: bool = False):
+        """Multiplicative decrease, and pause the domain before the next request"""
+        self.counters["captchas" if captcha else "throttled"] += 1
+        self.rate = max(self.min_rate, self.rate * self.backoff)
+        self.concurrency = max(1.0, self.concurrency * self.backoff)
+        pause = retry_after if retry_after is not None else 1 / self.rate
+        self.paused_until = max(
+            self.paused_until, time.monotonic() + min(pause, MAX_PAUSE_S)
+        )
+        # Drain the bucket so the pause isn't followed by a burst
+        self.tokens = 0.0
+        logger.warning(
+            f"Backing off {self.domain}: {self.rate:.2f} req/s, "
+            f"{int(self.concurrency)} concurrent, paused {min(pause, MAX_PAUSE_S):.1f}s"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": round(self.rate, 3),
+            "target_rate": self.target_rate,
+            "concurrency": int(self.concurrency),
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "paused_for_s": round(max(0.0, self.paused_until - time.monotonic()), 2),
+            **self.counters,
+            "wait_ms": round(self.counters["wait_ms"], 1),
+        }
+
+
+class Governor:
+    """Per-domain request pacing shared by every scraper"""
+
+    def __init__(
+        self,
+        enabled: bool = env_bool("GOVERNOR_ENABLED", True),
+        default_rate: float = float(os.getenv("GOVERNOR_RATE", "2")),
+        rates: Optional[Dict[str, float]] = None,
+        min_rate: float = float(os.getenv("GOVERNOR_MIN_RATE", "0.1")),
+        burst: float = float(os.getenv("GOVERNOR_BURST", "2")),
+        max_concurrency: int = int(os.getenv("GOVERNOR_CONCURRENCY", "4")),
+        backoff: float = float(os.getenv("GOVERNOR_BACKOFF", "0.5")),
+        ramp: float = float(os.getenv("GOVERNOR_RAMP", "0.1")),
+    ):
+        self.enabled = enabled
+        self.default_rate = default_rate
+        self.rates = rates if rates is not None else env_mapping("GOVERNOR_RATES")
+        self.min_rate = min_rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.backoff = backoff
+        self.ramp = ramp
+        self._domains: Dict[str, DomainGovernor] = {}
+
+    def for_url(self, url: str) -> Optional[DomainGovernor]:
+        """The governor for the URL's domain, or None when pacing is disabled"""
+        if not self.enabled:
+            return None
+        domain = domain_of(url)
+        governor = self._domains.get(domain)
+        if governor is None:
+            governor = self._domains[domain] = DomainGovernor(
+                domain,
+                rate=self.rates.get(domain, self.default_rate),
+                min_rate=self.min_rate,
+                burst=self.burst,
+                max_concurrency=self.max_concurrency,
+                backoff=self.backoff,
+                ramp=self.ramp,
+            )
+        return governor
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "domains": {
+                domain: governor.stats()
+                for domain, governor in sorted(self._domains.items())
+            },
+        }
+
+
+governor = Governor()
@@ -0,0 +1,302 @@
+import logging
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+try:
+    import lxml  # noqa: F401
+
+    HAS_LXML = True
+except ImportError:  # pragma: no cover - optional dependency
+    HAS_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+
+    HAS_SELECTOLAX = True
+except ImportError:  # pragma: no cover - optional dependency
+    LexborHTMLParser = None
+    HAS_SELECTOLAX = False
+
+
+class Node:
+    """Backend-neutral view of one element"""
+
+    __slots__ = ("_backend", "_node")
+
+    def __init__(self, backend: "ParserBackend", node: Any):
+        self._backend = backend
+        self._node = node
+
+    def select(self, selector) -> List["Node"]:
+        backend = self._backend
+        return [Node(backend, n) for n in backend.select(self._node, selector)]
+
+    def select_one(self, selector) -> Optional["Node"]:
+        node = self._backend.select_one(self._node, selector)
+        return Node(self._backend, node) if node is not None else None
+
+    def text(self) -> str:
+        """Text content with each fragment stripped, like bs4's get_text(strip=True)"""
+        return self._backend.text(self._node)
+
+    def get(self, attr: str, default: str = "") -> str:
+        value = self._backend.attr(self._node, attr)
+        return value if value is not None else default
+
+    def __getitem__(self, attr: str) -> str:
+        value = self._backend.attr(self._node, attr)
+        if value is None:
+            raise KeyError(attr)
+        return value
+
+
+class ParserBackend(ABC):
+    """One HTML parser library behind the ``Node`` interface"""
+
+    name = "base"
+
+    @abstractmethod
+    def parse(self, html: Union[bytes, str]) -> Node:
+        """Parse a document into its root node"""
+        pass
+
+    def compile(self, css: str) -> Any:
+        """Pre-compile a CSS selector; backends without a compiler keep the string"""
+        return css
+
+    @abstractmethod
+    def select(self, node, selector) -> Iterable[Any]:
+        """Every descendant of ``node`` matching ``selector``"""
+        pass
+
+    @abstractmethod
+    def select_one(self, node, selector) -> Optional[Any]:
+        """The first descendant of ``node`` matching ``selector``, or None"""
+        pass
+
+    @abstractmethod
+    def text(self, node) -> str:
+        """Text content with each fragment stripped"""
+        pass
+
+    @abstractmethod
+    def attr(self, node, attr: str) -> Optional[str]:
+        """An attribute's value, or None when it is missing"""
+        pass
+
+
+class BeautifulSoupBackend(ParserBackend):
+    """bs4 tree built with html.parser or lxml, queried through soupsieve"""
+
+    def __init__(self, features: str):
+        self.features = features
+        self.name = f"bs4-{features}"
+
+    def parse(self, html: Union[bytes, str]) -> Node:
+        from bs4 import BeautifulSoup
+
+        return Node(self, BeautifulSoup(html, self.features))
+
+    def compile(self, css: str) -> Any:
+        import soupsieve
+
+        return soupsieve.compile(css)
+
+    def select(self, node, selector) -> Iterable[Any]:
+        return selector.select(node)
+
+    def select_one(self, node, selector) -> Optional[Any]:
+        return selector.select_one(node)
+
+    def text(self, node) -> str:
+        return node.get_text(strip=True)
+
+    def attr(self, node, attr: str) -> Optional[str]:
+        value = node.get(attr)
+        # bs4 returns multi-valued attributes such as class as lists
+        return " ".join(value) if isinstance(value, list) else value
+
+
+class SelectolaxBackend(ParserBackend):
+    """lexbor-based fast path; selectors are matched natively in C"""
+
+    name = "selectolax"
+
+    def parse(self, html: Union[bytes, str]) -> Node:
+        return Node(self, LexborHTMLParser(html))
+
+    def select(self, node, selector) -> Iterable[Any]:
+        return node.css(selector)
+
+    def select_one(self, node, selector) -> Optional[Any]:
+        return node.css_first(selector)
+
+    def text(self, node) -> str:
+        return node.text(strip=True)
+
+    def attr(self, node, attr: str) -> Optional[str]:
+        value = node.attributes.get(attr)
+        # Valueless attributes (e.g. <input disabled>) come back as None
+        if value is None and attr in node.attributes:
+            return ""
+        return value
+
+
+def available_backends() -> List[str]:
+    """Installed backends, slowest first"""
+    backends = ["bs4-html.parser"]
+    if HAS_LXML:
+        backends.append("bs4-lxml")
+    if HAS_SELECTOLAX:
+        backends.append("selectolax")
+    return backends
+
+
+_backends: Dict[str, ParserBackend] = {}
+
+
+def get_backend(name: Optional[str] = None) -> ParserBackend:
+    """Return the named backend, falling back to html.parser when it isn't installed.
+
+    Without a name, HTML_PARSER_BACKEND is used, defaulting to the fastest installed.
+    """
+    requested = name or os.getenv("HTML_PARSER_BACKEND") or available_backends()[-1]
+    backend = _backends.get(requested)
+    if backend is not None:
+        return backend
+
+    name = requested
+    if name not in available_backends():
+        logger.warning(f"HTML parser backend {name} unavailable, using bs4-html.parser")
+        name = "bs4-html.parser"
+
+    if name == "selectolax":
+        backend = SelectolaxBackend()
+    else:
+        backend = BeautifulSoupBackend(name.split("-", 1)[1])
+    _backends[requested] = backend
+    return backend
+
+
+class SelectorTable:
+    """A scraper's named selector lists, compiled once for one backend.
+
+    With ``stats``, every lookup records which selector of the list matched
+    (or that none did), keyed by ``labels`` (site, country), the list name
+    and the selector.
+    """
+
+    def __init__(
+        self,
+        backend: ParserBackend,
+        table: Dict[str, List[str]],
+        stats: Any = None,
+        labels: Tuple[str, str] = ("", ""),
+    ):
+        self.backend = backend
+        self.stats = stats
+        self._compiled = {
+            name: [((*labels, name, css), backend.compile(css)) for css in selectors]
+            for name, selectors in table.items()
+        }
+        self._miss_keys = {name: (*labels, name, None) for name in table}
+
+    def __getitem__(self, name: str) -> List[Any]:
+        return [compiled for _, compiled in self._compiled[name]]
+
+    def entries(self, name: str) -> List[Tuple[tuple, Any]]:
+        """(stats key, compiled selector) pairs, for callers that pick matches
+        themselves and report them with ``hit`` and ``miss``"""
+        return self._compiled[name]
+
+    def hit(self, key: tuple):
+        if self.stats is not None:
+            self.stats.record(key)
+
+    def miss(self, name: str):
+        if self.stats is not None:
+            self.stats.record(self._miss_keys[name])
+
+    def first(self, node: Node, name: str) -> Optional[Node]:
+        """First element matched by the earliest selector in the list that matches"""
+        for key, selector in self._compiled[name]:
+            match = node.select_one(selector)
+            if match is not None:
+                self.hit(key)
+                return match
+        self.miss(name)
+        return None
+
+    def first_nonempty(self, node: Node, name: str) -> List[Node]:
+        """All elements of the earliest selector in the list that matches anything"""
+        for key, selector in self._compiled[name]:
+            matches = node.select(selector)
+            if matches:
+                self.hit(key)
+                return matches
+        self.miss(name)
+        return []
+
+
+_TAG_NAME_RE = re.compile(rb"<([a-zA-Z][a-zA-Z0-9-]*)")
+_VOID_TAGS = {b"img", b"input", b"br", b"hr", b"meta", b"link", b"source"}
+
+
+def extract_element(html: bytes, element_id: str) -> Optional[bytes]:
+    """Markup of the element with ``id=element_id``, from its start tag to the
+    matching end tag, found by scanning bytes instead of building a DOM.
+
+    Returns None when the id is absent or the element is never closed.
+    """
+    start = -1
+    for quote in (b'"', b"'"):
+        marker = b"id=" + quote + element_id.encode() + quote
+        pos = html.find(marker)
+        # Skip look-alikes such as data-id="..."
+        while pos != -1 and html[pos - 1 : pos] not in (b" ", b"\t", b"\n", b"\r"):
+            pos = html.find(marker, pos + 1)
+        if pos != -1:
+            start = html.rfind(b"<", 0, pos)
+            break
+    if start == -1:
+        return None
+    return _element_at(html, start, pos)
+
+
+def extract_elements(html: bytes, marker: bytes) -> Iterator[bytes]:
+    """Markup of every element whose start tag contains ``marker`` (e.g.
+    ``data-component-type="s-search-result"``), in document order. Elements
+    nested in one already returned are skipped."""
+    pos = html.find(marker)
+    while pos != -1:
+        start = html.rfind(b"<", 0, pos)
+        element = _element_at(html, start, pos) if start != -1 else None
+        if element is None:
+            return
+        yield element
+        pos = html.find(marker, start + len(element))
+
+
+def _element_at(html: bytes, start: int, pos: int) -> Optional[bytes]:
+    """The element whose start tag opens at ``start`` (``pos`` lies inside it)"""
+    match = _TAG_NAME_RE.match(html, start)
+    if match is None:
+        return None
+    tag = match.group(1).lower()
+    if tag in _VOID_TAGS:
+        end = html.find(b">", pos)
+        return html[start : end + 1] if end != -1 else None
+
+    # Count nested elements of the same tag until the one we opened closes
+    depth = 0
+    pattern = re.compile(rb"<(/?)" + re.escape(tag) + rb"(?=[\s>/])", re.IGNORECASE)
+    for tag_match in pattern.finditer(html, start):
+        depth += -1 if tag_match.group(1) else 1
+        if depth == 0:
+            end = html.find(b">", tag_match.end())
+            return html[start : end + 1] if end != -1 else None
+    return None
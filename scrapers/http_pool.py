@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPPool:
+    """Process-wide aiohttp session shared by every scraper"""
+
+    def __init__(
+        self,
+        limit: int = int(os.getenv("HTTP_POOL_LIMIT", "100")),
+        limit_per_host: int = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10")),
+        dns_cache_ttl: int = int(os.getenv("HTTP_POOL_DNS_TTL", "300")),
+        keepalive_timeout: float = float(os.getenv("HTTP_POOL_KEEPALIVE", "30")),
+        total_timeout: float = float(os.getenv("HTTP_POOL_TIMEOUT", "30")),
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.total_timeout = total_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None and not self._session.closed
+
+    async def start(self) -> aiohttp.ClientSession:
+        """Create the shared connector and session if not already running"""
+        async with self._lock:
+            if not self.started:
+                connector = aiohttp.TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    use_dns_cache=True,
+                    ttl_dns_cache=self.dns_cache_ttl,
+                    keepalive_timeout=self.keepalive_timeout,
+                )
+                timeout = aiohttp.ClientTimeout(total=self.total_timeout)
+                self._session = aiohttp.ClientSession(
+                    connector=connector, timeout=timeout
+                )
+                logger.info(
+                    f"HTTP pool started (limit={self.limit}, "
+                    f"limit_per_host={self.limit_per_host})"
+                )
+        return self._session
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, starting it lazily outside the app lifespan"""
+        if self.started:
+            return self._session
+        return await self.start()
+
+    async def close(self):
+        """Close the shared session and release all pooled connections"""
+        async with self._lock:
+            if self._session is not None:
+                await self._session.close()
+                self._session = None
+                logger.info("HTTP pool closed")
+
+
+http_pool = HTTPPool()
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from .selector_config import selector_config
+from .structured_data import extraction_stats
+
+logger = logging.getLogger(__name__)
+
+# Scraper instances living inside a worker process, one per scraper class
+_worker_scrapers: Dict[type, Any] = {}
+
+
+def _warm_worker():
+    """Import the heavy parsing modules once when a worker process starts"""
+    import bs4  # noqa: F401
+    from . import amazon, bestbuy_scraper, ebay_scraper  # noqa: F401
+    from . import flipkart_scraper, walmart_scraper  # noqa: F401
+
+    # Selectors are compiled per process; load them before the first page
+    selector_config.maybe_reload()
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def parse_with(
+    scraper_cls: Type, html: bytes, query: str, country: str
+) -> Tuple[List[Any], Dict[tuple, int], List[tuple]]:
+    """Pure parse step: raw HTML in; products, plus the selector hits and
+    extraction tier observations recorded since the last call, out"""
+    scraper = _worker_scrapers.get(scraper_cls)
+    if scraper is None:
+        scraper = _worker_scrapers[scraper_cls] = scraper_cls()
+    products = scraper.extract_products(html, query, country)
+    return products, selector_config.stats.drain(), extraction_stats.drain()
+
+
+class ParsePool:
+    """Runs scraper parse steps in a process pool so the event loop only does I/O.
+
+    With ``workers=0`` (or before ``start``) parsing runs inline, which is what
+    scripts and single-threaded deployments such as Vercel use.
+    """
+
+    def __init__(
+        self,
+        workers: int = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1))),
+        start_method: str = os.getenv("PARSE_START_METHOD", "spawn"),
+    ):
+        self.workers = workers
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._restart: Optional[asyncio.Task] = None
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    async def start(self):
+        """Create the pool and warm every worker before traffic arrives"""
+        if self.workers <= 0 or self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_warm_worker,
+        )
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(
+            *(loop.run_in_executor(self._executor, _ping) for _ in range(self.workers))
+        )
+        logger.info(f"Parse pool started with {len(set(pids))} worker processes")
+
+    async def parse(
+        self, scraper_cls: Type, html: bytes, query: str, country: str
+    ) -> List[Any]:
+        if self._executor is None:
+            products, hits, tiers = parse_with(scraper_cls, html, query, country)
+        else:
+            products, hits, tiers = await self._parse_in_pool(
+                scraper_cls, html, query, country
+            )
+        # Worker processes count into their own copies; fold them into ours
+        selector_config.stats.merge(hits)
+        extraction_stats.merge(tiers)
+        return products
+
+    async def _parse_in_pool(
+        self, scraper_cls: Type, html: bytes, query: str, country: str
+    ) -> Tuple[List[Any], Dict[tuple, int], List[tuple]]:
+        executor = self._executor
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                executor, parse_with, scraper_cls, html, query, country
+            )
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); rebuild the pool and parse this page inline
+            if self._executor is executor:
+                logger.error("Parse pool broken, restarting it")
+                self.close()
+                self._restart = asyncio.create_task(self.start())
+            return parse_with(scraper_cls, html, query, country)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+parse_pool = ParsePool()
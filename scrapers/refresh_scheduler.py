@@ -0,0 +1,389 @@
+import asyncio
+import heapq
+import logging
+import math
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.country_mapper import CountryMapper
+from utils.product_identity import identity_key
+from utils.search_cache import SearchCache
+from utils.settings import env_bool, env_mapping
+
+from .circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+WatchKey = Tuple[str, str]
+
+
+class WatchEntry:
+    """One watched (country, query) and what its refreshes have seen"""
+
+    __slots__ = (
+        "country",
+        "query",
+        "pinned",
+        "popularity",
+        "seen_at",
+        "volatility",
+        "next_due",
+        "interval",
+        "in_flight",
+        "refreshes",
+        "last_refreshed",
+        "prices",
+    )
+
+    def __init__(self, country: str, query: str, pinned: bool, now: float):
+        self.country = country
+        self.query = query
+        self.pinned = pinned
+        self.popularity = 0.0
+        self.seen_at = now
+        self.volatility = 0.0
+        self.next_due = 0.0
+        self.interval = 0.0
+        self.in_flight = False
+        self.refreshes = 0
+        self.last_refreshed: Optional[float] = None
+        # Last refreshed price per listing, to measure how much prices move
+        self.prices: Dict[Tuple[str, str], int] = {}
+
+    def decayed_popularity(self, now: float, half_life: float) -> float:
+        return self.popularity * 0.5 ** ((now - self.seen_at) / half_life)
+
+    def to_dict(self, now: float, half_life: float) -> Dict[str, Any]:
+        return {
+            "country": self.country,
+            "query": self.query,
+            "pinned": self.pinned,
+            "popularity": round(self.decayed_popularity(now, half_life), 2),
+            "volatility": round(self.volatility, 3),
+            "interval_s": round(self.interval, 1),
+            "next_refresh_in_s": round(max(0.0, self.next_due - now), 1),
+            "last_refreshed": self.last_refreshed,
+            "refreshes": self.refreshes,
+        }
+
+
+class RefreshScheduler:
+    """Keeps the search cache warm for a watchlist of (country, query) pairs.
+
+    The watchlist holds the queries pinned in ``REFRESH_WATCHLIST`` plus any
+    query searched ``min_hits`` times recently. Each entry is re-scraped on
+    every site of its country before its cache entries go stale, more often
+    when it is popular or its prices keep moving, with jitter so refreshes
+    don't line up. Refreshes share a global and a per-site concurrency cap.
+    """
+
+    def __init__(
+        self,
+        manager,
+        cache: Optional[SearchCache] = None,
+        enabled: bool = env_bool("REFRESH_ENABLED", True),
+        watchlist_path: Optional[str] = os.getenv("REFRESH_WATCHLIST"),
+        max_entries: int = int(os.getenv("REFRESH_MAX_QUERIES", "5000")),
+        min_hits: float = float(os.getenv("REFRESH_MIN_HITS", "3")),
+        base_interval: float = float(os.getenv("REFRESH_INTERVAL", "600")),
+        min_interval: float = float(os.getenv("REFRESH_MIN_INTERVAL", "120")),
+        max_interval: float = float(os.getenv("REFRESH_MAX_INTERVAL", "3600")),
+        jitter: float = float(os.getenv("REFRESH_JITTER", "0.1")),
+        half_life: float = float(os.getenv("REFRESH_POPULARITY_HALF_LIFE", "3600")),
+        concurrency: int = int(os.getenv("REFRESH_CONCURRENCY", "4")),
+        site_concurrency: int = int(os.getenv("REFRESH_SITE_CONCURRENCY", "1")),
+        site_concurrencies: Optional[Dict[str, int]] = None,
+    ):
+        self.manager = manager
+        self.cache = cache
+        self.enabled = enabled
+        self.watchlist_path = watchlist_path
+        self.max_entries = max_entries
+        self.min_hits = min_hits
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.half_life = half_life
+        self.country_mapper = CountryMapper()
+
+        self.entries: Dict[WatchKey, WatchEntry] = {}
+        # Popularity of searched queries that aren't watched (yet)
+        self._candidates: Dict[WatchKey, Tuple[float, float]] = {}
+        self._due: List[Tuple[float, int, WatchKey]] = []
+        self._seq = 0
+        self._global = asyncio.Semaphore(max(1, concurrency))
+        self.site_concurrency = site_concurrency
+        self.site_concurrencies = (
+            site_concurrencies
+            if site_concurrencies is not None
+            else env_mapping("REFRESH_SITE_CONCURRENCIES", int)
+        )
+        self._site_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+        self.counters = {
+            "refreshes": 0,
+            "site_refreshes": 0,
+            "site_errors": 0,
+            "site_skipped": 0,
+            "added": 0,
+            "evicted": 0,
+        }
+
+    async def start(self):
+        if not self.enabled or self._loop_task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        if self.watchlist_path:
+            for country, query in self._read_watchlist(self.watchlist_path):
+                self.watch(country, query, pinned=True)
+        self._loop_task = asyncio.create_task(self._run())
+        logger.info(f"Refresh scheduler started with {len(self.entries)} queries")
+
+    @staticmethod
+    def _read_watchlist(path: str) -> List[WatchKey]:
+        """``COUNTRY,query`` per line; blank lines and ``#`` comments are skipped"""
+        pairs = []
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#") or "," not in line:
+                        continue
+                    country, query = line.split(",", 1)
+                    pairs.append((country.strip(), query.strip()))
+        except OSError as e:
+            logger.warning(f"Could not read refresh watchlist {path}: {e}")
+        return pairs
+
+    def _key(self, country: str, query: str) -> WatchKey:
+        return country.upper(), SearchCache.normalize_query(query)
+
+    def observe(self, country: str, query: str):
+        """Count a search; queries searched often enough join the watchlist"""
+        if not self.enabled:
+            return
+        key = self._key(country, query)
+        if not key[1]:
+            return
+        now = time.time()
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry.popularity = entry.decayed_popularity(now, self.half_life) + 1
+            entry.seen_at = now
+            return
+
+        hits, seen_at = self._candidates.pop(key, (0.0, now))
+        hits = hits * 0.5 ** ((now - seen_at) / self.half_life) + 1
+        # Back-to-back searches decay a hair below a whole hit
+        if hits + 1e-6 >= self.min_hits:
+            entry = self.watch(*key)
+            if entry is not None:
+                entry.popularity = hits
+            return
+        self._candidates[key] = (hits, now)
+        if len(self._candidates) > self.max_entries * 4:
+            # Forget the half of the candidates seen longest ago
+            oldest = sorted(self._candidates, key=lambda k: self._candidates[k][1])
+            for stale in oldest[: len(oldest) // 2]:
+                del self._candidates[stale]
+
+    def watch(
+        self, country: str, query: str, pinned: bool = False
+    ) -> Optional[WatchEntry]:
+        """Add a query to the watchlist; it is refreshed shortly after"""
+        if not self.enabled:
+            return None
+        key = self._key(country, query)
+        if not key[1]:
+            return None
+        now = time.time()
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry.pinned = entry.pinned or pinned
+            return entry
+
+        if len(self.entries) >= self.max_entries and not self._evict(now):
+            return None
+        entry = self.entries[key] = WatchEntry(*key, pinned, now)
+        self.counters["added"] += 1
+        # Spread first refreshes out instead of scraping the whole list at once
+        self._schedule(entry, now + random.uniform(0, self.min_interval))
+        return entry
+
+    def unwatch(self, country: str, query: str) -> bool:
+        # Its heap item is skipped when it comes due
+        return self.entries.pop(self._key(country, query), None) is not None
+
+    def _evict(self, now: float) -> bool:
+        """Drop the least popular unpinned entry to make room"""
+        unpinned = [entry for entry in self.entries.values() if not entry.pinned]
+        if not unpinned:
+            return False
+        coldest = min(
+            unpinned, key=lambda entry: entry.decayed_popularity(now, self.half_life)
+        )
+        del self.entries[(coldest.country, coldest.query)]
+        self.counters["evicted"] += 1
+        return True
+
+    def interval_for(self, entry: WatchEntry, now: float) -> float:
+        """Seconds until the next refresh: shorter for popular, volatile queries"""
+        popularity = entry.decayed_popularity(now, self.half_life)
+        interval = self.base_interval / (
+            (1 + math.log1p(popularity)) * (1 + 4 * entry.volatility)
+        )
+        max_interval = self.max_interval
+        if self.cache is not None and self.cache.enabled:
+            # Refresh before the shortest cached TTL of its sites runs out
+            ttl = min(
+                self.cache.ttl_for(website)
+                for website in self.country_mapper.get_websites_for_country(
+                    entry.country
+                )
+            )
+            max_interval = min(max_interval, ttl * 0.9)
+        interval = min(max(interval, self.min_interval), max_interval)
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _schedule(self, entry: WatchEntry, due: float):
+        entry.next_due = due
+        self._seq += 1
+        heapq.heappush(self._due, (due, self._seq, (entry.country, entry.query)))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            while self._due and self._due[0][0] <= now:
+                due, _, key = heapq.heappop(self._due)
+                entry = self.entries.get(key)
+                # Skip heap items of removed or rescheduled entries
+                if entry is None or entry.next_due != due or entry.in_flight:
+                    continue
+                entry.in_flight = True
+                task = asyncio.create_task(self._refresh(entry))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+            timeout = self._due[0][0] - now if self._due else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refresh(self, entry: WatchEntry):
+        try:
+            websites = self.country_mapper.get_websites_for_country(entry.country)
+            results = await asyncio.gather(
+                *(self._refresh_site(entry, website) for website in websites)
+            )
+            prices = {}
+            for found in results:
+                prices.update(found)
+            self._update_volatility(entry, prices)
+            entry.refreshes += 1
+            entry.last_refreshed = time.time()
+            self.counters["refreshes"] += 1
+        finally:
+            entry.in_flight = False
+            now = time.time()
+            key = (entry.country, entry.query)
+            if self.entries.get(key) is not entry:
+                return
+            if (
+                not entry.pinned
+                and entry.decayed_popularity(now, self.half_life) < self.min_hits / 4
+            ):
+                # Nobody searches it any more
+                del self.entries[key]
+                self.counters["evicted"] += 1
+                return
+            entry.interval = self.interval_for(entry, now)
+            self._schedule(entry, now + entry.interval)
+
+    async def _refresh_site(
+        self, entry: WatchEntry, website: str
+    ) -> Dict[Tuple[str, str], int]:
+        # Wait for the site's slot before taking a global one, so a slow site
+        # doesn't hold global slots other sites could use
+        async with self._site_semaphore(website), self._global:
+            try:
+                products = await self.manager.refresh(
+                    website, entry.query, entry.country
+                )
+            except CircuitOpenError:
+                self.counters["site_skipped"] += 1
+                return {}
+            except Exception as e:
+                self.counters["site_errors"] += 1
+                logger.warning(
+                    f"Refreshing {website} for '{entry.query}' ({entry.country}) failed: {e}"
+                )
+                return {}
+        self.counters["site_refreshes"] += 1
+
+        return {
+            identity_key(product): product.price_minor
+            for product in products
+            if product.price_minor > 0
+        }
+
+    @staticmethod
+    def _update_volatility(entry: WatchEntry, prices: Dict[Tuple[str, str], int]):
+        """EWMA of the share of listings whose price changed since the last refresh"""
+        common = [key for key in prices if key in entry.prices]
+        if common:
+            changed = sum(1 for key in common if prices[key] != entry.prices[key])
+            entry.volatility = 0.7 * entry.volatility + 0.3 * changed / len(common)
+        if prices:
+            entry.prices = prices
+
+    def _site_semaphore(self, website: str) -> asyncio.Semaphore:
+        semaphore = self._site_semaphores.get(website)
+        if semaphore is None:
+            limit = self.site_concurrencies.get(website, self.site_concurrency)
+            semaphore = self._site_semaphores[website] = asyncio.Semaphore(
+                max(1, int(limit))
+            )
+        return semaphore
+
+    async def close(self):
+        tasks = list(self._tasks)
+        if self._loop_task is not None:
+            tasks.append(self._loop_task)
+            self._loop_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def watchlist(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Watched queries, most popular first"""
+        now = time.time()
+        entries = sorted(
+            self.entries.values(),
+            key=lambda entry: entry.decayed_popularity(now, self.half_life),
+            reverse=True,
+        )
+        return [entry.to_dict(now, self.half_life) for entry in entries[:limit]]
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        upcoming = [entry.next_due for entry in self.entries.values()]
+        return {
+            "enabled": self.enabled,
+            "watched": len(self.entries),
+            "pinned": sum(1 for entry in self.entries.values() if entry.pinned),
+            "candidates": len(self._candidates),
+            "in_flight": sum(1 for entry in self.entries.values() if entry.in_flight),
+            "next_refresh_in_s": (
+                round(max(0.0, min(upcoming) - now), 1) if upcoming else None
+            ),
+            **self.counters,
+        }
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import os
+import random
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple, Type
+
+import aiohttp
+
+from utils.settings import env_bool
+
+logger = logging.getLogger(__name__)
+
+
+def _int_set(value: str) -> frozenset:
+    return frozenset(int(v) for v in value.split(",") if v.strip())
+
+
+class RetryPolicy:
+    """Which failed fetches to retry, how often and how long to wait between tries"""
+
+    def __init__(
+        self,
+        max_attempts: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "3")),
+        statuses: frozenset = _int_set(
+            os.getenv("RETRY_STATUSES", "429,500,502,503,504")
+        ),
+        exceptions: Tuple[Type[BaseException], ...] = (
+            aiohttp.ClientConnectionError,
+            aiohttp.ClientPayloadError,
+            asyncio.TimeoutError,
+        ),
+        base_delay_ms: float = float(os.getenv("RETRY_BASE_DELAY_MS", "250")),
+        max_delay_ms: float = float(os.getenv("RETRY_MAX_DELAY_MS", "4000")),
+        total_ms: float = float(os.getenv("RETRY_TOTAL_MS", "10000")),
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.statuses = statuses
+        self.exceptions = exceptions
+        self.base_delay_ms = base_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.total_ms = total_ms
+        self.counters = {"retries": 0, "gave_up": 0}
+
+    def should_retry_status(self, status: int) -> bool:
+        return status in self.statuses
+
+    def should_retry_error(self, error: BaseException) -> bool:
+        return isinstance(error, self.exceptions)
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait after failed attempt ``attempt`` (0-based), full jitter"""
+        ceiling = min(self.max_delay_ms, self.base_delay_ms * 2**attempt)
+        return random.uniform(0, ceiling) / 1000
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_attempts": self.max_attempts,
+            "total_ms": self.total_ms,
+            **self.counters,
+        }
+
+
+class Hedger:
+    """Send a second copy of a slow request once it passes the domain's p95.
+
+    Each request earns ``budget`` hedge tokens and a hedge spends one, so
+    hedges stay a bounded share of the traffic to a domain.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = env_bool("HEDGE_ENABLED", False),
+        budget: float = float(os.getenv("HEDGE_BUDGET", "0.05")),
+        min_samples: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20")),
+        window: int = 200,
+    ):
+        self.enabled = enabled
+        self.budget = budget
+        self.min_samples = min_samples
+        self.window = window
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._tokens: Dict[str, float] = {}
+        self.counters = {"hedges": 0, "hedge_wins": 0, "skipped_no_budget": 0}
+
+    def observe(self, domain: str, seconds: float):
+        samples = self._latencies.get(domain)
+        if samples is None:
+            samples = self._latencies[domain] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def p95(self, domain: str) -> Optional[float]:
+        samples = self._latencies.get(domain)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def delay_for(self, domain: str) -> Optional[float]:
+        """Seconds to wait before hedging a new request, None to never hedge it"""
+        if not self.enabled:
+            return None
+        self._tokens[domain] = min(10.0, self._tokens.get(domain, 0.0) + self.budget)
+        return self.p95(domain)
+
+    def try_spend(self, domain: str) -> bool:
+        if self._tokens.get(domain, 0.0) < 1:
+            self.counters["skipped_no_budget"] += 1
+            return False
+        self._tokens[domain] -= 1
+        self.counters["hedges"] += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "budget": self.budget,
+            **self.counters,
+            "p95_ms": {
+                domain: round(p95 * 1000, 1)
+                for domain in sorted(self._latencies)
+                if (p95 := self.p95(domain)) is not None
+            },
+        }
+
+
+retry_policy = RetryPolicy()
+hedger = Hedger()
@@ -1,17 +1,38 @@
 import asyncio
-from typing import List, Dict, Any
+import contextlib
+import os
+import time
+from typing import AsyncContextManager, List, Dict, Any, Optional
 import logging
+from utils.ai_validator import AIValidator
+from utils.logging_config import Truncated
+from utils.metrics import SITE_SEARCH_SECONDS, record_stage
+from utils.price_history import PriceHistoryStore
+from utils.product import Product
+from utils.product_identity import dedupe
+from utils.search_cache import SearchCache
+from utils.settings import env_mapping
 from .amazon import AmazonScraper
 from .flipkart_scraper import FlipkartScraper
 from .ebay_scraper import EbayScraper
 from .bestbuy_scraper import BestBuyScraper
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
 from .walmart_scraper import WalmartScraper
+from .single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 
 class ScraperManager:
-    def __init__(self):
+    def __init__(
+        self,
+        cache: Optional[SearchCache] = None,
+        price_history: Optional[PriceHistoryStore] = None,
+        default_budget_ms: float = float(os.getenv("SITE_BUDGET_MS", "12000")),
+        site_budgets_ms: Optional[Dict[str, float]] = None,
+        page_concurrency: int = int(os.getenv("SITE_PAGE_CONCURRENCY", "2")),
+        site_page_concurrency: Optional[Dict[str, int]] = None,
+    ):
         self.scrapers = {
             "amazon": AmazonScraper(),
             "flipkart": FlipkartScraper(),
@@ -19,37 +40,371 @@ class ScraperManager:
             "bestbuy": BestBuyScraper(),
             "walmart": WalmartScraper(),
         }
+        self.cache = cache
+        self.price_history = price_history
+        self.single_flight = SingleFlight()
+        self.breakers = {website: CircuitBreaker(website) for website in self.scrapers}
+        self.default_budget_ms = default_budget_ms
+        self.site_budgets_ms = (
+            site_budgets_ms
+            if site_budgets_ms is not None
+            else env_mapping("SITE_BUDGETS_MS")
+        )
+        # Deeper result pages in flight per site, shared by all requests
+        self.page_concurrency = page_concurrency
+        self.site_page_concurrency = (
+            site_page_concurrency
+            if site_page_concurrency is not None
+            else env_mapping("SITE_PAGE_CONCURRENCIES", int)
+        )
+        self._page_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def budget_for(self, website: str, deadline_ms: Optional[float] = None) -> float:
+        """Seconds a site may take: its own budget, capped by the request deadline"""
+        budget_ms = self.site_budgets_ms.get(website, self.default_budget_ms)
+        if deadline_ms is not None:
+            budget_ms = min(budget_ms, deadline_ms)
+        return budget_ms / 1000
 
     async def scrape_website(
         self, website: str, query: str, country: str
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Product]:
         """
-        Scrape a specific website for products
+        Scrape a specific website for products, answering from cache when possible
         """
         try:
-            if website not in self.scrapers:
-                logger.warning(f"No scraper available for website: {website}")
-                return []
-
-            scraper = self.scrapers[website]
-            logger.info(f"Scrapper Object: {scraper}")
-            results = await scraper.search_products(query, country)
-            logger.info(f"Results from {website}: {results}")
-            logger.info(f"Scraped {len(results)} products from {website}")
-            return results
-
+            return await self._search(website, query, country)
         except Exception as e:
             logger.error(f"Error scraping {website}: {e}")
             return []
+
+    async def _search(
+        self,
+        website: str,
+        query: str,
+        country: str,
+        page: int = 1,
+        slot: Optional[AsyncContextManager] = None,
+    ) -> List[Product]:
+        """Concurrent calls for the same search URL share one fetch+parse.
+
+        ``slot``, if given, is held around the fetch inside the shared work.
+        """
+        if website not in self.scrapers:
+            logger.warning(f"No scraper available for website: {website}")
+            return []
+
+        url = self.scrapers[website].get_page_url(query, country, page)
+        if not url:
+            return []
+
+        results = await self.single_flight.do(
+            url, lambda: self._cached_scrape(website, query, country, page, slot)
+        )
+        # Every caller gets its own records; downstream code mutates them
+        return [product.copy() for product in results]
+
+    async def _cached_scrape(
+        self,
+        website: str,
+        query: str,
+        country: str,
+        page: int = 1,
+        slot: Optional[AsyncContextManager] = None,
+    ) -> List[Product]:
+        if self.cache is None:
+            return await self._scrape(website, query, country, page, slot)
+
+        return await self.cache.get_or_fetch(
+            country,
+            website,
+            query,
+            lambda: self._scrape(website, query, country, page, slot),
+            page=page,
+        )
+
+    async def refresh(self, website: str, query: str, country: str) -> List[Product]:
+        """Re-scrape page 1 of a search and overwrite its cache entry, fresh or not"""
+        if website not in self.scrapers:
+            return []
+        url = self.scrapers[website].get_page_url(query, country, 1)
+        if not url:
+            return []
+
+        async def scrape_and_store():
+            results = await self._scrape(website, query, country)
+            if self.cache is not None:
+                await self.cache.store(
+                    self.cache.make_key(country, website, query), results
+                )
+            return results
+
+        # Joins a request already scraping the same URL instead of duplicating it
+        results = await self.single_flight.do(url, scrape_and_store)
+        return [product.copy() for product in results]
+
+    async def _scrape(
+        self,
+        website: str,
+        query: str,
+        country: str,
+        page: int = 1,
+        slot: Optional[AsyncContextManager] = None,
+    ) -> List[Product]:
+        """Fetch and parse one site, bypassing the cache"""
+        scraper = self.scrapers[website]
+        slot = slot or contextlib.nullcontext()
+        if page > 1:
+            # Deeper pages are only fetched after page 1 worked; an empty one
+            # just means the results ran out, not that the site is down. The
+            # slot is taken here, in the shared work, so a fetch keeps it
+            # until it finishes even when every caller has stopped waiting.
+            async with self._page_semaphore(website), slot:
+                results = await scraper.search_products(query, country, page)
+            self._record_prices(results, country)
+            return results
+
+        breaker = self.breakers[website]
+        # Checked behind the cache, so a dead site still serves cached results
+        breaker.check()
+
+        try:
+            async with slot:
+                start = time.perf_counter()
+                results = await scraper.search_products(query, country)
+        except asyncio.CancelledError:
+            breaker.abandon()
+            raise
+        except Exception as e:
+            breaker.record_failure(f"error: {e}")
+            raise
+        elapsed = time.perf_counter() - start
+
+        logger.debug("Results from %s: %s", website, Truncated(results))
+        logger.info("Scraped %d products from %s", len(results), website)
+        self._record_prices(results, country)
+        if elapsed > self.budget_for(website):
+            breaker.record_failure(f"timeout: {elapsed:.1f}s")
+        elif not results:
+            breaker.record_failure("no results")
+        else:
+            breaker.record_success()
+        return results
+
+    def _record_prices(self, products: List[Product], country: str):
+        # Only fresh scrapes are observations; cache hits would repeat them
+        if self.price_history is not None and products:
+            self.price_history.record(products, country)
+
+    async def search_pages(
+        self,
+        website: str,
+        query: str,
+        country: str,
+        max_pages: int = 1,
+        max_results: Optional[int] = None,
+        validator: Optional[AIValidator] = None,
+        timeout: Optional[float] = None,
+        slot: Optional[AsyncContextManager] = None,
+    ) -> List[Product]:
+        """
+        Page 1, then pages 2..max_pages concurrently (capped per site), deduped
+        by listing ID. Paging stops once ``max_results`` relevant products are
+        collected, a page adds nothing new, or ``timeout`` runs out. Every
+        page fetched holds ``slot``, if given, while it runs.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        seen = set()
+        first_page = dedupe(
+            await asyncio.wait_for(
+                self._search(website, query, country, slot=slot), timeout
+            ),
+            seen,
+        )
+        if max_pages <= 1 or self._enough(first_page, query, max_results, validator):
+            return first_page
+
+        scraper = self.scrapers[website]
+        pages = [
+            page
+            for page in range(2, max_pages + 1)
+            if scraper.get_page_url(query, country, page)
+        ]
+        if not first_page or not pages:
+            return first_page
+
+        # This request keeps at most the site's page limit in flight and
+        # starts the next page as one finishes, so pages it no longer needs
+        # are never started
+        limit = self._page_limit(website)
+
+        async def fetch(page: int):
+            return page, await self._search(website, query, country, page, slot)
+
+        def launch():
+            while pages and len(pending) < limit:
+                page = pages.pop(0)
+                task = asyncio.ensure_future(fetch(page))
+                page_of[task] = page
+                pending.add(task)
+
+        by_page = {1: first_page}
+        page_of: Dict[asyncio.Task, int] = {}
+        pending: set = set()
+        launch()
+        try:
+            while pending:
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    logger.info("Stopped paging %s at its latency budget", website)
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    if task.exception() is not None:
+                        logger.warning(
+                            f"Error fetching {website} results page: {task.exception()}"
+                        )
+                        continue
+                    page, results = task.result()
+                    by_page[page] = dedupe(results, seen)
+                    if not by_page[page]:
+                        # Past the last page: don't fetch anything deeper
+                        pages = [later for later in pages if later < page]
+                        for later_task in pending:
+                            if page_of[later_task] > page:
+                                later_task.cancel()
+
+                collected = [p for _, found in sorted(by_page.items()) for p in found]
+                if self._enough(collected, query, max_results, validator):
+                    break
+                launch()
         finally:
-            # Ensure the scraper session is closed
-            scraper = self.scrapers.get(website)
-            if scraper:
-                await scraper.close()
+            # Stop waiting; shared fetches in flight still complete, holding
+            # their page slots, and fill the cache
+            for task in pending:
+                task.cancel()
+
+        logger.debug("Collected %s results from pages %s", website, sorted(by_page))
+        return [product for _, found in sorted(by_page.items()) for product in found]
+
+    @staticmethod
+    def _enough(
+        products: List[Product],
+        query: str,
+        max_results: Optional[int],
+        validator: Optional[AIValidator],
+    ) -> bool:
+        if max_results is None:
+            return False
+        if validator is None:
+            return len(products) >= max_results
+        threshold = validator.relevance_threshold
+        scores = validator.score_batch(
+            [product.productName for product in products],
+            query,
+            min_score=threshold,
+        )
+        return sum(1 for score in scores if score >= threshold) >= max_results
+
+    def _page_limit(self, website: str) -> int:
+        return max(
+            1, int(self.site_page_concurrency.get(website, self.page_concurrency))
+        )
+
+    def _page_semaphore(self, website: str) -> asyncio.Semaphore:
+        semaphore = self._page_semaphores.get(website)
+        if semaphore is None:
+            semaphore = self._page_semaphores[website] = asyncio.Semaphore(
+                self._page_limit(website)
+            )
+        return semaphore
+
+    async def scrape_with_status(
+        self,
+        website: str,
+        query: str,
+        country: str,
+        deadline_ms: Optional[float] = None,
+        max_pages: int = 1,
+        max_results: Optional[int] = None,
+        validator: Optional[AIValidator] = None,
+        slot: Optional[AsyncContextManager] = None,
+    ) -> Dict[str, Any]:
+        """
+        Scrape one website within its latency budget and report its products
+        alongside timing and status (ok, empty, timeout or error). Fetches
+        hold ``slot``, if given, for as long as they run.
+        """
+        start = time.perf_counter()
+        result = {"website": website, "status": "ok", "error": None, "products": []}
+        try:
+            # Timing out only abandons the wait; the shared scrape keeps running
+            # and still fills the cache for the next caller
+            result["products"] = await self.search_pages(
+                website,
+                query,
+                country,
+                max_pages=max_pages,
+                max_results=max_results,
+                validator=validator,
+                timeout=self.budget_for(website, deadline_ms),
+                slot=slot,
+            )
+            if not result["products"]:
+                result["status"] = "empty"
+        except CircuitOpenError as e:
+            result["status"] = "circuit_open"
+            result["error"] = str(e)
+        except asyncio.TimeoutError:
+            logger.warning(f"Scraping {website} exceeded its latency budget")
+            result["status"] = "timeout"
+        except Exception as e:
+            logger.error(f"Error scraping {website}: {e}")
+            result["status"] = "error"
+            result["error"] = str(e)
+        elapsed = time.perf_counter() - start
+        SITE_SEARCH_SECONDS.observe(elapsed, website, result["status"])
+        record_stage("site", website, elapsed)
+        result["elapsed_ms"] = round(elapsed * 1000, 1)
+        return result
+
+    async def enrich(
+        self, products: List[Product], timeout: Optional[float] = None
+    ) -> List[Product]:
+        """
+        Attach product-page details (title, price, features, description) to
+        every product whose site supports it, in place. Products whose page
+        isn't loaded within ``timeout`` seconds are left as they are.
+        """
+        amazon = self.scrapers["amazon"]
+        links = [
+            product.link
+            for product in products
+            if product.website == "Amazon" and product.link
+        ]
+        details = await amazon.get_products_details(links, timeout=timeout)
+        for product in products:
+            if product.link in details:
+                product.details = details[product.link]
+        return products
+
+    def breaker_stats(self) -> Dict[str, Any]:
+        return {website: breaker.stats() for website, breaker in self.breakers.items()}
+
+    async def close(self):
+        """Release every scraper's borrowed session"""
+        for scraper in self.scrapers.values():
+            await scraper.close()
 
     async def scrape_all_websites(
         self, websites: List[str], query: str, country: str
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Product]:
         """
         Scrape multiple websites concurrently
         """
@@ -0,0 +1,222 @@
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from .html_parser import ParserBackend, SelectorTable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "selectors.yaml")
+
+# (site, country, list name, css); css is None for "nothing in the list matched"
+StatKey = Tuple[str, str, str, Optional[str]]
+
+
+class SelectorConfigError(ValueError):
+    """The selector file is missing, not YAML, or not shaped like selectors.yaml"""
+
+
+class SelectorStats:
+    """How often each selector was the one in its list that matched.
+
+    Counts recorded in a process stay pending until ``drain``ed: parse workers
+    drain theirs into every parse result, and the server merges them in.
+    """
+
+    def __init__(self):
+        self._pending: Dict[StatKey, int] = {}
+        self._totals: Dict[StatKey, int] = {}
+
+    def record(self, key: StatKey):
+        self._pending[key] = self._pending.get(key, 0) + 1
+
+    def drain(self) -> Dict[StatKey, int]:
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def merge(self, counts: Dict[StatKey, int]):
+        totals = self._totals
+        for key, count in counts.items():
+            totals[key] = totals.get(key, 0) + count
+
+    def totals(self) -> Dict[StatKey, int]:
+        self.merge(self.drain())
+        return dict(self._totals)
+
+
+class SelectorConfig:
+    """
+    Selector lists per (site, country) from a versioned YAML file, compiled
+    once per parser backend and config version.
+
+    Every process (server and parse workers alike) checks the file's mtime at
+    most every ``check_interval`` seconds and reloads it when it changed; a
+    file that fails to load is logged and the previous version stays in use.
+    """
+
+    def __init__(
+        self,
+        path: str = os.getenv("SELECTOR_CONFIG") or DEFAULT_PATH,
+        check_interval: float = float(os.getenv("SELECTOR_RELOAD_INTERVAL", "2")),
+    ):
+        self.path = path
+        self.check_interval = check_interval
+        self.version: Any = None
+        self.sites: Dict[str, Dict[str, Dict[str, List[str]]]] = {}
+        self.loaded_at: Optional[float] = None
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self.stats = SelectorStats()
+        self._mtime: Optional[int] = None
+        self._next_check = 0.0
+        self._tables: Dict[Tuple[str, str, str], SelectorTable] = {}
+
+    def load(self):
+        """Read and validate the file, replacing the current selectors"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = yaml.safe_load(f)
+        except (OSError, yaml.YAMLError) as e:
+            raise SelectorConfigError(f"Cannot read {self.path}: {e}") from e
+        sites = self._validate(data)
+
+        self.version = data.get("version")
+        self.sites = sites
+        self._tables = {}
+        if self.loaded_at is not None:
+            self.reloads += 1
+        self.loaded_at = time.time()
+        self.last_error = None
+        logger.info(
+            "Loaded selector config version %s from %s", self.version, self.path
+        )
+
+    @staticmethod
+    def _validate(data: Any) -> Dict[str, Dict[str, Dict[str, List[str]]]]:
+        import soupsieve
+
+        if not isinstance(data, dict) or not isinstance(data.get("sites"), dict):
+            raise SelectorConfigError("expected a mapping with a 'sites' mapping")
+        sites = {}
+        for site, sections in data["sites"].items():
+            if not isinstance(sections, dict) or not isinstance(
+                sections.get("default"), dict
+            ):
+                raise SelectorConfigError(f"{site}: expected a 'default' mapping")
+            sites[site] = {}
+            for section, lists in sections.items():
+                if not isinstance(lists, dict):
+                    raise SelectorConfigError(f"{site}.{section}: expected a mapping")
+                for name, selectors in lists.items():
+                    if not isinstance(selectors, list) or not all(
+                        isinstance(css, str) and css.strip() for css in selectors
+                    ):
+                        raise SelectorConfigError(
+                            f"{site}.{section}.{name}: expected a list of selectors"
+                        )
+                    for css in selectors:
+                        try:
+                            soupsieve.compile(css)
+                        except Exception as e:
+                            raise SelectorConfigError(
+                                f"{site}.{section}.{name}: bad selector {css!r}: {e}"
+                            ) from e
+                key = section if section == "default" else str(section).upper()
+                sites[site][key] = lists
+        return sites
+
+    def maybe_reload(self):
+        """Reload if the file changed since it was last read (rate limited)"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            mtime = None
+            error = f"Cannot read {self.path}: {e}"
+        else:
+            if mtime == self._mtime:
+                return
+            try:
+                self.load()
+                error = None
+            except SelectorConfigError as e:
+                error = str(e)
+        self._mtime = mtime
+        if error is not None and error != self.last_error:
+            logger.error(
+                "Selector config not reloaded, keeping the last one: %s", error
+            )
+        self.last_error = error
+        if error is not None and self.loaded_at is None:
+            raise SelectorConfigError(error)
+
+    def selectors_for(self, site: str, country: str = "") -> Dict[str, List[str]]:
+        """A site's default lists with the country's overrides applied"""
+        sections = self.sites.get(site)
+        if sections is None:
+            raise SelectorConfigError(f"No selectors configured for {site}")
+        return {**sections["default"], **sections.get(country.upper(), {})}
+
+    def table(self, site: str, country: str, backend: ParserBackend) -> SelectorTable:
+        """The compiled table for a site and country, current as of the last check"""
+        self.maybe_reload()
+        country = country.upper()
+        key = (site, country, backend.name)
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = SelectorTable(
+                backend,
+                self.selectors_for(site, country),
+                stats=self.stats,
+                labels=(site, country),
+            )
+        return table
+
+    def report(self) -> Dict[str, Any]:
+        """Hits per configured selector, summed over countries, so selectors
+        that never match can be pruned"""
+        try:
+            # Workers reload on their own; this process may not parse at all
+            self.maybe_reload()
+        except SelectorConfigError:
+            pass
+        hits: Dict[Tuple[str, str, Optional[str]], int] = {}
+        for (site, _, name, css), count in self.stats.totals().items():
+            hits[site, name, css] = hits.get((site, name, css), 0) + count
+
+        sites = {}
+        for site, sections in self.sites.items():
+            lists: Dict[str, List[str]] = {}
+            for section in sections.values():
+                for name, selectors in section.items():
+                    known = lists.setdefault(name, [])
+                    for css in selectors:
+                        if css not in known:
+                            known.append(css)
+            sites[site] = {
+                name: {
+                    "selectors": [
+                        {"css": css, "hits": hits.get((site, name, css), 0)}
+                        for css in selectors
+                    ],
+                    "misses": hits.get((site, name, None), 0),
+                }
+                for name, selectors in lists.items()
+            }
+        return {
+            "path": self.path,
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+            "sites": sites,
+        }
+
+
+selector_config = SelectorConfig()
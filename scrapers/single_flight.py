@@ -0,0 +1,44 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one shared task.
+
+    The shared task is shielded from its callers, so a client that
+    disconnects (cancelling its request) never cancels the work other
+    callers are still waiting on.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.counters = {"leaders": 0, "followers": 0}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.counters["leaders"] += 1
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.counters["followers"] += 1
+            logger.debug(f"Joining in-flight request for {key}")
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so abandoned tasks don't log "never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, "inflight": len(self._inflight)}
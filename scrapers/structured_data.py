@@ -0,0 +1,130 @@
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.fast_json import loads
+from utils.metrics import EXTRACT_RESULTS, EXTRACT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+NEXT_DATA_MARKER = b'id="__NEXT_DATA__"'
+JSON_LD_MARKER = b"application/ld+json"
+
+# (site, tier, result, seconds); result is ok, empty or error
+Observation = Tuple[str, str, str, float]
+
+
+def script_blocks(html: bytes, marker: bytes) -> Iterator[bytes]:
+    """Bodies of the <script> elements whose start tag contains ``marker``,
+    found by scanning bytes instead of building a DOM"""
+    pos = html.find(marker)
+    while pos != -1:
+        start = html.rfind(b"<script", 0, pos)
+        # No script before it, or a '>' in between: the marker sits outside
+        # a script's start tag (e.g. in text), so look for the next one
+        if start == -1 or html.find(b">", start, pos) != -1:
+            pos = html.find(marker, pos + len(marker))
+            continue
+        tag_end = html.find(b">", pos)
+        end = html.find(b"</script>", tag_end) if tag_end != -1 else -1
+        if end == -1:
+            return
+        yield html[tag_end + 1 : end]
+        pos = html.find(marker, end)
+
+
+def next_data(html: bytes) -> Optional[Any]:
+    """The Next.js page state (``<script id="__NEXT_DATA__">``), if present"""
+    for block in script_blocks(html, NEXT_DATA_MARKER):
+        try:
+            return loads(block)
+        except ValueError as e:
+            logger.debug("Unparseable __NEXT_DATA__: %s", e)
+    return None
+
+
+def json_ld(html: bytes) -> List[Any]:
+    """Every JSON-LD block of the page that parses"""
+    blocks = []
+    for block in script_blocks(html, JSON_LD_MARKER):
+        try:
+            blocks.append(loads(block))
+        except ValueError as e:
+            logger.debug("Unparseable JSON-LD block: %s", e)
+    return blocks
+
+
+def json_ld_products(data: Any) -> Iterator[Dict[str, Any]]:
+    """schema.org Product objects in JSON-LD, including those inside
+    ItemLists and ``@graph``s, in document order"""
+    if isinstance(data, list):
+        for item in data:
+            yield from json_ld_products(item)
+        return
+    if not isinstance(data, dict):
+        return
+    kind = data.get("@type")
+    kinds = kind if isinstance(kind, list) else [kind]
+    if "Product" in kinds:
+        yield data
+    elif "ItemList" in kinds:
+        for element in data.get("itemListElement") or []:
+            if isinstance(element, dict):
+                yield from json_ld_products(element.get("item", element))
+    elif "@graph" in data:
+        yield from json_ld_products(data["@graph"])
+
+
+def dig(data: Any, *path: Any) -> Any:
+    """``data[a][b]...``, or None where the path doesn't exist"""
+    for key in path:
+        try:
+            data = data[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return data
+
+
+class ExtractionStats:
+    """Time and outcome of each extraction tier per site.
+
+    Like selector hits, observations stay pending in the process that parsed
+    until ``drain``ed; the server merges those from its parse workers and
+    feeds the extraction metrics.
+    """
+
+    def __init__(self):
+        self._pending: List[Observation] = []
+        # (site, tier) -> {result: count}, plus total seconds
+        self._counts: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self._seconds: Dict[Tuple[str, str], float] = {}
+
+    def record(self, site: str, tier: str, result: str, seconds: float):
+        self._pending.append((site, tier, result, seconds))
+
+    def drain(self) -> List[Observation]:
+        pending, self._pending = self._pending, []
+        return pending
+
+    def merge(self, observations: List[Observation]):
+        for site, tier, result, seconds in observations:
+            counts = self._counts.setdefault((site, tier), {})
+            counts[result] = counts.get(result, 0) + 1
+            self._seconds[site, tier] = self._seconds.get((site, tier), 0.0) + seconds
+            EXTRACT_SECONDS.observe(seconds, site, tier)
+            EXTRACT_RESULTS.inc(site, tier, result)
+
+    def stats(self) -> Dict[str, Any]:
+        self.merge(self.drain())
+        sites: Dict[str, Any] = {}
+        for (site, tier), counts in sorted(self._counts.items()):
+            attempts = sum(counts.values())
+            sites.setdefault(site, {})[tier] = {
+                "attempts": attempts,
+                **counts,
+                "success_rate": round(counts.get("ok", 0) / attempts, 3),
+                "mean_ms": round(self._seconds[site, tier] / attempts * 1000, 2),
+            }
+        return sites
+
+
+extraction_stats = ExtractionStats()
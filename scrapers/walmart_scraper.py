@@ -1,78 +1,114 @@
-from typing import List, Dict, Any
-from bs4 import BeautifulSoup
+from typing import List, Optional
 import urllib.parse
 import logging
+from utils.product import Product
 from .base_scraper import BaseScraper
+from .structured_data import dig, next_data
 
 logger = logging.getLogger(__name__)
 
+# Where the search page's Next.js state keeps the result groups
+ITEM_STACKS_PATH = ("props", "pageProps", "initialData", "searchResult", "itemStacks")
+
 
 class WalmartScraper(BaseScraper):
+    site_name = "walmart"
+
+    # PerimeterX "Robot or human?" interstitial
+    captcha_markers = (b"px-captcha", b"Robot or human?")
+
     def get_search_url(self, query: str, country: str) -> str:
         if country != "US":
             return ""  # Walmart is US-specific
 
         encoded_query = urllib.parse.quote_plus(query)
-        return f"https://www.walmart.com/search?q={encoded_query}"
+        return f"{self.base_url('walmart.com')}/search?q={encoded_query}"
+
+    def parse_structured(
+        self, html: bytes, query: str, country: str
+    ) -> Optional[List[Product]]:
+        """Results from the page's Next.js state (``__NEXT_DATA__``)"""
+        if country != "US":
+            return []
+
+        stacks = dig(next_data(html), *ITEM_STACKS_PATH) or []
+        items = [
+            item
+            for stack in stacks
+            for item in (dig(stack, "items") or [])
+            if isinstance(item, dict) and item.get("__typename", "Product") == "Product"
+        ]
 
-    async def search_products(self, query: str, country: str) -> List[Dict[str, Any]]:
+        products = []
+        for item in items[: self.results_per_page]:
+            price_info = item.get("priceInfo") or {}
+            price_text = (
+                dig(price_info, "currentPrice", "priceString")
+                or price_info.get("linePrice")
+                or str(dig(price_info, "currentPrice", "price") or "0")
+            )
+            path = item.get("canonicalUrl") or ""
+            status = dig(item, "availabilityStatusV2", "value")
+            rating = item.get("averageRating")
+            product = Product(
+                link=f"{self.base_url('walmart.com')}{path}" if path else "",
+                price=self.parse_price(price_text),
+                currency="USD",
+                productName=item.get("name") or "",
+                website="Walmart",
+                availability="Out of Stock" if status == "OUT_OF_STOCK" else "In Stock",
+                rating=float(rating) if isinstance(rating, (int, float)) else None,
+                image_url=item.get("image") or "",
+            )
+            if product.productName and product.price_minor > 0:
+                products.append(product)
+        return products
+
+    def parse_search_results(
+        self, html: bytes, query: str, country: str
+    ) -> List[Product]:
         products = []
 
         if country != "US":
             return products
 
         try:
-            url = self.get_search_url(query, country)
-            if not url:
-                return products
-
-            html = await self.fetch_page(url)
-
-            if not html:
-                return products
-
-            soup = BeautifulSoup(html, "html.parser")
+            selectors = self.selector_table(country)
+            document = self.parse_html(html)
 
-            # Walmart product containers (simplified selectors)
-            product_containers = soup.find_all("div", attrs={"data-item-id": True})
+            # Walmart product containers
+            product_containers = selectors.first_nonempty(document, "product")
 
-            for container in product_containers[:10]:
+            for container in product_containers[: self.results_per_page]:
                 try:
                     # Product name
-                    name_elem = container.find(
-                        "span", attrs={"data-automation-id": "product-title"}
-                    )
-                    product_name = name_elem.get_text(strip=True) if name_elem else ""
+                    name_elem = selectors.first(container, "title")
+                    product_name = name_elem.text() if name_elem else ""
 
                     # Price
-                    price_elem = container.find(
-                        "div", class_="price-main"
-                    ) or container.find("span", class_="price-current")
-                    price = self.parse_price(
-                        price_elem.get_text(strip=True) if price_elem else "0"
-                    )
+                    price_elem = selectors.first(container, "price")
+                    price = self.parse_price(price_elem.text() if price_elem else "0")
 
                     # Link
-                    link_elem = container.find("a")
+                    link_elem = selectors.first(container, "link")
                     link = (
-                        f"https://www.walmart.com{link_elem['href']}"
+                        f"{self.base_url('walmart.com')}{link_elem['href']}"
                         if link_elem and link_elem.get("href")
                         else ""
                     )
 
-                    if product_name and price and float(price) > 0:
-                        products.append(
-                            {
-                                "link": link,
-                                "price": price,
-                                "currency": "USD",
-                                "productName": product_name,
-                                "website": "Walmart",
-                                "availability": "In Stock",
-                                "rating": None,
-                                "image_url": "",
-                            }
-                        )
+                    product = Product(
+                        link=link,
+                        price=price,
+                        currency="USD",
+                        productName=product_name,
+                        website="Walmart",
+                        availability="In Stock",
+                        rating=None,
+                        image_url="",
+                    )
+                    if product_name and product.price_minor > 0:
+                        products.append(product)
 
                 except Exception as e:
                     logger.warning(f"Error parsing Walmart product: {e}")
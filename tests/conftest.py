@@ -0,0 +1,95 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+# Settings are read when the modules are imported: keep the app from
+# writing SQLite files into the working directory or spawning parse workers
+os.environ.setdefault("SEARCH_CACHE_DB", "")
+os.environ.setdefault("PRICE_HISTORY_DB", "")
+os.environ.setdefault("PARSE_WORKERS", "0")
+# Every mocked site shares one host; don't pace it like a real retailer
+os.environ.setdefault("GOVERNOR_RATE", "1000")
+os.environ.setdefault("GOVERNOR_BURST", "1000")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def pages():
+    """Recorded results pages from benchmarks/fixtures, by site"""
+    from benchmarks.fixtures import load_fixtures
+
+    return {fixture["site"]: fixture for fixture in load_fixtures()}
+
+
+class RetailerServer:
+    """benchmarks.mock_retailer on a free local port, run by a background
+    thread so the app under test can fetch from it synchronously"""
+
+    def __init__(self, pages):
+        from benchmarks.mock_retailer import MockRetailer, SiteProfile
+
+        self.profiles = {
+            site: SiteProfile(page["html"]) for site, page in pages.items()
+        }
+        self.retailer = MockRetailer(self.profiles, seed=0)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.port = None
+        self._runner = None
+
+    def start(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result(10)
+
+    async def _start(self):
+        from aiohttp import web
+
+        self._runner = web.AppRunner(self.retailer.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self.loop).result(10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(10)
+        self.loop.close()
+
+    def url(self, site: str) -> str:
+        return f"http://127.0.0.1:{self.port}/{site}"
+
+    def responses(self, site: str) -> int:
+        return sum(self.profiles[site].responses.values())
+
+
+@pytest.fixture
+def retailer(pages):
+    server = RetailerServer(pages)
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(retailer, monkeypatch):
+    """TestClient for the app, with every scraper pointed at ``retailer``,
+    no search cache and fresh circuit breakers"""
+    from fastapi.testclient import TestClient
+
+    import main
+    from scrapers.circuit_breaker import CircuitBreaker
+
+    manager = main.scraper_manager
+    for site, scraper in manager.scrapers.items():
+        monkeypatch.setattr(scraper, "base_url_overrides", {site: retailer.url(site)})
+    monkeypatch.setattr(manager, "cache", None)
+    monkeypatch.setattr(
+        manager, "breakers", {site: CircuitBreaker(site) for site in manager.scrapers}
+    )
+    with TestClient(main.app) as client:
+        yield client
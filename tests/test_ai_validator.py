@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from utils.ai_validator import AIValidator
+from utils.product import Product
+
+QUERY = "iPhone 16 Pro 128GB"
+
+TITLES = [
+    "Apple iPhone 16 Pro, US Version, 128GB, Black Titanium - Unlocked (Renewed)",
+    "Apple iPhone 16 Pro 128GB Natural Titanium",
+    "iPhone 16 Pro 128 GB: 5G Mobile Phone with Camera Control, 4K 120 fps",
+    "Apple - iPhone 16 Pro 128GB - Apple Intelligence - White Titanium (AT&T)",
+    "Straight Talk Apple iPhone 16 Pro, 128GB, Desert Titanium - Prepaid",
+    "Apple iPhone 15 Pro Max 256GB Blue Titanium",
+    "Samsung Galaxy S24 Ultra 256GB Titanium Gray",
+    "Silicone Case with MagSafe for iPhone 16 Pro - Clear",
+    "OtterBox Defender Series Case for iPhone 16 Pro",
+    "USB-C to Lightning Cable (1 m)",
+    "",
+]
+
+
+@pytest.fixture
+def validator():
+    return AIValidator()
+
+
+def test_ngram_scores_track_sequence_matcher(validator):
+    exact = validator.score_batch(TITLES, QUERY, exact=True)
+    approx = validator.score_batch(TITLES, QUERY)
+
+    threshold = validator.relevance_threshold
+    for title, a, b in zip(TITLES, exact, approx):
+        assert b == pytest.approx(a, abs=0.03), title
+        assert (a >= threshold) == (b >= threshold), title
+
+
+def test_batch_matches_per_name_scores(validator):
+    batch = validator.score_batch(TITLES, QUERY)
+    assert batch == [validator.calculate_relevance(t, QUERY) for t in TITLES]
+
+
+def test_pruning_keeps_the_same_names(validator):
+    threshold = validator.relevance_threshold
+    full = validator.score_batch(TITLES, QUERY)
+    pruned = validator.score_batch(TITLES, QUERY, min_score=threshold)
+    assert [s >= threshold for s in full] == [s >= threshold for s in pruned]
+
+
+def test_blank_query_scores_nothing(validator):
+    assert validator.score_batch(TITLES, "  ") == [0.0] * len(TITLES)
+
+
+def test_validate_and_rank_drops_irrelevant_and_sorts(validator):
+    products = [
+        Product(f"https://example.com/{i}", price, "USD", title, "Amazon")
+        for i, (title, price) in enumerate(
+            [
+                ("USB-C to Lightning Cable (1 m)", "19.00"),
+                ("Apple iPhone 16 Pro 128GB Natural Titanium", "999.00"),
+                ("Apple iPhone 16 Pro 128GB Black Titanium", "949.00"),
+                ("Samsung Galaxy S24 Ultra 256GB Titanium Gray", "1099.00"),
+            ]
+        )
+    ]
+    ranked = asyncio.run(validator.validate_and_rank(products, QUERY))
+
+    names = [p.productName for p in ranked]
+    assert "USB-C to Lightning Cable (1 m)" not in names
+    assert names[0].startswith("Apple iPhone 16 Pro 128GB")
+    scores = validator.score_batch(names, QUERY)
+    assert scores == sorted(scores, reverse=True)
@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+from scrapers.batch_search import BatchSearcher
+from scrapers.scraper_manager import ScraperManager
+from utils.ai_validator import AIValidator
+from utils.country_mapper import CountryMapper
+
+
+def frames(response):
+    return [json.loads(line) for line in response.iter_lines() if line]
+
+
+def test_group_merges_spellings_of_the_same_search():
+    searches = [("US", "iPhone 16"), ("in", "Pixel 9"), ("us", " IPHONE  16 ")]
+    assert BatchSearcher.group(searches) == {
+        ("US", "iphone 16"): [0, 2],
+        ("IN", "pixel 9"): [1],
+    }
+
+
+def test_batch_streams_a_frame_per_index_and_scrapes_duplicates_once(client, retailer):
+    searches = [
+        {"country": "US", "query": "iPhone 16 Pro"},
+        {"country": "US", "query": "iPhone 16 Pro 128GB"},
+        {"country": "us", "query": "iphone 16 pro"},
+    ]
+    with client.stream(
+        "POST", "/search/batch", json={"searches": searches}
+    ) as response:
+        assert response.status_code == 200
+        sent = frames(response)
+
+    results, summary = sent[:-1], sent[-1]
+    by_index = {frame["index"]: frame for frame in results}
+    assert sorted(by_index) == [0, 1, 2]
+    assert all(frame["type"] == "result" for frame in results)
+    # Each frame echoes its own spelling, with the shared search's results
+    assert by_index[2]["query"] == "iphone 16 pro"
+    assert by_index[2]["products"] == by_index[0]["products"]
+    assert by_index[0]["products"]
+    assert set(by_index[1]["sites"]) == {"amazon", "ebay", "bestbuy", "walmart"}
+
+    assert summary == {
+        "type": "summary",
+        "searches": 3,
+        "unique_searches": 2,
+        "total_products": sum(len(frame["products"]) for frame in results),
+        "elapsed_ms": summary["elapsed_ms"],
+    }
+    assert retailer.responses("amazon") == 2
+
+
+class SlowManager:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def scrape_with_status(self, website, query, country, *args, slot, **kwargs):
+        async with slot:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+        return {
+            "website": website,
+            "status": "ok",
+            "error": None,
+            "elapsed_ms": 10.0,
+            "products": [],
+        }
+
+
+def test_site_fetches_are_capped_across_the_batch():
+    manager = SlowManager()
+    searcher = BatchSearcher(
+        manager,
+        CountryMapper(),
+        AIValidator(),
+        concurrency=8,
+        site_concurrency=1,
+        site_concurrencies={},
+    )
+
+    async def scenario():
+        searches = [("US", f"query {n}") for n in range(6)]
+        return [item async for item in searcher.run(searches)]
+
+    results = asyncio.run(scenario())
+    assert sorted(index for indexes, _ in results for index in indexes) == list(
+        range(6)
+    )
+    # Four US sites, one fetch each at a time
+    assert manager.peak == 4
+    assert searcher.stats()["unique_searches"] == 6
+
+
+def test_a_fetch_keeps_its_slot_after_its_search_times_out():
+    manager = ScraperManager()
+    running = {website: 0 for website in manager.scrapers}
+    peak = dict(running)
+
+    def slow_site(website):
+        async def search_products(query, country, page=1):
+            running[website] += 1
+            peak[website] = max(peak[website], running[website])
+            await asyncio.sleep(0.1)
+            running[website] -= 1
+            return []
+
+        return search_products
+
+    for website, scraper in manager.scrapers.items():
+        scraper.search_products = slow_site(website)
+    searcher = BatchSearcher(
+        manager,
+        CountryMapper(),
+        AIValidator(),
+        site_concurrency=1,
+        site_concurrencies={},
+    )
+
+    async def scenario():
+        # Each search gives up on eBay long before its fetch finishes, and
+        # the next one arrives while that fetch is still running
+        for n in range(3):
+            result = await searcher.search("US", f"query {n}", deadline_ms=30)
+            assert result["sites"]["ebay"]["status"] == "timeout"
+        while manager.single_flight:
+            await asyncio.sleep(0.02)
+
+    asyncio.run(scenario())
+    assert peak["ebay"] == 1
+    assert searcher.stats()["in_flight"]["ebay"] == 0
@@ -0,0 +1,64 @@
+from benchmarks.compare import compare
+from benchmarks.fixtures import FIXTURES_DIR
+from benchmarks.scrape_pipeline import percentile, run, summarize
+
+
+def test_percentile_is_nearest_rank():
+    samples = [float(n) for n in range(1, 101)]
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 99) == 99
+    assert percentile([3.0], 99) == 3.0
+
+
+def test_summarize_derives_throughput():
+    summary = summarize([10.0, 20.0, 30.0, 40.0], items=40)
+    assert summary["runs"] == 4
+    assert summary["p50_ms"] == 20.0
+    assert summary["pages_per_sec"] == 40.0
+    assert summary["products_per_sec"] == 400.0
+
+
+def test_pipeline_report_covers_every_fixture():
+    report = run(FIXTURES_DIR, iterations=2)
+    assert {row["site"] for row in report["parse"]} == {
+        "amazon",
+        "flipkart",
+        "ebay",
+        "bestbuy",
+        "walmart",
+    }
+    assert all(row["products_per_page"] > 0 for row in report["parse"])
+    assert report["validate"] and report["iterations"] == 2
+
+
+def pipeline_report(p50: float, throughput: float, rss: float = 50.0):
+    row = {
+        "p50_ms": p50,
+        "p99_ms": p50,
+        "pages_per_sec": throughput,
+        "products_per_sec": throughput * 10,
+    }
+    return {
+        "parse": [{"page": "amazon.html", **row}],
+        "validate": [],
+        "peak_rss_mb": rss,
+    }
+
+
+def test_compare_flags_only_changes_beyond_the_threshold():
+    _, regressions = compare(
+        pipeline_report(10.0, 100.0), pipeline_report(10.5, 96.0), threshold=10
+    )
+    assert regressions == []
+
+    _, regressions = compare(
+        pipeline_report(10.0, 100.0), pipeline_report(12.0, 80.0), threshold=10
+    )
+    assert len(regressions) == 4
+    assert all(line.startswith("parse:amazon.html") for line in regressions)
+
+    # Faster is never a regression
+    _, regressions = compare(
+        pipeline_report(10.0, 100.0), pipeline_report(5.0, 200.0), threshold=10
+    )
+    assert regressions == []
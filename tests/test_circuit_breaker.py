@@ -0,0 +1,162 @@
+import time
+
+import pytest
+
+import main
+from scrapers.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+from scrapers.retry import RetryPolicy
+from utils.search_cache import SearchCache
+
+
+def trip(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.check()
+        breaker.record_failure("no results")
+
+
+def test_open_half_open_closed_cycle():
+    breaker = CircuitBreaker("ebay", failure_threshold=3, cooldown_s=0.05)
+
+    for _ in range(2):
+        breaker.record_failure("no results")
+    assert breaker.state == CLOSED
+    breaker.record_failure("timeout: 9.0s")
+    assert breaker.state == OPEN
+
+    # Open: rejected without calling the site
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.check()
+    assert excinfo.value.name == "ebay" and excinfo.value.retry_in_s > 0
+
+    # After the cooldown one probe goes through, others wait for its outcome
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+    assert breaker.counters == {
+        "successes": 1,
+        "failures": 3,
+        "trips": 1,
+        "rejected": 2,
+    }
+
+
+def test_failed_probe_reopens_for_another_cooldown():
+    breaker = CircuitBreaker("ebay", failure_threshold=1, cooldown_s=0.05)
+    trip(breaker)
+    time.sleep(0.06)
+
+    breaker.check()
+    breaker.record_failure("error: boom")
+    assert breaker.state == OPEN
+    assert breaker.counters["trips"] == 2
+    assert not breaker.allow()
+    assert breaker.stats()["last_failure"] == "error: boom"
+
+
+def test_abandoned_probe_frees_its_slot():
+    breaker = CircuitBreaker("ebay", failure_threshold=1, cooldown_s=0)
+    trip(breaker)
+
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.abandon()
+    assert breaker.allow()
+
+
+def test_every_half_open_window_gets_all_its_probes():
+    breaker = CircuitBreaker(
+        "ebay", failure_threshold=1, cooldown_s=0.05, half_open_probes=2
+    )
+    trip(breaker)
+
+    for _ in range(3):
+        time.sleep(0.06)
+        assert breaker.allow() and breaker.allow()
+        assert not breaker.allow()
+        # The first failure reopens the circuit; the second probe lands late
+        breaker.record_failure("error: boom")
+        breaker.record_failure("error: boom")
+        assert breaker.state == OPEN and breaker.probes_in_flight == 0
+
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.allow()
+    breaker.record_success()
+    breaker.record_failure("no results")
+    assert breaker.state == OPEN  # threshold 1: a closed circuit trips again
+    assert breaker.probes_in_flight == 0
+
+
+def test_late_probe_success_after_closing_keeps_no_slot():
+    breaker = CircuitBreaker(
+        "ebay", failure_threshold=2, cooldown_s=0, half_open_probes=2
+    )
+    trip(breaker)
+    assert breaker.allow() and breaker.allow()
+    breaker.record_success()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.probes_in_flight == 0
+
+
+def test_success_resets_the_failure_streak():
+    breaker = CircuitBreaker("ebay", failure_threshold=2)
+    breaker.record_failure("no results")
+    breaker.record_success()
+    breaker.record_failure("no results")
+    assert breaker.state == CLOSED
+
+
+def test_open_circuit_skips_the_site(client, retailer, monkeypatch):
+    manager = main.scraper_manager
+    monkeypatch.setattr(
+        manager.scrapers["walmart"], "retry_policy", RetryPolicy(max_attempts=1)
+    )
+    manager.breakers["walmart"] = CircuitBreaker(
+        "walmart", failure_threshold=1, cooldown_s=60
+    )
+    retailer.profiles["walmart"].error_rate = 1.0
+    payload = {"country": "US", "query": "iPhone 16 Pro"}
+
+    first = client.post("/search", json=payload)
+    assert first.status_code == 200
+    assert "X-Skipped-Sites" not in first.headers
+    assert manager.breakers["walmart"].state == OPEN
+    fetched = retailer.responses("walmart")
+
+    second = client.post("/search", json=payload)
+    assert second.headers["X-Partial-Results"] == "true"
+    assert second.headers["X-Skipped-Sites"] == "walmart"
+    assert retailer.responses("walmart") == fetched
+    assert "Amazon" in {product["website"] for product in second.json()}
+
+    stats = client.get("/admin/breakers").json()
+    assert stats["walmart"]["state"] == OPEN
+    assert stats["walmart"]["rejected"] == 1
+    assert stats["amazon"]["state"] == CLOSED
+
+
+def test_open_circuit_still_serves_cached_results(client, retailer, monkeypatch):
+    manager = main.scraper_manager
+    monkeypatch.setattr(manager, "cache", SearchCache(db_path="", site_ttls={}))
+    payload = {"country": "US", "query": "iPhone 16 Pro"}
+    first = client.post("/search", json=payload)
+    fetched = retailer.responses("walmart")
+
+    manager.breakers["walmart"] = CircuitBreaker("walmart", failure_threshold=1)
+    manager.breakers["walmart"].record_failure("error: site down")
+    second = client.post("/search", json=payload)
+
+    assert second.status_code == 200
+    assert "X-Skipped-Sites" not in second.headers
+    assert second.json() == first.json()
+    assert retailer.responses("walmart") == fetched
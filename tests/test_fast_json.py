@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from starlette.responses import JSONResponse
+
+import main
+from utils import fast_json
+from utils.product import Product
+
+CONTENT = [
+    {
+        "productName": "Apple iPhone 16 Pro – 128 GB, Désert",
+        "price": "₹1,19,900",
+        "rating": 4.5,
+        "details": {"features": ["A18 Pro", '6.3"'], "stock": None},
+        "ok": True,
+        "count": 3,
+    }
+]
+
+
+def iphone() -> Product:
+    return Product(
+        "https://www.amazon.in/dp/B0DGJ3THPR",
+        "119900",
+        "INR",
+        "Apple iPhone 16 Pro – 128 GB",
+        "Amazon",
+        rating=4.5,
+    )
+
+
+@pytest.fixture(params=[True, False], ids=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param and not fast_json.HAS_ORJSON:
+        pytest.skip("orjson is not installed")
+    monkeypatch.setattr(fast_json, "HAS_ORJSON", request.param)
+    return request.param
+
+
+def test_dumps_matches_starlette(backend):
+    assert fast_json.dumps(CONTENT) == JSONResponse(CONTENT).body
+
+
+def test_products_encode_as_their_dict(backend):
+    product = iphone()
+    assert fast_json.dumps([product]) == JSONResponse([product.to_dict()]).body
+    assert fast_json.loads(fast_json.dumps({"p": product})) == {"p": product.to_dict()}
+
+
+def test_unknown_types_are_refused(backend):
+    with pytest.raises(TypeError):
+        fast_json.dumps({"when": object()})
+
+
+def test_fast_response_renders_products_directly():
+    response = fast_json.FastJSONResponse([iphone()], headers={"X-Test": "1"})
+    assert json.loads(response.body) == [iphone().to_dict()]
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["X-Test"] == "1"
+
+
+def test_search_responses_are_identical_either_way(client, monkeypatch):
+    payload = {"country": "US", "query": "iPhone 16 Pro"}
+    monkeypatch.setattr(main, "FAST_JSON_RESPONSES", False)
+    plain = client.post("/search", json=payload)
+    monkeypatch.setattr(main, "FAST_JSON_RESPONSES", True)
+    fast = client.post("/search", json=payload)
+
+    assert fast.status_code == plain.status_code == 200
+    assert fast.content == plain.content
+    assert json.loads(main.ndjson_frame({"a": [1]})) == {"a": [1]}
@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+from benchmarks.mock_retailer import TokenBucket
+from scrapers.governor import DomainGovernor, Governor, domain_of, governor
+from scrapers.http_pool import http_pool
+from scrapers.retry import RetryPolicy
+from scrapers.walmart_scraper import WalmartScraper
+
+
+def domain_governor(**overrides) -> DomainGovernor:
+    params = dict(
+        rate=10.0, min_rate=0.5, burst=2, max_concurrency=4, backoff=0.5, ramp=1.0
+    )
+    params.update(overrides)
+    return DomainGovernor("example.com", **params)
+
+
+def test_domain_of_drops_www():
+    assert domain_of("https://www.amazon.in/s?k=x") == "amazon.in"
+    assert domain_of("http://127.0.0.1:9000/ebay") == "127.0.0.1:9000"
+
+
+def test_throttling_halves_rate_and_concurrency_then_ramps_back():
+    governor = domain_governor()
+
+    governor.throttled(retry_after=0)
+    assert governor.rate == 5.0 and int(governor.concurrency) == 2
+    assert governor.tokens == 0.0
+
+    for _ in range(3):
+        governor.throttled(retry_after=0)
+    assert governor.rate == 0.625 and governor.concurrency == 1.0
+    governor.throttled(retry_after=0)
+    assert governor.rate == 0.5  # floored at min_rate
+
+    for _ in range(20):
+        governor.succeeded()
+    assert governor.rate == 10.0 and governor.concurrency == 4
+    assert governor.counters["throttled"] == 5
+    assert governor.counters["successes"] == 20
+
+
+def test_throttling_pauses_the_domain():
+    governor = domain_governor()
+    governor.throttled(retry_after=0.2, captcha=True)
+    assert governor.counters["captchas"] == 1
+    assert 0 < governor.stats()["paused_for_s"] <= 0.2
+
+    async def acquire():
+        start = time.monotonic()
+        async with governor.slot():
+            return time.monotonic() - start
+
+    assert asyncio.run(acquire()) >= 0.19
+
+
+def test_in_flight_requests_are_capped():
+    governor = domain_governor(rate=1000, burst=1000, max_concurrency=2)
+    peak = 0
+
+    async def fetch():
+        nonlocal peak
+        async with governor.slot():
+            peak = max(peak, governor.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(fetch() for _ in range(6)))
+
+    asyncio.run(main())
+    assert peak == 2
+    assert governor.in_flight == 0
+    assert governor.counters["requests"] == 6
+
+
+def test_requests_beyond_the_burst_are_paced():
+    governor = domain_governor(rate=20, burst=1)
+
+    async def main():
+        start = time.monotonic()
+        for _ in range(3):
+            async with governor.slot():
+                pass
+        return time.monotonic() - start
+
+    # One token up front, then one every 50ms
+    assert asyncio.run(main()) >= 0.09
+
+
+def test_governor_per_domain_rates_and_disabled():
+    pacing = Governor(enabled=True, default_rate=2, rates={"amazon.in": 5})
+    amazon = pacing.for_url("https://www.amazon.in/s?k=x")
+    assert amazon is pacing.for_url("https://amazon.in/dp/B0")
+    assert amazon.target_rate == 5
+    assert pacing.for_url("https://www.ebay.com/").target_rate == 2
+    assert set(pacing.stats()["domains"]) == {"amazon.in", "ebay.com"}
+
+    assert Governor(enabled=False).for_url("https://www.amazon.in/") is None
+
+
+def test_429_from_the_retailer_backs_the_domain_off(retailer):
+    retailer.profiles["walmart"].bucket = TokenBucket(rate=0.001, burst=1)
+    scraper = WalmartScraper()
+    scraper.retry_policy = RetryPolicy(max_attempts=1)
+    url = retailer.url("walmart") + "/search?q=x"
+
+    async def fetch_twice():
+        try:
+            return [await scraper.fetch_bytes(url) for _ in range(2)]
+        finally:
+            await http_pool.close()
+
+    ok, throttled = asyncio.run(fetch_twice())
+    assert ok and throttled == b""
+    domain = governor.for_url(url)
+    assert domain.counters["successes"] == 1 and domain.counters["throttled"] == 1
+    assert domain.rate < domain.target_rate
@@ -0,0 +1,58 @@
+import pytest
+
+from scrapers.html_parser import ParserBackend, available_backends, get_backend
+from scrapers.scraper_manager import ScraperManager
+
+SNIPPET = b"""
+<div class="item" data-id="42"><h2 class="title">Apple <b>iPhone</b> 16</h2>
+<input disabled><a href="/ip/42">link</a></div>
+<div class="item" data-id="43"><h2 class="title">Pixel 9</h2></div>
+"""
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_backends_agree_on_the_node_api(backend):
+    parser = get_backend(backend)
+    document = parser.parse(SNIPPET)
+
+    items = document.select(parser.compile("div.item"))
+    assert [item["data-id"] for item in items] == ["42", "43"]
+    title = items[0].select_one(parser.compile("h2.title"))
+    # Fragments are stripped and joined, like bs4's get_text(strip=True)
+    assert title.text() == "AppleiPhone16"
+    assert items[0].select_one(parser.compile("a")).get("href") == "/ip/42"
+    assert items[0].select_one(parser.compile("input")).get("disabled") == ""
+    assert items[1].select_one(parser.compile("a")) is None
+    assert items[1].get("missing", "default") == "default"
+    with pytest.raises(KeyError):
+        items[1]["missing"]
+
+
+@pytest.mark.parametrize("site", ["amazon", "flipkart", "ebay", "bestbuy", "walmart"])
+def test_every_backend_parses_the_same_products(pages, site):
+    page = pages[site]
+    results = {}
+    for backend in available_backends():
+        scraper = ScraperManager().scrapers[site]
+        scraper.parser_backend = backend
+        products = scraper.parse_search_results(
+            page["html"], page["query"], page["country"]
+        )
+        results[backend] = [product.to_dict() for product in products]
+
+    reference = results["bs4-html.parser"]
+    assert reference
+    assert all(found == reference for found in results.values())
+
+
+def test_unknown_backend_falls_back_to_html_parser():
+    assert get_backend("no-such-parser").name == "bs4-html.parser"
+
+
+def test_a_backend_must_implement_the_node_api():
+    class ParseOnly(ParserBackend):
+        def parse(self, html):
+            return None
+
+    with pytest.raises(TypeError, match="select"):
+        ParseOnly()
@@ -0,0 +1,41 @@
+import asyncio
+
+from scrapers.ebay_scraper import EbayScraper
+from scrapers.http_pool import HTTPPool, http_pool
+from scrapers.walmart_scraper import WalmartScraper
+
+
+def test_pool_starts_lazily_and_restarts_after_close():
+    async def scenario():
+        pool = HTTPPool(limit=5, limit_per_host=2)
+        assert not pool.started
+        first = await pool.get_session()
+        assert pool.started
+        assert await pool.get_session() is first
+        assert first.connector.limit == 5
+        assert first.connector.limit_per_host == 2
+
+        await pool.close()
+        assert first.closed and not pool.started
+        second = await pool.get_session()
+        await pool.close()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert second is not first
+
+
+def test_scrapers_borrow_the_shared_session():
+    async def scenario():
+        ebay, walmart = EbayScraper(), WalmartScraper()
+        try:
+            session = await ebay.get_session()
+            assert await walmart.get_session() is session
+            # Closing a scraper only drops its reference
+            await ebay.close()
+            assert not session.closed and http_pool.started
+        finally:
+            await http_pool.close()
+        assert session.closed
+
+    asyncio.run(scenario())
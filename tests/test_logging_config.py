@@ -0,0 +1,111 @@
+import asyncio
+import json
+import logging
+import os
+import queue
+
+from utils.logging_config import (
+    HtmlCapture,
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    Truncated,
+)
+from utils.metrics import trace_id_var
+
+
+class Exploding:
+    def __repr__(self):
+        raise AssertionError("rendered a payload for a disabled level")
+
+
+def record(msg: str, *args, **extra) -> logging.LogRecord:
+    entry = logging.LogRecord("scrapers", logging.INFO, __file__, 1, msg, args, None)
+    entry.__dict__.update(extra)
+    return entry
+
+
+def test_truncated_caps_lists_bytes_and_text():
+    assert str(Truncated([1, 2, 3, 4, 5], items=2)) == "[1, 2] (+3 more)"
+    assert str(Truncated(b"<html>\xff</html>", limit=7)) == "<html>�"
+    assert str(Truncated("x" * 12, limit=5)) == "xxxxx... (12 chars)"
+    assert str(Truncated({"a": 1})) == "{'a': 1}"
+
+
+def test_truncated_payloads_are_not_rendered_below_the_level():
+    log = logging.getLogger("tests.gated")
+    log.setLevel(logging.INFO)
+    log.debug("Results: %s", Truncated(Exploding()))
+
+
+def test_queue_handler_renders_and_caps_the_message():
+    records = queue.Queue()
+    handler = NonBlockingQueueHandler(records, max_chars=10)
+    handler.handle(record("scraped %s from %s", 1234567, "walmart"))
+
+    queued = records.get_nowait()
+    assert queued.msg == "scraped 12... (28 chars)"
+    assert queued.args is None
+
+
+def test_queue_handler_drops_records_when_full():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1), max_chars=100)
+    for _ in range(3):
+        handler.handle(record("hello"))
+    assert handler.dropped == 2
+
+
+def test_json_formatter_includes_extra_fields():
+    line = JsonFormatter().format(record("hit %s", "ebay", trace_id="t1", site="ebay"))
+    entry = json.loads(line)
+    assert entry["msg"] == "hit ebay"
+    assert entry["level"] == "INFO" and entry["logger"] == "scrapers"
+    assert entry["trace_id"] == "t1" and entry["site"] == "ebay"
+    assert "args" not in entry and "exc" not in entry
+
+
+def test_html_capture_keeps_empty_pages_and_samples_the_rest(tmp_path):
+    capture = HtmlCapture(str(tmp_path), sample=0.0, max_files=10)
+
+    async def scenario():
+        await capture.save("ebay", b"<html>ok</html>", "iPhone 16")
+        await capture.save("ebay", b"<html></html>", "iPhone 16 / Pro", empty=True)
+
+    asyncio.run(scenario())
+    [name] = os.listdir(tmp_path)
+    assert name.endswith("-ebay-iPhone_16_Pro-empty.html")
+    assert capture.saved == 1
+
+
+def test_html_capture_file_names_are_sanitized(tmp_path):
+    capture = HtmlCapture(str(tmp_path / "pages"), sample=1.0)
+
+    async def scenario():
+        # Set directly, as if a trace ID had skipped new_trace's check
+        trace_id_var.set("../../x/" + "y" * 100)
+        await capture.save("ebay", b"<html></html>", "tv")
+
+    asyncio.run(scenario())
+    [name] = os.listdir(tmp_path / "pages")
+    assert "/" not in name and ".." not in name
+    assert name.endswith("-ebay-tv.html") and capture.saved == 1
+
+
+def test_html_capture_prunes_the_oldest_pages(tmp_path):
+    capture = HtmlCapture(str(tmp_path), sample=1.0, max_files=2)
+
+    async def scenario():
+        for n in range(4):
+            await capture.save("ebay", f"<p>{n}</p>".encode(), f"page {n}")
+
+    asyncio.run(scenario())
+    pages = sorted(os.listdir(tmp_path))
+    assert [(tmp_path / name).read_bytes() for name in pages] == [
+        b"<p>2</p>",
+        b"<p>3</p>",
+    ]
+
+
+def test_html_capture_is_off_without_a_directory():
+    capture = HtmlCapture(None, sample=1.0)
+    asyncio.run(capture.save("ebay", b"<html></html>", "q", empty=True))
+    assert not capture.enabled and capture.saved == 0
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+
+import pytest
+
+from utils.metrics import (
+    Registry,
+    TraceIdFilter,
+    new_trace,
+    stage,
+    trace_id_var,
+    trace_summary,
+)
+
+
+def test_registry_renders_the_prometheus_text_format():
+    registry = Registry()
+    hits = registry.counter("lookups_total", "Cache lookups", ("site", "result"))
+    latency = registry.histogram("fetch_seconds", "Fetch time", ("site",), (0.1, 1))
+    hits.inc("ebay", "hit")
+    hits.inc("ebay", "hit", amount=2)
+    hits.inc('we"ird', "miss")
+    for seconds in (0.05, 0.5, 3):
+        latency.observe(seconds, "ebay")
+
+    assert registry.render().splitlines() == [
+        "# HELP lookups_total Cache lookups",
+        "# TYPE lookups_total counter",
+        'lookups_total{site="ebay",result="hit"} 3',
+        'lookups_total{site="we\\"ird",result="miss"} 1',
+        "# HELP fetch_seconds Fetch time",
+        "# TYPE fetch_seconds histogram",
+        'fetch_seconds_bucket{site="ebay",le="0.1"} 1',
+        'fetch_seconds_bucket{site="ebay",le="1.0"} 2',
+        'fetch_seconds_bucket{site="ebay",le="+Inf"} 3',
+        'fetch_seconds_sum{site="ebay"} 3.55',
+        'fetch_seconds_count{site="ebay"} 3',
+    ]
+
+
+def test_metric_names_are_unique():
+    registry = Registry()
+    registry.counter("requests_total", "Requests")
+    with pytest.raises(ValueError):
+        registry.histogram("requests_total", "Requests")
+
+
+def test_stages_are_shared_with_child_tasks():
+    async def fetch(site: str):
+        with stage("fetch", None, site):
+            await asyncio.sleep(0)
+
+    async def request():
+        new_trace("abc123")
+        with stage("validate", None):
+            pass
+        await asyncio.gather(fetch("ebay"), fetch("walmart"))
+        return trace_id_var.get(), trace_summary()
+
+    trace_id, summary = asyncio.run(request())
+    assert trace_id == "abc123"
+    assert summary.split() == ["validate=0ms", "fetch[ebay]=0ms", "fetch[walmart]=0ms"]
+
+
+def test_log_records_carry_the_trace_id():
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "msg", (), None)
+
+    async def request():
+        new_trace()
+        TraceIdFilter().filter(record)
+        return trace_id_var.get()
+
+    assert record.__dict__.get("trace_id") is None
+    trace_id = asyncio.run(request())
+    assert record.trace_id == trace_id and len(trace_id) == 16
+
+
+def test_responses_carry_a_trace_id(client):
+    generated = client.get("/health").headers["X-Trace-Id"]
+    assert len(generated) == 16
+    assert client.get("/health").headers["X-Trace-Id"] != generated
+
+    adopted = client.get("/health", headers={"X-Request-ID": "req-42"})
+    assert adopted.headers["X-Trace-Id"] == "req-42"
+
+
+@pytest.mark.parametrize("request_id", ["a" * 65, "x/../y", "id with spaces", ""])
+def test_malformed_request_ids_get_a_fresh_trace_id(client, request_id):
+    response = client.get("/health", headers={"X-Request-ID": request_id})
+    trace_id = response.headers["X-Trace-Id"]
+    assert trace_id != request_id and len(trace_id) == 16
+
+
+def test_metrics_endpoint_counts_requests_and_site_searches(client):
+    client.post("/search", json={"country": "US", "query": "iPhone 16 Pro"})
+    body = client.get("/metrics").text
+
+    assert (
+        'http_request_duration_seconds_count{method="POST",route="/search",'
+        'status="200"}' in body
+    )
+    assert 'site_search_duration_seconds_count{site="ebay",status="ok"}' in body
+    assert 'scraper_fetch_bytes_bucket{site="walmart",le="+Inf"}' in body
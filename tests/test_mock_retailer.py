@@ -0,0 +1,98 @@
+import argparse
+import itertools
+import random
+import urllib.error
+import urllib.request
+
+import pytest
+
+from benchmarks.fixtures import FIXTURES_DIR
+from benchmarks.load_driver import make_payloads
+from benchmarks.mock_retailer import SiteProfile, TokenBucket, build_profiles
+from scrapers.ebay_scraper import EbayScraper
+from utils.settings import parse_mapping
+
+
+def fetch_status(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as error:
+        return error.code
+
+
+def test_token_bucket_allows_a_burst_then_throttles():
+    bucket = TokenBucket(rate=0.001, burst=3)
+    assert [bucket.take() for _ in range(4)] == [True, True, True, False]
+
+
+def test_parse_mapping_lowercases_keys_and_skips_junk():
+    assert parse_mapping("Amazon=600, ebay=300,,junk") == {
+        "amazon": 600.0,
+        "ebay": 300.0,
+    }
+    assert parse_mapping("amazon=http://h:1/a=b", str) == {"amazon": "http://h:1/a=b"}
+
+
+def test_base_url_override(monkeypatch):
+    scraper = EbayScraper()
+    assert scraper.base_url("ebay.com") == "https://www.ebay.com"
+    monkeypatch.setattr(
+        scraper, "base_url_overrides", {"ebay": "http://127.0.0.1:9000/ebay/"}
+    )
+    assert scraper.base_url("ebay.com") == "http://127.0.0.1:9000/ebay"
+
+
+def test_retailer_serves_fixture_pages_and_injects_errors(retailer, pages):
+    with urllib.request.urlopen(retailer.url("ebay") + "/sch/i.html?_nkw=x") as page:
+        assert page.read() == pages["ebay"]["html"]
+
+    retailer.profiles["ebay"].error_rate = 1.0
+    assert fetch_status(retailer.url("ebay") + "/any") == 500
+    assert fetch_status(f"http://127.0.0.1:{retailer.port}/nowhere/x") == 404
+    assert retailer.profiles["ebay"].responses == {200: 1, 500: 1}
+
+
+def test_retailer_throttles_over_the_rps_limit(retailer):
+    retailer.profiles["walmart"].bucket = TokenBucket(rate=0.001, burst=2)
+    statuses = [fetch_status(retailer.url("walmart") + "/search") for _ in range(3)]
+    assert statuses == [200, 200, 429]
+
+
+def test_site_profile_delay_stays_within_jitter():
+    profile = SiteProfile(b"", latency_ms=100, jitter_ms=20)
+    rng = random.Random(0)
+    assert all(0.08 <= profile.delay(rng) <= 0.12 for _ in range(100))
+    assert SiteProfile(b"", latency_ms=5, jitter_ms=50).delay(rng) >= 0
+
+
+def test_build_profiles_applies_per_site_overrides():
+    args = argparse.Namespace(
+        fixtures=FIXTURES_DIR,
+        latency_ms=200,
+        jitter_ms=0,
+        error_rate=0.0,
+        unavailable_rate=0.0,
+        rps_limit=0,
+        site_latency_ms="amazon=900",
+        site_error_rate="ebay=0.5",
+        site_unavailable_rate="",
+        site_rps_limit="walmart=10",
+    )
+    profiles = build_profiles(args)
+
+    assert profiles["amazon"].latency_ms == 900
+    assert profiles["ebay"].latency_ms == 200
+    assert profiles["ebay"].error_rate == 0.5
+    assert profiles["walmart"].bucket is not None
+    assert profiles["amazon"].bucket is None
+
+
+@pytest.mark.parametrize("unique", [True, False])
+def test_load_payloads(unique):
+    args = argparse.Namespace(
+        country="US", query="iPhone", deadline_ms=800, unique_queries=unique
+    )
+    payloads = list(itertools.islice(make_payloads(args), 3))
+    assert all(p["deadline_ms"] == 800 and p["country"] == "US" for p in payloads)
+    assert len({p["query"] for p in payloads}) == (3 if unique else 1)
@@ -0,0 +1,141 @@
+import asyncio
+from typing import Dict, List
+
+from scrapers.scraper_manager import ScraperManager
+from utils.ai_validator import AIValidator
+from utils.product import Product
+
+
+def item(n: int, name: str = "Apple iPhone 16 Pro 128GB") -> Product:
+    return Product(f"https://www.ebay.com/itm/{n}", "999.00", "USD", name, "eBay")
+
+
+class FakePages:
+    """Stands in for ScraperManager._search with canned results per page"""
+
+    def __init__(self, pages: Dict[int, List[Product]], delay: float = 0.0):
+        self.pages = pages
+        self.delay = delay
+        self.fetched: List[int] = []
+
+    async def __call__(self, website, query, country, page=1, slot=None):
+        self.fetched.append(page)
+        await asyncio.sleep(self.delay)
+        return [product.copy() for product in self.pages.get(page, [])]
+
+
+def search_pages(pages: FakePages, page_concurrency: int = 1, **kwargs):
+    manager = ScraperManager(page_concurrency=page_concurrency)
+    manager._search = pages
+    return asyncio.run(manager.search_pages("ebay", "iPhone 16 Pro", "US", **kwargs))
+
+
+def links(products: List[Product]) -> List[str]:
+    return [product.link for product in products]
+
+
+def test_single_page_by_default():
+    pages = FakePages({1: [item(1)], 2: [item(2)]})
+    assert links(search_pages(pages)) == links([item(1)])
+    assert pages.fetched == [1]
+
+
+def test_pages_are_merged_in_order_without_duplicates():
+    pages = FakePages(
+        {1: [item(1), item(2)], 2: [item(2), item(3)], 3: [item(3), item(4)]}
+    )
+    products = search_pages(pages, page_concurrency=2, max_pages=3)
+    assert links(products) == links([item(1), item(2), item(3), item(4)])
+    assert sorted(pages.fetched) == [1, 2, 3]
+
+
+def test_a_page_with_nothing_new_stops_deeper_pages():
+    pages = FakePages(
+        {1: [item(1)], 2: [item(1)], 3: [item(3)], 4: [item(4)]}, delay=0.01
+    )
+    products = search_pages(pages, max_pages=4)
+    assert links(products) == links([item(1)])
+    # One page in flight at a time, so nothing past the empty page starts
+    assert pages.fetched == [1, 2]
+
+
+def test_paging_stops_at_max_results():
+    pages = FakePages(
+        {n: [item(2 * n), item(2 * n + 1)] for n in range(1, 6)}, delay=0.01
+    )
+    products = search_pages(pages, max_pages=5, max_results=4)
+    assert len(products) == 4
+    assert pages.fetched == [1, 2]
+
+
+def test_max_results_counts_only_relevant_products():
+    pages = FakePages(
+        {
+            1: [item(1), item(2, "Dyson V15 Detect vacuum")],
+            2: [item(3, "Samsung Galaxy S24")],
+            3: [item(4)],
+        }
+    )
+    products = search_pages(pages, max_pages=3, max_results=2, validator=AIValidator())
+    assert len(products) == 4
+    assert pages.fetched == [1, 2, 3]
+
+
+def test_empty_first_page_is_not_paged():
+    pages = FakePages({2: [item(2)]})
+    assert search_pages(pages, max_pages=3) == []
+    assert pages.fetched == [1]
+
+
+def test_paging_stops_at_the_timeout():
+    pages = FakePages({n: [item(n)] for n in range(1, 5)}, delay=0.1)
+    products = search_pages(pages, max_pages=4, timeout=0.25)
+    assert links(products) == links([item(1), item(2)])
+
+
+def test_page_limit_holds_after_callers_stop_waiting():
+    manager = ScraperManager(page_concurrency=1)
+    ebay = manager.scrapers["ebay"]
+    running = {"now": 0, "peak": 0}
+
+    async def search_products(query, country, page=1):
+        if page > 1:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(0.1)
+            running["now"] -= 1
+        return [item(100 * page + len(query))]
+
+    ebay.search_products = search_products
+
+    async def run():
+        # Each request gives up on its deeper pages long before they finish,
+        # and the next one arrives while those fetches are still running
+        for n in range(4):
+            await manager.search_pages("ebay", f"iPhone {n}", "US", 3, timeout=0.05)
+        while manager.single_flight:
+            await asyncio.sleep(0.02)
+
+    asyncio.run(run())
+    assert running["peak"] == 1
+
+
+def test_site_without_pagination_fetches_one_page():
+    manager = ScraperManager()
+    walmart = manager.scrapers["walmart"]
+    assert walmart.get_page_url("tv", "US", 2) == ""
+    assert manager.scrapers["ebay"].get_page_url("tv", "US", 3).endswith("&_pgn=3")
+    assert "&page=2&ref=sr_pg_2" in manager.scrapers["amazon"].get_page_url(
+        "tv", "US", 2
+    )
+
+
+def test_search_with_max_pages(client, retailer):
+    # The mock answers every page with the same listings, so page 2 adds
+    # nothing and page 3 is never needed
+    response = client.post(
+        "/search", json={"country": "US", "query": "iPhone 16 Pro", "max_pages": 3}
+    )
+    assert response.status_code == 200
+    ebay = [p["link"] for p in response.json() if p["website"] == "eBay"]
+    assert ebay and len(ebay) == len(set(ebay))
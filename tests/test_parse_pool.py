@@ -0,0 +1,41 @@
+import asyncio
+
+from scrapers.parse_pool import ParsePool
+from scrapers.structured_data import extraction_stats
+from scrapers.walmart_scraper import WalmartScraper
+
+
+def page_args(page):
+    return page["html"], page["query"], page["country"]
+
+
+def test_inline_pool_parses_like_the_scraper(pages):
+    page = pages["walmart"]
+    expected = WalmartScraper().extract_products(*page_args(page))
+    pool = ParsePool(workers=0)
+
+    products = asyncio.run(pool.parse(WalmartScraper, *page_args(page)))
+    assert not pool.started
+    assert [p.to_dict() for p in products] == [p.to_dict() for p in expected]
+
+
+def test_worker_processes_return_products_and_their_stats(pages):
+    page = pages["walmart"]
+    expected = WalmartScraper().extract_products(*page_args(page))
+    extraction_stats.drain()
+    before = extraction_stats.stats().get("walmart", {}).get("structured", {})
+    pool = ParsePool(workers=1, start_method="spawn")
+
+    async def scenario():
+        await pool.start()
+        try:
+            assert pool.started
+            return await pool.parse(WalmartScraper, *page_args(page))
+        finally:
+            pool.close()
+
+    products = asyncio.run(scenario())
+    assert [p.to_dict() for p in products] == [p.to_dict() for p in expected]
+    # The worker's extraction stats were shipped back and merged here
+    after = extraction_stats.stats()["walmart"]["structured"]
+    assert after["attempts"] == before.get("attempts", 0) + 1
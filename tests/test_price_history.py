@@ -0,0 +1,199 @@
+import asyncio
+import itertools
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import main
+import utils.price_history as price_history_module
+from utils.price_history import PriceHistoryStore
+from utils.product import Product
+from utils.product_identity import identity_key
+
+LINK = "https://www.bestbuy.com/site/apple-iphone-16-pro/6443303.p?skuId=6443303"
+
+
+def bestbuy_listing(price: str) -> Product:
+    return Product(LINK, price, "USD", "Apple iPhone 16 Pro 128GB", "Best Buy")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = PriceHistoryStore(db_path=str(tmp_path / "prices.sqlite3"), enabled=True)
+    monkeypatch.setattr(main, "price_history", store)
+    return store
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Observations recorded 1000s apart"""
+    ticks = itertools.count(1000, 1000)
+    monkeypatch.setattr(
+        price_history_module, "time", SimpleNamespace(time=lambda: next(ticks))
+    )
+
+
+def price_history(**params):
+    return main.get_price_history(country="US", days=30, limit=500, **params)
+
+
+@pytest.mark.parametrize("site", ["Best Buy", "bestbuy", "BestBuy"])
+def test_site_spellings_find_the_same_history(store, site):
+    async def scenario():
+        await store.start()
+        try:
+            store.record([bestbuy_listing("999.99")], "US")
+            await store.flush()
+            by_id = await price_history(site=site, product_id="6443303")
+            by_link = await price_history(site=site, link=LINK)
+        finally:
+            await store.close()
+        return by_id, by_link
+
+    by_id, by_link = asyncio.run(scenario())
+    assert by_id == by_link
+    assert (by_id["site"], by_id["product_id"]) == ("bestbuy", "6443303")
+    assert by_id["window"]["count"] == 1
+    assert by_id["latest"]["price"] == 999.99
+
+
+def test_unknown_product_is_404(store):
+    async def scenario():
+        await store.start()
+        try:
+            store.record([bestbuy_listing("999.99")], "US")
+            await store.flush()
+            await price_history(site="Best Buy", product_id="1234567")
+        finally:
+            await store.close()
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario())
+    assert error.value.status_code == 404
+
+
+def test_unwritable_path_disables_history(tmp_path):
+    store = PriceHistoryStore(
+        db_path=str(tmp_path / "missing" / "prices.sqlite3"), enabled=True
+    )
+
+    async def scenario():
+        await store.start()
+        store.record([bestbuy_listing("999.99")], "US")
+        await store.flush()
+        return await store.history("bestbuy", "6443303", "US")
+
+    assert asyncio.run(scenario()) is None
+    assert store.stats()["db_path"] is None
+
+
+def test_price_drop_is_detected_against_the_last_different_price(store, clock):
+
+    async def scenario():
+        await store.start()
+        try:
+            for price in ("1,099.00", "1099.00", "999.00"):
+                store.record([bestbuy_listing(price)], "us")
+            store.record([bestbuy_listing("Price unavailable")], "US")
+            await store.flush()
+            return await store.history("bestbuy", "6443303", "US")
+        finally:
+            await store.close()
+
+    history = asyncio.run(scenario())
+    assert [point["price"] for point in history["points"]] == [999.0, 1099.0, 1099.0]
+    assert history["window"] == {
+        "from_ts": 1000,
+        "to_ts": 3000,
+        "count": 3,
+        "min": 999.0,
+        "max": 1099.0,
+        "avg": 1065.67,
+    }
+    assert history["price_drop"] is True
+    assert history["drop"] == {
+        "from_price": 1099.0,
+        "to_price": 999.0,
+        "pct": 9.1,
+        "since_ts": 2000,
+    }
+    assert history["name"] == "Apple iPhone 16 Pro 128GB"
+
+
+def test_backlog_sheds_the_oldest_observations(tmp_path, clock):
+    store = PriceHistoryStore(
+        db_path=str(tmp_path / "prices.sqlite3"), enabled=True, max_pending=2
+    )
+
+    async def scenario():
+        await store.start()
+        try:
+            for price in ("1.00", "2.00", "3.00"):
+                store.record([bestbuy_listing(price)], "US")
+            assert store.stats()["pending"] == 2
+            await store.flush()
+            return await store.history("bestbuy", "6443303", "US")
+        finally:
+            await store.close()
+
+    history = asyncio.run(scenario())
+    assert history["window"]["count"] == 2
+    assert store.counters == {
+        "recorded": 3,
+        "written": 2,
+        "duplicates": 0,
+        "dropped": 1,
+        "batches": 1,
+    }
+
+
+def test_backlog_sheds_the_least_recently_seen_products(tmp_path, clock):
+    store = PriceHistoryStore(
+        db_path=str(tmp_path / "prices.sqlite3"), enabled=True, max_pending=2
+    )
+    listings = [
+        Product(f"https://www.ebay.com/itm/{n}", "10.00", "USD", f"Item {n}", "eBay")
+        for n in range(3)
+    ]
+
+    async def scenario():
+        await store.start()
+        try:
+            for listing in listings:
+                store.record([listing], "US")
+            return list(store._pending_products)
+        finally:
+            await store.close()
+
+    assert asyncio.run(scenario()) == [
+        (site, "US", product_id) for site, product_id in map(identity_key, listings[1:])
+    ]
+
+
+def test_observations_within_one_second_are_all_kept(store, monkeypatch):
+    ticks = iter([1000.25, 1000.5, 1000.5])
+    monkeypatch.setattr(
+        price_history_module, "time", SimpleNamespace(time=lambda: next(ticks))
+    )
+
+    async def scenario():
+        await store.start()
+        try:
+            for price in ("1,099.00", "999.00", "999.00"):
+                # The same listing twice in one scrape is one observation
+                store.record([bestbuy_listing(price)] * 2, "US")
+            await store.flush()
+            return await store.history("bestbuy", "6443303", "US")
+        finally:
+            await store.close()
+
+    history = asyncio.run(scenario())
+    assert history["points"] == [
+        {"ts": 1000.5, "price": 999.0},
+        {"ts": 1000.25, "price": 1099.0},
+    ]
+    # The third clock reading repeats the second, so its row is a duplicate
+    assert store.counters["recorded"] == 3
+    assert store.counters["written"] == 2
+    assert store.counters["duplicates"] == 1
@@ -0,0 +1,99 @@
+import asyncio
+import math
+import pickle
+from decimal import Decimal
+
+import pytest
+
+from utils.ai_validator import AIValidator
+from utils.product import Product, price_to_minor
+
+
+def iphone(**overrides) -> Product:
+    fields = dict(
+        link="https://www.bestbuy.com/site/6443303.p?skuId=6443303",
+        price="1,099.99",
+        currency="USD",
+        productName="Apple iPhone 16 Pro 128GB",
+        website="Best Buy",
+    )
+    fields.update(overrides)
+    return Product(**fields)
+
+
+@pytest.mark.parametrize(
+    "price, minor",
+    [
+        ("1299.5", 129950),
+        ("1,299.995", 130000),
+        ("0.005", 1),
+        ("0.004", 0),
+        ("2.675", 268),  # a float would round this down
+        (" 49 ", 4900),
+        (19.99, 1999),
+        (Decimal("10.125"), 1013),
+        (250, 25000),
+        ("", 0),
+        (None, 0),
+        ("Price unavailable", 0),
+        ("inf", 0),
+        (math.nan, 0),
+    ],
+)
+def test_price_to_minor_rounds_half_up(price, minor):
+    assert price_to_minor(price) == minor
+
+
+def test_price_is_parsed_once_and_text_kept():
+    product = iphone()
+    assert product.price == "1,099.99"
+    assert product.price_minor == 109999
+    assert iphone(price=799).price == "799"
+
+
+def test_to_dict_round_trips():
+    product = iphone(rating=4.5, details={"title": "iPhone"})
+    data = product.to_dict()
+    assert "price_minor" not in data
+    assert data["productName"] == "Apple iPhone 16 Pro 128GB"
+    assert Product.from_dict(data) == product
+
+
+def test_from_dict_fills_defaults():
+    product = Product.from_dict({"link": "https://x", "price": None})
+    assert (product.price, product.price_minor) == ("0", 0)
+    assert product.availability == "In Stock"
+    assert product.rating is None and product.details is None
+
+
+def test_copy_is_shallow_and_independent():
+    product = iphone(details={"title": "iPhone"})
+    clone = product.copy()
+    assert clone == product and clone is not product
+    clone.details = {"title": "changed"}
+    clone.price_minor = 1
+    assert product.details == {"title": "iPhone"}
+    assert product.price_minor == 109999
+
+
+def test_pickling_keeps_every_field_and_reinterns_strings():
+    product = iphone(rating=4.8, image_url="https://img")
+    restored = pickle.loads(pickle.dumps(product))
+    assert restored == product
+    assert restored.website is iphone().website
+    assert restored.currency is iphone().currency
+
+
+def test_products_are_not_hashable():
+    with pytest.raises(TypeError):
+        {iphone()}
+    assert iphone() != iphone(price="1")
+    assert iphone().__eq__("not a product") is NotImplemented
+
+
+def test_equally_relevant_products_rank_by_numeric_price():
+    products = [iphone(price="1,099.00"), iphone(price="999.00"), iphone(price="99")]
+    ranked = asyncio.run(
+        AIValidator().validate_and_rank(products, "Apple iPhone 16 Pro 128GB")
+    )
+    assert [product.price for product in ranked] == ["99", "999.00", "1,099.00"]
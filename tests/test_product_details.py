@@ -0,0 +1,90 @@
+import pytest
+
+import main
+from scrapers.amazon import AmazonScraper
+from utils.search_cache import LRUCache
+
+DETAIL_PAGE = b"""<html><body>
+<div id="dp">
+  <span id="productTitle"> Apple iPhone 16 Pro, 128GB </span>
+  <div id="corePrice_feature_div">
+    <span class="a-price"><span class="a-offscreen">$1,099.00</span></span>
+  </div>
+  <div id="feature-bullets"><ul>
+    <li>6.3-inch display</li><li>A18 Pro chip</li>
+  </ul></div>
+</div>
+</body></html>"""
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://www.amazon.com/dp/B0DGJ3THPR",
+        "https://amazon.in/Apple-iPhone/dp/B0DGJ3THPR/ref=sr_1_1",
+        "https://www.amazon.co.uk/gp/product/B0DGJ3THPR",
+    ],
+)
+def test_amazon_product_links_are_accepted(url):
+    assert AmazonScraper().is_product_url(url)
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://www.amazon.com/s?k=iphone",
+        "http://www.amazon.com/dp/B0DGJ3THPR",
+        "https://www.amazon.com:8443/dp/B0DGJ3THPR",
+        "https://evil.example/dp/B0DGJ3THPR",
+        "https://www.amazon.com.evil.example/dp/B0DGJ3THPR",
+        "https://www.amazon.com@169.254.169.254/dp/B0DGJ3THPR",
+        "http://169.254.169.254/latest/meta-data/dp/B0DGJ3THPR",
+        "file:///etc/passwd/dp/B0DGJ3THPR",
+    ],
+)
+def test_other_links_are_refused(url):
+    assert not AmazonScraper().is_product_url(url)
+
+
+def test_override_base_url_is_accepted(monkeypatch):
+    scraper = AmazonScraper()
+    monkeypatch.setattr(
+        scraper, "base_url_overrides", {"amazon": "http://127.0.0.1:9000/amazon"}
+    )
+    assert scraper.is_product_url("http://127.0.0.1:9000/amazon/dp/B0DGJ3THPR")
+    assert not scraper.is_product_url("http://127.0.0.1:9000/other/dp/B0DGJ3THPR")
+    assert not scraper.is_product_url("http://127.0.0.1:9001/amazon/dp/B0DGJ3THPR")
+
+
+def test_parse_product_details():
+    details = AmazonScraper().parse_product_details(DETAIL_PAGE)
+    assert details["title"] == "Apple iPhone 16 Pro, 128GB"
+    assert details["price"] == "1099.0"
+    assert details["features"] == ["6.3-inch display", "A18 Pro chip"]
+
+
+def test_details_endpoint_refuses_non_amazon_links(client, retailer):
+    response = client.post(
+        "/products/details",
+        json={"links": ["http://169.254.169.254/dp/B0DGJ3THPR"]},
+    )
+    assert response.status_code == 400
+    assert "169.254.169.254" in response.json()["detail"]
+    assert retailer.responses("amazon") == 0
+
+
+def test_details_are_fetched_once_per_asin(client, retailer, monkeypatch):
+    amazon = main.scraper_manager.scrapers["amazon"]
+    monkeypatch.setattr(amazon, "details_cache", LRUCache(16))
+    retailer.profiles["amazon"].html = DETAIL_PAGE
+    link = retailer.url("amazon") + "/dp/B0DGJ3THPR"
+
+    # The second link is another URL for the same ASIN: served from cache
+    for url in (link, link + "?th=1"):
+        response = client.post("/products/details", json={"links": [url]})
+        assert response.status_code == 200
+        [entry] = response.json()
+        assert entry["asin"] == "B0DGJ3THPR"
+        assert entry["details"]["title"] == "Apple iPhone 16 Pro, 128GB"
+
+    assert retailer.responses("amazon") == 1
@@ -0,0 +1,106 @@
+import itertools
+
+from utils.product import Product
+from utils.product_grouping import ProductGrouper, Signature
+
+LISTING_IDS = itertools.count(1)
+
+
+def offer(name: str, website: str, price: str, currency: str = "USD") -> Product:
+    link = f"https://{website.lower().replace(' ', '')}.example/{next(LISTING_IDS)}"
+    return Product(link, price, currency, name, website)
+
+
+def titles(groups):
+    return [[product.productName for product in group.offers] for group in groups]
+
+
+def test_signature_reads_brand_model_storage_and_color():
+    signature = Signature("Apple iPhone 16 Pro 256 GB 5G, Desert Titanium (A3083)")
+    assert signature.brand == "apple"
+    assert signature.models == {"16", "a3083"}
+    assert signature.variants == {"pro"}
+    assert signature.storage == {"256gb"}
+    assert signature.colors == {"desert"}
+
+
+def test_same_model_and_storage_is_grouped_across_sites():
+    products = [
+        offer("Apple iPhone 16 Pro 128GB Black Titanium", "Amazon", "999.00"),
+        offer("iPhone 16 Pro 128 GB - Black Titanium (Unlocked)", "eBay", "949.99"),
+        offer("Apple - iPhone 16 Pro 128GB - Black Titanium", "Best Buy", "0"),
+        offer("Apple iPhone 16 Pro 128GB", "Walmart", "979.00"),
+    ]
+    [group] = ProductGrouper().group(products)
+
+    assert len(group.offers) == 4
+    data = group.to_dict()
+    assert data["title"] == "Apple iPhone 16 Pro 128GB Black Titanium"
+    assert (data["brand"], data["model"], data["storage"], data["color"]) == (
+        "apple",
+        "16 pro",
+        "128gb",
+        "black",
+    )
+    # Unpriced offers never win, and offers are listed cheapest first
+    assert data["best_price"] == "949.99"
+    assert data["websites"] == ["Amazon", "Best Buy", "Walmart", "eBay"]
+    assert [o["price"] for o in data["offers"]] == ["0", "949.99", "979.00", "999.00"]
+
+
+def test_different_storage_color_variant_or_model_stay_apart():
+    products = [
+        offer("Apple iPhone 16 Pro 128GB Black Titanium", "Amazon", "999"),
+        offer("Apple iPhone 16 Pro 256GB Black Titanium", "Amazon", "1099"),
+        offer("Apple iPhone 16 Pro 128GB White Titanium", "eBay", "989"),
+        offer("Apple iPhone 16 Pro Max 128GB Black Titanium", "eBay", "1199"),
+        offer("Apple iPhone 15 Pro 128GB Black Titanium", "Walmart", "799"),
+        offer("Samsung Galaxy S24 128GB Black", "Best Buy", "799"),
+    ]
+    assert len(ProductGrouper().group(products)) == 6
+
+
+def test_different_currencies_stay_apart():
+    products = [
+        offer("Apple iPhone 16 Pro 128GB", "Amazon", "999", "USD"),
+        offer("Apple iPhone 16 Pro 128GB", "Amazon", "119900", "INR"),
+    ]
+    assert len(ProductGrouper().group(products)) == 2
+
+
+def test_groups_keep_rank_order_and_join_the_closest_match():
+    products = [
+        offer("Sony WH-1000XM5 Wireless Headphones Black", "Amazon", "329"),
+        offer("Apple iPhone 16 Pro 128GB", "Amazon", "999"),
+        offer("Sony WH-1000XM5 Noise Canceling Wireless Headphones", "eBay", "299"),
+        offer("Apple iPhone 16 Pro 128 GB Smartphone", "Walmart", "989"),
+    ]
+    assert titles(ProductGrouper().group(products)) == [
+        [
+            "Sony WH-1000XM5 Wireless Headphones Black",
+            "Sony WH-1000XM5 Noise Canceling Wireless Headphones",
+        ],
+        ["Apple iPhone 16 Pro 128GB", "Apple iPhone 16 Pro 128 GB Smartphone"],
+    ]
+
+
+def test_dissimilar_titles_need_the_similarity_threshold():
+    products = [
+        offer("Apple iPhone 16 Pro 128GB", "Amazon", "999"),
+        offer("Apple iPhone 16 Pro 128GB", "eBay", "989"),
+    ]
+    assert len(ProductGrouper(min_similarity=1.01).group(products)) == 2
+    assert ProductGrouper().group([]) == []
+
+
+def test_grouped_search_endpoint(client):
+    response = client.post(
+        "/search/grouped", json={"country": "US", "query": "iPhone 16 Pro"}
+    )
+    assert response.status_code == 200
+    groups = response.json()
+    assert groups
+    for group in groups:
+        assert group["offers"] and group["best_offer"] in group["offers"]
+        assert group["websites"] == sorted({o["website"] for o in group["offers"]})
+    assert any(len(group["websites"]) > 1 for group in groups)
@@ -0,0 +1,86 @@
+import pytest
+
+from utils.product import Product
+from utils.product_identity import (
+    dedupe,
+    extract_asin,
+    identity_key,
+    listing_id,
+    listing_key,
+    site_key,
+)
+
+
+def listing(link: str, website: str, name: str = "Apple iPhone 16 Pro") -> Product:
+    return Product(link, "999.00", "USD", name, website)
+
+
+@pytest.mark.parametrize(
+    "website, link, expected",
+    [
+        (
+            "Amazon",
+            "https://www.amazon.com/Apple-iPhone/dp/B0DGJ3THPR/ref=sr_1_1",
+            "B0DGJ3THPR",
+        ),
+        (
+            "Amazon",
+            "https://www.amazon.in/sspa/click?url=%2Fdp%2FB0DGJ3THPR%2F",
+            "B0DGJ3THPR",
+        ),
+        (
+            "eBay",
+            "https://www.ebay.com/itm/Apple-iPhone/296123456789?hash=x",
+            "296123456789",
+        ),
+        (
+            "Walmart",
+            "https://www.walmart.com/ip/Apple-iPhone-16-Pro/5689919100",
+            "5689919100",
+        ),
+        (
+            "Best Buy",
+            "https://www.bestbuy.com/site/iphone/6443303.p?skuId=6443303",
+            "6443303",
+        ),
+        ("Best Buy", "https://www.bestbuy.com/site/iphone/6443303.p", "6443303"),
+        (
+            "Flipkart",
+            "https://www.flipkart.com/apple-iphone/p/itm1?pid=MOBGTAGP",
+            "MOBGTAGP",
+        ),
+        ("Amazon", "https://www.amazon.com/s?k=iphone", None),
+    ],
+)
+def test_listing_id(website, link, expected):
+    assert listing_id(website, link) == expected
+
+
+def test_site_key_normalizes_display_names():
+    assert site_key("Best Buy") == site_key("bestbuy") == "bestbuy"
+    assert site_key(None) == ""
+
+
+def test_listing_key_falls_back_to_link_then_name():
+    assert listing_key("eBay", "https://www.ebay.com/itm/123?utm=1") == (
+        "ebay",
+        "www.ebay.com/itm/123",
+    )
+    assert listing_key("eBay", "", "  Apple iPhone ") == ("ebay", "apple iphone")
+
+
+def test_dedupe_keeps_first_listing_per_item():
+    first = listing("https://www.amazon.com/dp/B0DGJ3THPR?tag=a", "Amazon")
+    again = listing("https://www.amazon.com/Apple/dp/B0DGJ3THPR/ref=x", "Amazon")
+    other = listing("https://www.amazon.com/dp/B0DGHYDZR9", "Amazon")
+    seen = set()
+
+    assert dedupe([first, again, other], seen) == [first, other]
+    assert identity_key(first) in seen
+    assert dedupe([again], seen) == []
+
+
+def test_extract_asin_ignores_non_product_links():
+    assert extract_asin("https://www.amazon.com/gp/product/B0DGJ3THPR") == "B0DGJ3THPR"
+    assert extract_asin("https://www.amazon.com/b?node=123") is None
+    assert extract_asin("") is None
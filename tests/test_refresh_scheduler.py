@@ -0,0 +1,159 @@
+import asyncio
+import time
+
+from scrapers.circuit_breaker import CircuitOpenError
+from scrapers.refresh_scheduler import RefreshScheduler, WatchEntry
+from utils.product import Product
+from utils.search_cache import SearchCache
+
+
+class FakeManager:
+    """Records refreshes; ``prices`` sets what each site returns"""
+
+    def __init__(self, prices=None, failing=()):
+        self.prices = prices or {}
+        self.failing = failing
+        self.calls = []
+
+    async def refresh(self, website, query, country):
+        self.calls.append((website, query, country))
+        if website in self.failing:
+            raise CircuitOpenError(website, 60)
+        price = self.prices.get(website, "10.00")
+        link = f"https://www.{website}.com/item/1"
+        return [Product(link, price, "USD", query, website)]
+
+
+def scheduler(manager=None, **overrides) -> RefreshScheduler:
+    params = dict(
+        enabled=True,
+        watchlist_path=None,
+        min_hits=3,
+        base_interval=600,
+        min_interval=120,
+        max_interval=3600,
+        jitter=0,
+        site_concurrencies={},
+    )
+    params.update(overrides)
+    return RefreshScheduler(manager or FakeManager(), **params)
+
+
+def test_repeated_searches_join_the_watchlist():
+    refresher = scheduler()
+    for query in ("iPhone 16", "  iphone 16 ", "IPHONE   16"):
+        assert not refresher.entries
+        refresher.observe("us", query)
+
+    assert list(refresher.entries) == [("US", "iphone 16")]
+    entry = refresher.entries[("US", "iphone 16")]
+    assert not entry.pinned and entry.popularity >= 2.99
+    assert 0 <= entry.next_due - time.time() <= 120
+
+
+def test_watch_unwatch_and_pinning():
+    refresher = scheduler()
+    entry = refresher.watch("US", "Pixel 9")
+    assert refresher.watch("us", "pixel 9", pinned=True) is entry
+    assert entry.pinned
+    assert refresher.watch("US", "   ") is None
+
+    assert refresher.unwatch("US", "PIXEL 9")
+    assert not refresher.unwatch("US", "pixel 9")
+    assert scheduler(enabled=False).watch("US", "Pixel 9") is None
+
+
+def test_full_watchlist_evicts_the_coldest_unpinned_query():
+    refresher = scheduler(max_entries=2)
+    refresher.watch("US", "pinned", pinned=True)
+    cold = refresher.watch("US", "cold")
+    cold.popularity = 1
+    hot = refresher.watch("US", "hot")
+    assert hot is not None
+    assert set(refresher.entries) == {("US", "pinned"), ("US", "hot")}
+    assert refresher.counters["evicted"] == 1
+
+    refresher.entries[("US", "hot")].pinned = True
+    assert refresher.watch("US", "another") is None
+
+
+def test_popular_and_volatile_queries_refresh_sooner():
+    refresher = scheduler()
+    now = time.time()
+    quiet = WatchEntry("US", "quiet", False, now)
+    busy = WatchEntry("US", "busy", False, now)
+    busy.popularity, busy.volatility = 20, 0.5
+
+    assert refresher.interval_for(quiet, now) == 600
+    assert refresher.interval_for(busy, now) == 120  # clamped to min_interval
+
+
+def test_interval_stays_under_the_cache_ttl():
+    cache = SearchCache(db_path="", default_ttl=900, site_ttls={"walmart": 300})
+    refresher = scheduler(cache=cache, base_interval=3000)
+    entry = WatchEntry("US", "tv", False, time.time())
+    assert refresher.interval_for(entry, time.time()) == 270
+
+
+def test_volatility_tracks_the_share_of_changed_prices():
+    entry = WatchEntry("US", "tv", False, time.time())
+    RefreshScheduler._update_volatility(entry, {("a", "1"): 100, ("a", "2"): 200})
+    assert entry.volatility == 0
+    RefreshScheduler._update_volatility(entry, {("a", "1"): 100, ("a", "2"): 150})
+    assert entry.volatility == 0.15
+    RefreshScheduler._update_volatility(entry, {})
+    assert entry.prices == {("a", "1"): 100, ("a", "2"): 150}
+
+
+def test_watchlist_file(tmp_path):
+    path = tmp_path / "watchlist.txt"
+    path.write_text("# country,query\nUS, iPhone 16\n\nIN,Pixel 9\nbad line\n")
+    assert RefreshScheduler._read_watchlist(str(path)) == [
+        ("US", "iPhone 16"),
+        ("IN", "Pixel 9"),
+    ]
+    assert RefreshScheduler._read_watchlist(str(tmp_path / "missing")) == []
+
+
+def test_due_queries_are_refreshed_on_every_site(tmp_path):
+    path = tmp_path / "watchlist.txt"
+    path.write_text("US,iPhone 16\n")
+    manager = FakeManager(failing=("walmart",))
+    refresher = scheduler(manager, watchlist_path=str(path), min_interval=0)
+
+    async def scenario():
+        await refresher.start()
+        try:
+            for _ in range(100):
+                if refresher.counters["refreshes"]:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await refresher.close()
+
+    asyncio.run(scenario())
+    assert sorted(call[0] for call in manager.calls) == [
+        "amazon",
+        "bestbuy",
+        "ebay",
+        "walmart",
+    ]
+    assert refresher.counters["site_refreshes"] == 3
+    assert refresher.counters["site_skipped"] == 1
+    [watched] = refresher.watchlist()
+    assert watched["pinned"] and watched["refreshes"] == 1
+    assert watched["interval_s"] == 600
+
+
+def test_watchlist_endpoints(client):
+    query = {"country": "US", "query": "Galaxy Watch 7"}
+    added = client.post("/admin/watchlist", json=query)
+    assert added.status_code == 200 and added.json()["pinned"]
+    watched = client.get("/admin/watchlist").json()
+    assert ("US", "galaxy watch 7") in {(w["country"], w["query"]) for w in watched}
+
+    assert client.request("DELETE", "/admin/watchlist", json=query).json() == {
+        "removed": True
+    }
+    missing = client.request("DELETE", "/admin/watchlist", json=query)
+    assert missing.status_code == 404
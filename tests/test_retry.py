@@ -0,0 +1,110 @@
+import asyncio
+import random
+
+import aiohttp
+
+from scrapers.http_pool import http_pool
+from scrapers.retry import Hedger, RetryPolicy
+from scrapers.walmart_scraper import WalmartScraper
+
+
+def fetch(scraper, url: str) -> bytes:
+    async def scenario():
+        try:
+            return await scraper.fetch_bytes(url)
+        finally:
+            await http_pool.close()
+
+    return asyncio.run(scenario())
+
+
+class RecoveringPolicy(RetryPolicy):
+    """Clears the site's injected errors before the first retry"""
+
+    def __init__(self, profile, **kwargs):
+        super().__init__(**kwargs)
+        self.profile = profile
+
+    def backoff(self, attempt: int) -> float:
+        self.profile.error_rate = 0.0
+        return super().backoff(attempt)
+
+
+def test_backoff_is_full_jitter_under_a_capped_ceiling():
+    random.seed(0)
+    policy = RetryPolicy(base_delay_ms=100, max_delay_ms=300)
+    for attempt, ceiling in [(0, 0.1), (1, 0.2), (2, 0.3), (6, 0.3)]:
+        delays = [policy.backoff(attempt) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert max(delays) > ceiling * 0.8
+
+
+def test_only_transient_failures_are_retried():
+    policy = RetryPolicy(statuses=frozenset({429, 503}))
+    assert policy.should_retry_status(503)
+    assert not policy.should_retry_status(404)
+    assert policy.should_retry_error(asyncio.TimeoutError())
+    assert policy.should_retry_error(aiohttp.ServerDisconnectedError())
+    assert not policy.should_retry_error(ValueError("bad url"))
+
+
+def test_server_errors_are_retried_until_attempts_run_out(retailer):
+    retailer.profiles["walmart"].error_rate = 1.0
+    scraper = WalmartScraper()
+    scraper.retry_policy = RetryPolicy(max_attempts=3, base_delay_ms=1)
+
+    assert fetch(scraper, retailer.url("walmart") + "/search") == b""
+    assert retailer.profiles["walmart"].responses == {500: 3}
+    assert scraper.retry_policy.counters == {"retries": 2, "gave_up": 1}
+
+
+def test_a_retry_that_succeeds_returns_the_page(retailer, pages):
+    profile = retailer.profiles["walmart"]
+    profile.error_rate = 1.0
+    scraper = WalmartScraper()
+    scraper.retry_policy = RecoveringPolicy(profile, max_attempts=3, base_delay_ms=1)
+
+    body = fetch(scraper, retailer.url("walmart") + "/search")
+
+    assert body == pages["walmart"]["html"]
+    assert profile.responses == {500: 1, 200: 1}
+
+
+def test_total_budget_stops_retrying_early(retailer):
+    retailer.profiles["walmart"].error_rate = 1.0
+    scraper = WalmartScraper()
+    scraper.retry_policy = RetryPolicy(
+        max_attempts=10, base_delay_ms=400, max_delay_ms=400, total_ms=100
+    )
+    random.seed(1)
+
+    assert fetch(scraper, retailer.url("walmart") + "/search") == b""
+    assert sum(retailer.profiles["walmart"].responses.values()) < 10
+
+
+def test_hedger_waits_for_samples_and_spends_its_budget():
+    hedger = Hedger(enabled=True, budget=0.5, min_samples=3)
+    assert hedger.delay_for("a.com") is None
+    for seconds in (0.1, 0.2, 0.3):
+        hedger.observe("a.com", seconds)
+    assert hedger.delay_for("a.com") == 0.3
+
+    # Two requests have earned exactly one hedge
+    assert hedger.try_spend("a.com")
+    assert not hedger.try_spend("a.com")
+    assert hedger.counters["hedges"] == 1
+    assert hedger.counters["skipped_no_budget"] == 1
+    assert Hedger(enabled=False).delay_for("a.com") is None
+
+
+def test_a_hedge_races_a_slow_request(retailer, pages):
+    profile = retailer.profiles["walmart"]
+    scraper = WalmartScraper()
+    scraper.hedger = Hedger(enabled=True, budget=1.0, min_samples=1)
+    scraper.hedger.observe("127.0.0.1:%d" % retailer.port, 0.05)
+    profile.latency_ms = 300
+
+    body = fetch(scraper, retailer.url("walmart") + "/search")
+
+    assert body == pages["walmart"]["html"]
+    assert scraper.hedger.counters["hedges"] == 1
@@ -0,0 +1,160 @@
+import asyncio
+
+from utils.product import Product
+from utils.search_cache import LRUCache, CacheEntry, SearchCache
+
+
+def listing(name: str = "Apple iPhone 16 Pro 128GB") -> Product:
+    return Product(
+        "https://www.ebay.com/itm/296123456789", "999.00", "USD", name, "eBay"
+    )
+
+
+class Fetcher:
+    """Counts calls and returns a fresh result list each time"""
+
+    def __init__(self, name: str = "Apple iPhone 16 Pro 128GB"):
+        self.calls = 0
+        self.name = name
+
+    async def __call__(self):
+        self.calls += 1
+        return [listing(self.name)]
+
+
+def memory_cache(**kwargs) -> SearchCache:
+    return SearchCache(db_path="", site_ttls={}, enabled=True, **kwargs)
+
+
+def test_second_lookup_is_a_memory_hit_for_query_variants():
+    cache = memory_cache()
+    fetch = Fetcher()
+
+    async def scenario():
+        first = await cache.get_or_fetch("us", "ebay", "iPhone 16 Pro", fetch)
+        again = await cache.get_or_fetch("US", "eBay", "  iphone  16, PRO ", fetch)
+        return first, again
+
+    first, again = asyncio.run(scenario())
+    assert fetch.calls == 1
+    assert [p.to_dict() for p in again] == [p.to_dict() for p in first]
+    assert cache.counters["memory_hits"] == 1 and cache.counters["misses"] == 1
+
+
+def test_hits_are_copies():
+    cache = memory_cache()
+    fetch = Fetcher()
+
+    async def scenario():
+        first = await cache.get_or_fetch("US", "ebay", "iphone", fetch)
+        first[0].details = {"mutated": True}
+        return await cache.get_or_fetch("US", "ebay", "iphone", fetch)
+
+    assert asyncio.run(scenario())[0].details is None
+
+
+def test_empty_results_are_not_cached():
+    cache = memory_cache()
+    calls = []
+
+    async def empty():
+        calls.append(1)
+        return []
+
+    async def scenario():
+        await cache.get_or_fetch("US", "ebay", "iphone", empty)
+        await cache.get_or_fetch("US", "ebay", "iphone", empty)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_stale_entry_is_served_and_refreshed_in_background():
+    cache = memory_cache(default_ttl=0, stale_ttl=3600)
+    old, new = Fetcher("old title"), Fetcher("new title")
+
+    async def scenario():
+        await cache.get_or_fetch("US", "ebay", "iphone", old)
+        stale = await cache.get_or_fetch("US", "ebay", "iphone", new)
+        await asyncio.gather(*cache._refreshing.values())
+        return stale
+
+    stale = asyncio.run(scenario())
+    assert stale[0].productName == "old title"
+    assert new.calls == 1
+    assert cache.counters["stale_hits"] == 1 and cache.counters["refreshes"] == 1
+    key = cache.make_key("US", "ebay", "iphone")
+    assert cache.memory.get(key).value[0].productName == "new title"
+
+
+def test_failed_refresh_keeps_serving_the_stale_entry():
+    cache = memory_cache(default_ttl=0, stale_ttl=3600)
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        raise RuntimeError("site down")
+
+    async def empty():
+        calls.append(1)
+        return []
+
+    async def scenario():
+        await cache.get_or_fetch("US", "ebay", "iphone", Fetcher("old title"))
+        for fetcher in (failing, empty):
+            served = await cache.get_or_fetch("US", "ebay", "iphone", fetcher)
+            await asyncio.gather(*cache._refreshing.values())
+            assert served[0].productName == "old title"
+        return await cache.get_or_fetch("US", "ebay", "iphone", empty)
+
+    assert asyncio.run(scenario())[0].productName == "old title"
+    assert len(calls) == 3
+    assert cache.counters["refresh_errors"] == 1
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    fetch = Fetcher()
+
+    async def run_once():
+        cache = SearchCache(db_path=path, site_ttls={}, enabled=True)
+        await cache.start()
+        try:
+            products = await cache.get_or_fetch("US", "ebay", "iphone", fetch)
+            return products, cache.counters["disk_hits"]
+        finally:
+            await cache.close()
+
+    first, _ = asyncio.run(run_once())
+    second, disk_hits = asyncio.run(run_once())
+    assert fetch.calls == 1 and disk_hits == 1
+    assert [p.to_dict() for p in second] == [p.to_dict() for p in first]
+
+
+def test_unopenable_disk_tier_falls_back_to_memory(tmp_path):
+    cache = SearchCache(
+        db_path=str(tmp_path / "missing" / "cache.sqlite3"), site_ttls={}, enabled=True
+    )
+    fetch = Fetcher()
+
+    async def scenario():
+        await cache.start()
+        await cache.get_or_fetch("US", "ebay", "iphone", fetch)
+        await cache.get_or_fetch("US", "ebay", "iphone", fetch)
+        await cache.close()
+
+    asyncio.run(scenario())
+    assert cache.disk is None and cache.stats()["disk_path"] is None
+    assert fetch.calls == 1 and cache.counters["memory_hits"] == 1
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(max_entries=2)
+    for key in ("a", "b"):
+        lru.set(key, CacheEntry([key], 0, 60, 0))
+    lru.get("a")
+    lru.set("c", CacheEntry(["c"], 0, 60, 0))
+
+    assert lru.get("b") is None
+    assert lru.get("a") is not None and lru.get("c") is not None
+    assert lru.evictions == 1
@@ -0,0 +1,41 @@
+import time
+
+from scrapers.scraper_manager import ScraperManager
+
+
+def test_slow_site_is_reported_as_timed_out(client, retailer):
+    retailer.profiles["walmart"].latency_ms = 1500
+
+    start = time.perf_counter()
+    response = client.post(
+        "/search",
+        json={"country": "US", "query": "iPhone 16 Pro", "deadline_ms": 500},
+    )
+    elapsed = time.perf_counter() - start
+
+    assert response.status_code == 200
+    assert elapsed < 1.4
+    assert response.headers["X-Partial-Results"] == "true"
+    assert response.headers["X-Timed-Out-Sites"] == "walmart"
+    websites = {product["website"] for product in response.json()}
+    assert "Walmart" not in websites and "Amazon" in websites
+
+
+def test_complete_results_have_no_partial_headers(client):
+    response = client.post("/search", json={"country": "US", "query": "iPhone 16 Pro"})
+
+    assert response.status_code == 200
+    assert "X-Partial-Results" not in response.headers
+    assert {product["website"] for product in response.json()} == {
+        "Amazon",
+        "eBay",
+        "Best Buy",
+        "Walmart",
+    }
+
+
+def test_site_budget_is_capped_by_the_request_deadline():
+    manager = ScraperManager(default_budget_ms=12000, site_budgets_ms={"amazon": 8000})
+    assert manager.budget_for("ebay") == 12
+    assert manager.budget_for("amazon") == 8
+    assert manager.budget_for("amazon", deadline_ms=500) == 0.5
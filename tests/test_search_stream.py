@@ -0,0 +1,42 @@
+import json
+
+
+def frames(response):
+    return [json.loads(line) for line in response.iter_lines() if line]
+
+
+def test_stream_emits_one_frame_per_site_then_a_summary(client):
+    with client.stream(
+        "POST", "/search/stream", json={"country": "US", "query": "iPhone 16 Pro"}
+    ) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        sent = frames(response)
+
+    products, summary = sent[:-1], sent[-1]
+    assert {frame["type"] for frame in products} == {"products"}
+    websites = {frame["website"] for frame in products}
+    assert websites == {"amazon", "ebay", "bestbuy", "walmart"}
+    assert all(frame["products"] for frame in products)
+
+    assert summary["type"] == "summary"
+    assert set(summary["sites"]) == websites
+    assert summary["total_products"] == sum(len(f["products"]) for f in products)
+    assert summary["timed_out"] == []
+    assert all(site["status"] == "ok" for site in summary["sites"].values())
+
+
+def test_a_failing_site_does_not_hold_back_the_others(client, retailer):
+    retailer.profiles["walmart"].error_rate = 1.0
+
+    with client.stream(
+        "POST", "/search/stream", json={"country": "US", "query": "iPhone 16 Pro"}
+    ) as response:
+        sent = frames(response)
+
+    by_site = {frame["website"]: frame for frame in sent[:-1]}
+    assert by_site["walmart"]["products"] == []
+    assert all(by_site[site]["products"] for site in ("amazon", "ebay", "bestbuy"))
+    summary = sent[-1]["sites"]
+    assert summary["walmart"]["status"] == "empty"
+    assert summary["amazon"]["status"] == "ok"
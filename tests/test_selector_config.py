@@ -0,0 +1,139 @@
+import os
+
+import pytest
+
+from scrapers.html_parser import get_backend
+from scrapers.scraper_manager import ScraperManager
+from scrapers.selector_config import (
+    DEFAULT_PATH,
+    SelectorConfig,
+    SelectorConfigError,
+    SelectorStats,
+)
+
+CONFIG = """
+version: {version}
+sites:
+  shop:
+    default:
+      title: [h2 span, .title]
+      price: [.price]
+    in:
+      price: [.price-inr]
+"""
+
+
+def write(path, text: str, mtime_ns: int):
+    path.write_text(text)
+    # Distinct mtimes, however quickly the edits follow each other
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def config(tmp_path):
+    path = tmp_path / "selectors.yaml"
+    write(path, CONFIG.format(version=1), 1_000_000_000)
+    return SelectorConfig(str(path), check_interval=0)
+
+
+def test_bundled_file_covers_every_scraper():
+    config = SelectorConfig(DEFAULT_PATH)
+    config.load()
+    assert set(ScraperManager().scrapers) <= set(config.sites)
+    assert config.selectors_for("amazon")["title"][0] == "h2 a span"
+
+
+def test_country_sections_override_single_lists(config):
+    config.load()
+    assert config.selectors_for("shop", "in") == {
+        "title": ["h2 span", ".title"],
+        "price": [".price-inr"],
+    }
+    assert config.selectors_for("shop", "US")["price"] == [".price"]
+    with pytest.raises(SelectorConfigError):
+        config.selectors_for("elsewhere")
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("- just a list", "'sites' mapping"),
+        ("sites: {shop: {IN: {}}}", "shop: expected a 'default' mapping"),
+        ("sites: {shop: {default: [a]}}", "shop: expected a 'default' mapping"),
+        ("sites: {shop: {default: {title: h2}}}", "shop.default.title"),
+        ("sites: {shop: {default: {title: ['']}}}", "shop.default.title"),
+        ("sites: {shop: {default: {title: ['h2[']}}}", "bad selector 'h2['"),
+        ("sites: [unclosed", "Cannot read"),
+    ],
+)
+def test_invalid_files_are_rejected(tmp_path, text, message):
+    path = tmp_path / "selectors.yaml"
+    path.write_text(text)
+    with pytest.raises(SelectorConfigError, match=message.replace("[", r"\[")):
+        SelectorConfig(str(path)).load()
+
+
+def test_edits_are_picked_up_and_broken_ones_ignored(config, tmp_path):
+    backend = get_backend("bs4-html.parser")
+    first = config.table("shop", "US", backend)
+    assert config.table("shop", "us", backend) is first
+    assert config.version == 1
+
+    path = tmp_path / "selectors.yaml"
+    write(path, CONFIG.format(version=2).replace(".title", ".name"), 2_000_000_000)
+    second = config.table("shop", "US", backend)
+    assert second is not first
+    assert (config.version, config.reloads) == (2, 1)
+    assert config.selectors_for("shop")["title"] == ["h2 span", ".name"]
+
+    write(path, "sites: {shop: {default: {title: ['h2[']}}}", 3_000_000_000)
+    assert config.table("shop", "US", backend) is second
+    assert config.version == 2 and "bad selector" in config.last_error
+
+    path.unlink()
+    assert config.table("shop", "US", backend) is second
+    assert "Cannot read" in config.last_error
+
+
+def test_a_broken_file_fails_the_first_load(tmp_path):
+    with pytest.raises(SelectorConfigError):
+        SelectorConfig(str(tmp_path / "missing.yaml")).maybe_reload()
+
+
+def test_checks_are_rate_limited(config, tmp_path):
+    config.check_interval = 3600
+    config.maybe_reload()
+    write(tmp_path / "selectors.yaml", CONFIG.format(version=2), 2_000_000_000)
+    config.maybe_reload()
+    assert config.version == 1
+
+
+def test_stats_from_workers_are_merged():
+    stats = SelectorStats()
+    stats.record(("shop", "", "title", "h2 span"))
+    worker = {("shop", "", "title", "h2 span"): 2, ("shop", "", "title", None): 1}
+    stats.merge(worker)
+    assert stats.totals() == worker | {("shop", "", "title", "h2 span"): 3}
+    assert stats.drain() == {}
+
+
+def test_report_counts_hits_and_misses_per_selector(config):
+    table = config.table("shop", "IN", get_backend("bs4-html.parser"))
+    document = get_backend("bs4-html.parser").parse(
+        "<div><p class='title'>Phone</p><b class='price-inr'>1</b></div>"
+    )
+    assert table.first(document, "title").text() == "Phone"
+    assert table.first(document, "price").text() == "1"
+    assert table.first(document.select_one(table["title"][1]), "price") is None
+
+    report = config.report()
+    assert report["version"] == 1 and report["last_error"] is None
+    shop = report["sites"]["shop"]
+    assert shop["title"] == {
+        "selectors": [{"css": "h2 span", "hits": 0}, {"css": ".title", "hits": 1}],
+        "misses": 0,
+    }
+    assert shop["price"] == {
+        "selectors": [{"css": ".price", "hits": 0}, {"css": ".price-inr", "hits": 1}],
+        "misses": 1,
+    }
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from scrapers.single_flight import SingleFlight
+
+
+class SlowCall:
+    def __init__(self, result="page", error=None):
+        self.calls = 0
+        self.release = None
+        self.result = result
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    call = SlowCall()
+
+    async def scenario():
+        call.release = asyncio.Event()
+        waiters = [asyncio.create_task(flight.do("url", call)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert len(flight) == 1
+        call.release.set()
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(scenario()) == ["page"] * 5
+    assert call.calls == 1
+    assert flight.stats() == {"leaders": 1, "followers": 4, "inflight": 0}
+
+
+def test_errors_reach_every_caller_and_are_not_remembered():
+    flight = SingleFlight()
+    failing = SlowCall(error=RuntimeError("boom"))
+    working = SlowCall()
+
+    async def scenario():
+        failing.release = asyncio.Event()
+        waiters = [asyncio.create_task(flight.do("url", failing)) for _ in range(2)]
+        await asyncio.sleep(0)
+        failing.release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        working.release = asyncio.Event()
+        working.release.set()
+        return results, await flight.do("url", working)
+
+    results, retried = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert retried == "page" and working.calls == 1
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+    call = SlowCall()
+
+    async def scenario():
+        call.release = asyncio.Event()
+        leader = asyncio.create_task(flight.do("url", call))
+        follower = asyncio.create_task(flight.do("url", call))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        call.release.set()
+        return await follower
+
+    assert asyncio.run(scenario()) == "page"
+    assert call.calls == 1
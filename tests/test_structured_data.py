@@ -0,0 +1,161 @@
+import pytest
+
+from scrapers.scraper_manager import ScraperManager
+from scrapers.structured_data import (
+    ExtractionStats,
+    dig,
+    extraction_stats,
+    json_ld,
+    json_ld_products,
+    next_data,
+    script_blocks,
+)
+
+# What both tiers read; the structured data also carries ratings and images
+# the Walmart HTML tier doesn't
+CORE_FIELDS = ("link", "price", "currency", "productName", "website", "availability")
+
+
+def core(products):
+    return [tuple(getattr(p, field) for field in CORE_FIELDS) for p in products]
+
+
+@pytest.fixture(scope="module")
+def scrapers():
+    return ScraperManager().scrapers
+
+
+def test_script_blocks_only_match_markers_inside_script_tags():
+    html = (
+        b"<p>type=application/ld+json</p>"
+        b'<script type="application/ld+json">{"a": 1}</script>'
+        b"<script>var x = 1;</script>"
+        b'<script type="application/ld+json">not json</script>'
+        b'<script type="application/ld+json">{"unclosed": 1}'
+    )
+    assert list(script_blocks(html, b"application/ld+json")) == [
+        b'{"a": 1}',
+        b"not json",
+    ]
+    assert json_ld(html) == [{"a": 1}]
+
+
+def test_next_data():
+    page = b'<script id="__NEXT_DATA__" type="application/json">{"props": 1}</script>'
+    assert next_data(page) == {"props": 1}
+    assert next_data(page.replace(b"1}", b"1")) is None
+    assert next_data(b"<html></html>") is None
+
+
+def test_json_ld_products_unwraps_lists_and_graphs():
+    data = [
+        {"@type": "BreadcrumbList"},
+        {
+            "@type": "ItemList",
+            "itemListElement": [
+                {"@type": "ListItem", "item": {"@type": "Product", "name": "a"}},
+                {"@type": "Product", "name": "b"},
+                "junk",
+            ],
+        },
+        {"@graph": [{"@type": ["Product", "Thing"], "name": "c"}]},
+    ]
+    assert [item["name"] for item in json_ld_products(data)] == ["a", "b", "c"]
+
+
+def test_dig():
+    data = {"a": [{"b": 1}]}
+    assert dig(data, "a", 0, "b") == 1
+    assert dig(data, "a", 1, "b") is None
+    assert dig(data, "a", "b") is None
+    assert dig(None, "a") is None
+
+
+@pytest.mark.parametrize("site", ["amazon", "bestbuy", "walmart"])
+def test_structured_tier_agrees_with_the_html_tier(scrapers, pages, site):
+    page = pages[site]
+    scraper = scrapers[site]
+    args = (page["html"], page["query"], page["country"])
+
+    structured = scraper.parse_structured(*args)
+    assert structured
+    assert core(structured) == core(scraper.parse_search_results(*args))
+
+
+def test_walmart_structured_tier_reads_ratings_and_images(scrapers, pages):
+    page = pages["walmart"]
+    [first, *_] = scrapers["walmart"].parse_structured(
+        page["html"], page["query"], page["country"]
+    )
+    assert first.rating == 4.1
+    assert first.image_url.startswith("https://i5.walmartimages.com/")
+
+
+@pytest.mark.parametrize(
+    "site, marker",
+    [
+        ("walmart", b'id="__NEXT_DATA__"'),
+        ("bestbuy", b"application/ld+json"),
+        ("amazon", b'data-component-type="s-search-result"'),
+    ],
+)
+def test_html_tier_takes_over_when_the_data_is_gone(scrapers, pages, site, marker):
+    page = pages[site]
+    html = page["html"].replace(marker, b'data-removed="1"')
+    scraper = scrapers[site]
+    extraction_stats.drain()
+
+    products = scraper.extract_products(html, page["query"], page["country"])
+
+    assert products
+    assert core(products) == core(
+        scraper.parse_search_results(html, page["query"], page["country"])
+    )
+    assert [(s, tier, result) for s, tier, result, _ in extraction_stats.drain()] == [
+        (site, "structured", "empty"),
+        (site, "html", "ok"),
+    ]
+
+
+def test_sites_without_structured_data_go_straight_to_html(scrapers, pages):
+    page = pages["ebay"]
+    extraction_stats.drain()
+    assert scrapers["ebay"].extract_products(
+        page["html"], page["query"], page["country"]
+    )
+    assert [tier for _, tier, _, _ in extraction_stats.drain()] == ["html"]
+
+
+def test_extraction_stats_per_tier():
+    stats = ExtractionStats()
+    stats.record("walmart", "structured", "ok", 0.002)
+    stats.record("walmart", "structured", "empty", 0.004)
+    worker = [("walmart", "html", "error", 0.01)]
+    stats.merge(worker)
+
+    assert stats.stats() == {
+        "walmart": {
+            "html": {
+                "attempts": 1,
+                "error": 1,
+                "success_rate": 0.0,
+                "mean_ms": 10.0,
+            },
+            "structured": {
+                "attempts": 2,
+                "ok": 1,
+                "empty": 1,
+                "success_rate": 0.5,
+                "mean_ms": 3.0,
+            },
+        }
+    }
+    assert stats.drain() == []
+
+
+def test_extraction_endpoint_reports_the_structured_tier(client):
+    client.post("/search", json={"country": "US", "query": "iPhone 16 Pro"})
+    stats = client.get("/admin/extraction").json()
+    assert stats["walmart"]["structured"]["ok"] >= 1
+    assert stats["bestbuy"]["structured"]["ok"] >= 1
+    assert "structured" not in stats["ebay"]
@@ -0,0 +1,51 @@
+import json
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+    HAS_ORJSON = False
+
+
+def _default(obj: Any) -> Any:
+    # Product records (and anything else with to_dict) encode as their dict
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+    return to_dict()
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, the same document Starlette's JSONResponse renders.
+
+    Uses orjson when installed and falls back to the json module otherwise.
+    """
+    if HAS_ORJSON:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    """Parse JSON bytes with orjson when installed"""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that takes Product records as they are and encodes them
+    straight to bytes, without a Pydantic or ``to_dict`` pass first"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
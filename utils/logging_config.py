@@ -0,0 +1,235 @@
+import asyncio
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import threading
+import time
+from typing import Any, Optional
+
+from .metrics import TraceIdFilter, trace_id_var
+
+logger = logging.getLogger(__name__)
+
+TEXT_FORMAT = "%(levelname)s:%(name)s:%(trace_id)s:%(message)s"
+
+# Attributes every LogRecord has; anything else came from ``extra=``
+STANDARD_ATTRS = frozenset(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {
+    "message",
+    "asctime",
+    "trace_id",
+}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class Truncated:
+    """A payload for a log argument, rendered (and capped) only if the record is emitted.
+
+    ``logger.debug("Results: %s", Truncated(results))`` costs nothing when
+    DEBUG is off; when on, lists show their first ``items`` elements and the
+    text is cut at ``limit`` characters.
+    """
+
+    __slots__ = ("value", "limit", "items")
+
+    def __init__(
+        self,
+        value: Any,
+        limit: int = int(os.getenv("LOG_PAYLOAD_CHARS", "500")),
+        items: int = 3,
+    ):
+        self.value = value
+        self.limit = limit
+        self.items = items
+
+    def __str__(self) -> str:
+        value = self.value
+        if isinstance(value, (list, tuple)) and len(value) > self.items:
+            text = f"{value[: self.items]!r} (+{len(value) - self.items} more)"
+        elif isinstance(value, (bytes, bytearray)):
+            text = value[: self.limit].decode("utf-8", errors="replace")
+        else:
+            text = value if isinstance(value, str) else repr(value)
+        if len(text) > self.limit:
+            text = f"{text[: self.limit]}... ({len(text)} chars)"
+        return text
+
+    __repr__ = __str__
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queues records for the listener thread, dropping them if it falls behind.
+
+    Only the message itself is rendered on the calling thread (capped at
+    ``max_chars``); formatting and I/O happen on the listener thread.
+    """
+
+    def __init__(self, records: queue.Queue, max_chars: int):
+        super().__init__(records)
+        self.max_chars = max_chars
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = record.getMessage()
+        record = copy.copy(record)
+        if len(message) > self.max_chars:
+            message = f"{message[: self.max_chars]}... ({len(message)} chars)"
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra=`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "trace_id": getattr(record, "trace_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(
+    level: str = os.getenv("LOG_LEVEL", "INFO"),
+    fmt: str = os.getenv("LOG_FORMAT", "text"),
+    path: Optional[str] = os.getenv("LOG_FILE"),
+    max_bytes: int = int(os.getenv("LOG_FILE_MAX_BYTES", str(10 * 1024 * 1024))),
+    backups: int = int(os.getenv("LOG_FILE_BACKUPS", "3")),
+    max_chars: int = int(os.getenv("LOG_MAX_CHARS", "2000")),
+    queue_size: int = int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+) -> NonBlockingQueueHandler:
+    """Route the root logger through a queue to a listener thread that writes
+    to stderr and, optionally, a size-capped rotating file"""
+    global _listener
+    formatter = JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if path:
+        handlers.append(
+            logging.handlers.RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+            )
+        )
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records: queue.Queue = queue.Queue(maxsize=queue_size)
+    queue_handler = NonBlockingQueueHandler(records, max_chars)
+    # Filters run on the calling thread, so records keep the caller's trace ID
+    queue_handler.addFilter(TraceIdFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+
+    if _listener is not None:
+        _listener.stop()
+    _listener = logging.handlers.QueueListener(records, *handlers)
+    _listener.start()
+    return queue_handler
+
+
+@atexit.register
+def shutdown_logging():
+    """Flush queued records; called at interpreter exit"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _slug(text: str, limit: int = 60) -> str:
+    """``text`` made safe for a file name"""
+    return re.sub(r"[^\w-]+", "_", text)[:limit]
+
+
+class HtmlCapture:
+    """Saves sampled raw pages to a size-capped directory for debugging parsers.
+
+    Pages that parse to no products are always kept, others with probability
+    ``sample``. The oldest files are deleted once the directory holds more
+    than ``max_files`` pages or ``max_bytes`` bytes.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = os.getenv("LOG_CAPTURE_DIR"),
+        sample: float = float(os.getenv("LOG_CAPTURE_SAMPLE", "0.05")),
+        max_bytes: int = int(os.getenv("LOG_CAPTURE_MAX_BYTES", str(50 * 1024 * 1024))),
+        max_files: int = int(os.getenv("LOG_CAPTURE_MAX_FILES", "200")),
+    ):
+        self.directory = directory
+        self.sample = sample
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.saved = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    async def save(self, site: str, html: bytes, label: str, empty: bool = False):
+        if not self.enabled or not (empty or random.random() < self.sample):
+            return
+        name = "-".join(
+            (str(time.time_ns()), _slug(trace_id_var.get()), site, _slug(label))
+        )
+        if empty:
+            name += "-empty"
+        await asyncio.to_thread(self._write, f"{name}.html", html)
+
+    def _write(self, name: str, html: bytes):
+        with self._lock:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(os.path.join(self.directory, name), "wb") as f:
+                    f.write(html)
+                self.saved += 1
+                self._prune()
+            except OSError as e:
+                logger.warning("HTML capture to %s failed: %s", self.directory, e)
+
+    def _prune(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".html"):
+                    entries.append((entry.name, entry.stat().st_size))
+        # Names start with a nanosecond timestamp, so they sort oldest first
+        entries.sort()
+        total = sum(size for _, size in entries)
+        while entries and (len(entries) > self.max_files or total > self.max_bytes):
+            name, size = entries.pop(0)
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+
+html_capture = HtmlCapture()
@@ -0,0 +1,250 @@
+import bisect
+import contextvars
+import logging
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Trace ID of the request being served; asyncio tasks inherit it on creation
+trace_id_var: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "trace_id", default="-"
+)
+# (stage, site, seconds) of the current request, shared with its child tasks
+stages_var: contextvars.ContextVar[Optional[List[Tuple[str, str, float]]]] = (
+    contextvars.ContextVar("stages", default=None)
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6)
+COUNT_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 200)
+
+# Client-supplied request IDs end up in every log line and in file names
+TRACE_ID_RE = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    """Bucketed distribution per label combination, Prometheus style"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self) -> Iterator[str]:
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                yield (
+                    f"{self.name}_bucket"
+                    f"{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(total)}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+class Registry:
+    """Metrics of this process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ("method", "route", "status"),
+)
+SITE_SEARCH_SECONDS = registry.histogram(
+    "site_search_duration_seconds",
+    "Time to get one site's results for a search, by outcome",
+    ("site", "status"),
+)
+FETCH_SECONDS = registry.histogram(
+    "scraper_fetch_duration_seconds",
+    "Page fetch latency, including retries",
+    ("site",),
+)
+FETCH_BYTES = registry.histogram(
+    "scraper_fetch_bytes",
+    "Bytes downloaded per page",
+    ("site",),
+    BYTES_BUCKETS,
+)
+PARSE_SECONDS = registry.histogram(
+    "scraper_parse_duration_seconds",
+    "Results page parse time, including the hand-off to the parse pool",
+    ("site",),
+)
+EXTRACT_SECONDS = registry.histogram(
+    "scraper_extract_duration_seconds",
+    "Time of one extraction tier (structured data or HTML) on a results page",
+    ("site", "tier"),
+)
+EXTRACT_RESULTS = registry.counter(
+    "scraper_extract_total",
+    "Extraction attempts by tier and result (ok, empty, error)",
+    ("site", "tier", "result"),
+)
+PRODUCTS_FOUND = registry.histogram(
+    "scraper_products_found",
+    "Products parsed from one results page",
+    ("site",),
+    COUNT_BUCKETS,
+)
+VALIDATION_SECONDS = registry.histogram(
+    "validation_duration_seconds",
+    "Relevance scoring and ranking time per search",
+)
+CACHE_LOOKUPS = registry.counter(
+    "search_cache_lookups_total",
+    "Search cache lookups by site and result (hit, stale, miss)",
+    ("site", "result"),
+)
+
+
+def new_trace(trace_id: Optional[str] = None) -> str:
+    """Start a trace for the current context (a request and the tasks it spawns).
+
+    ``trace_id`` (e.g. a client's X-Request-ID) is only adopted when it is
+    1-64 characters of ``[A-Za-z0-9._-]``; otherwise a fresh one is made.
+    """
+    if not trace_id or not TRACE_ID_RE.fullmatch(trace_id):
+        trace_id = uuid.uuid4().hex[:16]
+    trace_id_var.set(trace_id)
+    stages_var.set([])
+    return trace_id
+
+
+@contextmanager
+def stage(name: str, histogram: Optional[Histogram], site: str = ""):
+    """Time a stage into ``histogram`` and the current trace"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if histogram is not None:
+            histogram.observe(elapsed, *((site,) if histogram.labelnames else ()))
+        record_stage(name, site, elapsed)
+
+
+def record_stage(name: str, site: str, seconds: float):
+    """Add an already measured stage to the current trace"""
+    stages = stages_var.get()
+    if stages is not None:
+        stages.append((name, site, seconds))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            f"trace={trace_id_var.get()} stage={name} site={site or '-'} "
+            f"ms={seconds * 1000:.1f}"
+        )
+
+
+def trace_summary() -> str:
+    """``stage[site]=ms`` for every stage timed in the current trace"""
+    stages = stages_var.get() or []
+    return " ".join(
+        (
+            f"{name}[{site}]={seconds * 1000:.0f}ms"
+            if site
+            else f"{name}={seconds * 1000:.0f}ms"
+        )
+        for name, site, seconds in stages
+    )
+
+
+class TraceIdFilter(logging.Filter):
+    """Adds ``trace_id`` to every record so log formats can include it"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = trace_id_var.get()
+        return True
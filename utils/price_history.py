@@ -0,0 +1,283 @@
+import asyncio
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .product import Product
+from .product_identity import identity_key
+from .settings import env_bool
+
+logger = logging.getLogger(__name__)
+
+# (site, country, product_id, ts, price, currency); ts is epoch seconds
+PriceRow = Tuple[str, str, str, float, float, str]
+
+SCHEMA = (
+    # The primary key is the (site, product, time) index: WITHOUT ROWID
+    # stores rows clustered on it, so one product's history is one range scan.
+    # ts keeps sub-second precision so observations made within the same
+    # second don't collide on the key.
+    "CREATE TABLE IF NOT EXISTS prices ("
+    "site TEXT NOT NULL, country TEXT NOT NULL, product_id TEXT NOT NULL, "
+    "ts REAL NOT NULL, price REAL NOT NULL, currency TEXT NOT NULL, "
+    "PRIMARY KEY (site, country, product_id, ts)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS products ("
+    "site TEXT NOT NULL, country TEXT NOT NULL, product_id TEXT NOT NULL, "
+    "name TEXT, link TEXT, last_seen INTEGER NOT NULL, "
+    "PRIMARY KEY (site, country, product_id)) WITHOUT ROWID",
+)
+
+
+class PriceDB:
+    """SQLite (WAL) price observations; all calls are blocking"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._writer = sqlite3.connect(path, check_same_thread=False)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._writer.execute(statement)
+        self._writer.commit()
+        # WAL lets a second connection read while a batch is being written
+        self._reader = sqlite3.connect(path, check_same_thread=False)
+
+    def insert(self, rows: List[PriceRow], products: List[Tuple]) -> int:
+        """Write a batch; returns how many price rows were new"""
+        with self._write_lock, self._writer:
+            inserted = self._writer.executemany(
+                "INSERT OR IGNORE INTO prices VALUES (?, ?, ?, ?, ?, ?)", rows
+            ).rowcount
+            self._writer.executemany(
+                "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?, ?)", products
+            )
+        return inserted
+
+    def query(self, sql: str, params: Tuple) -> List[Tuple]:
+        with self._read_lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._write_lock:
+            self._writer.close()
+        with self._read_lock:
+            self._reader.close()
+
+
+class PriceHistoryStore:
+    """Append-only price history of every scraped product.
+
+    ``record`` only queues rows; a background task writes them in batches
+    so the request path never waits on SQLite.
+    """
+
+    def __init__(
+        self,
+        db_path: str = os.getenv("PRICE_HISTORY_DB", "price_history.sqlite3"),
+        enabled: bool = env_bool("PRICE_HISTORY_ENABLED", True),
+        batch_size: int = int(os.getenv("PRICE_HISTORY_BATCH", "500")),
+        flush_interval: float = float(os.getenv("PRICE_HISTORY_FLUSH_S", "2")),
+        max_pending: int = int(os.getenv("PRICE_HISTORY_MAX_PENDING", "100000")),
+        drop_pct: float = float(os.getenv("PRICE_DROP_PCT", "5")),
+    ):
+        self.db_path = db_path
+        self.enabled = enabled and bool(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.drop_pct = drop_pct
+        self.db: Optional[PriceDB] = None
+        self._pending: List[PriceRow] = []
+        self._pending_products: Dict[Tuple[str, str, str], Tuple] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self.counters = {
+            "recorded": 0,
+            "written": 0,
+            "duplicates": 0,
+            "dropped": 0,
+            "batches": 0,
+        }
+
+    async def start(self):
+        if not self.enabled or self.db is not None:
+            return
+        try:
+            self.db = await asyncio.to_thread(PriceDB, self.db_path)
+        except (sqlite3.Error, OSError) as e:
+            # e.g. a read-only filesystem; serve searches without history
+            logger.warning(f"Price history disabled, cannot open {self.db_path}: {e}")
+            return
+        self._wakeup = asyncio.Event()
+        self._writer = asyncio.create_task(self._write_loop())
+        logger.info(f"Price history store opened at {self.db_path}")
+
+    def record(self, products: List[Product], country: str):
+        """Queue one observation per product with a positive price"""
+        if self.db is None:
+            return
+        now = time.time()
+        country = country.upper()
+        seen = set()
+        for product in products:
+            if product.price_minor <= 0:
+                continue
+            site, product_id = identity_key(product)
+            key = (site, country, product_id)
+            # A listing repeated on the page is the same observation
+            if key in seen:
+                continue
+            seen.add(key)
+            price = product.price_minor / 100
+            self._pending.append(
+                (site, country, product_id, now, price, product.currency)
+            )
+            # Re-inserted so the dict stays in last-seen order
+            self._pending_products.pop(key, None)
+            self._pending_products[key] = (
+                site,
+                country,
+                product_id,
+                product.productName,
+                product.link,
+                int(now),
+            )
+            self.counters["recorded"] += 1
+
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            # The writer is falling behind; shed the oldest observations
+            del self._pending[:overflow]
+            self.counters["dropped"] += overflow
+            # and bound the queued products too: the rows kept belong to the
+            # max_pending most recently seen products at most
+            excess = len(self._pending_products) - self.max_pending
+            for key in list(itertools.islice(self._pending_products, max(0, excess))):
+                del self._pending_products[key]
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _write_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        if self.db is None or not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        products, self._pending_products = list(self._pending_products.values()), {}
+        try:
+            inserted = await asyncio.to_thread(self.db.insert, rows, products)
+            self.counters["written"] += inserted
+            # Rows whose key is already stored, e.g. from a coarse clock
+            self.counters["duplicates"] += len(rows) - inserted
+            self.counters["batches"] += 1
+        except Exception as e:
+            self.counters["dropped"] += len(rows)
+            logger.warning(f"Price history write of {len(rows)} rows failed: {e}")
+
+    async def history(
+        self,
+        site: str,
+        product_id: str,
+        country: str,
+        since: Optional[float] = None,
+        limit: int = 500,
+    ) -> Optional[Dict[str, Any]]:
+        """Price points (newest first), window stats and price-drop detection"""
+        if self.db is None:
+            return None
+        since_ts = float(since) if since is not None else 0.0
+        key = (site.lower(), country.upper(), product_id)
+        return await asyncio.to_thread(self._history, key, since_ts, limit)
+
+    def _history(self, key: Tuple[str, str, str], since: float, limit: int):
+        stats = self.db.query(
+            "SELECT COUNT(*), MIN(price), MAX(price), AVG(price), MIN(ts), MAX(ts) "
+            "FROM prices WHERE site = ? AND country = ? AND product_id = ? "
+            "AND ts >= ?",
+            (*key, since),
+        )[0]
+        if not stats[0]:
+            return None
+
+        points = self.db.query(
+            "SELECT ts, price, currency FROM prices "
+            "WHERE site = ? AND country = ? AND product_id = ? AND ts >= ? "
+            "ORDER BY ts DESC LIMIT ?",
+            (*key, since, limit),
+        )
+        latest_ts, latest_price, currency = points[0]
+        # Last price that differs from the current one, within the window
+        previous = self.db.query(
+            "SELECT ts, price FROM prices "
+            "WHERE site = ? AND country = ? AND product_id = ? "
+            "AND ts >= ? AND ts < ? AND price != ? ORDER BY ts DESC LIMIT 1",
+            (*key, since, latest_ts, latest_price),
+        )
+        product = self.db.query(
+            "SELECT name, link FROM products "
+            "WHERE site = ? AND country = ? AND product_id = ?",
+            key,
+        )
+
+        count, low, high, avg, first_ts, _ = stats
+        drop = None
+        if previous and previous[0][1] > latest_price:
+            prev_ts, prev_price = previous[0]
+            pct = (prev_price - latest_price) / prev_price * 100
+            drop = {
+                "from_price": prev_price,
+                "to_price": latest_price,
+                "pct": round(pct, 2),
+                "since_ts": prev_ts,
+            }
+
+        return {
+            "site": key[0],
+            "country": key[1],
+            "product_id": key[2],
+            "name": product[0][0] if product else None,
+            "link": product[0][1] if product else None,
+            "currency": currency,
+            "latest": {"ts": latest_ts, "price": latest_price},
+            "window": {
+                "from_ts": first_ts,
+                "to_ts": latest_ts,
+                "count": count,
+                "min": low,
+                "max": high,
+                "avg": round(avg, 2),
+            },
+            "price_drop": drop is not None and drop["pct"] >= self.drop_pct,
+            "drop": drop,
+            "points": [{"ts": ts, "price": price} for ts, price, _ in points],
+        }
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        await self.flush()
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._pending),
+            **self.counters,
+            "db_path": self.db.path if self.db is not None else None,
+        }
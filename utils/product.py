@@ -0,0 +1,130 @@
+import sys
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, Dict, Optional
+
+
+def price_to_minor(price: Any) -> int:
+    """Price as integer hundredths of the currency unit, e.g. "1299.5" -> 129950"""
+    try:
+        amount = Decimal(str(price).replace(",", "").strip() or "0")
+    except InvalidOperation:
+        return 0
+    if not amount.is_finite():
+        return 0
+    return int((amount * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else value
+
+
+class Product:
+    """One scraped listing, built once at extraction time.
+
+    The price is parsed to integer hundredths (``price_minor``) here, so
+    ranking and price history never re-parse it; ``price`` keeps the
+    scraped text the API returns. Repeated strings (site, currency,
+    availability) are interned. ``to_dict`` is the response shape of
+    ``ProductResult``, so responses skip a second Pydantic pass.
+    """
+
+    __slots__ = (
+        "link",
+        "price",
+        "price_minor",
+        "currency",
+        "productName",
+        "website",
+        "availability",
+        "rating",
+        "image_url",
+        "details",
+    )
+
+    def __init__(
+        self,
+        link: str,
+        price: Any,
+        currency: str,
+        productName: str,
+        website: str,
+        availability: str = "In Stock",
+        rating: Optional[float] = None,
+        image_url: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None,
+    ):
+        self.link = link
+        self.price = str(price)
+        self.price_minor = price_to_minor(price)
+        self.currency = _intern(currency)
+        self.productName = productName
+        self.website = _intern(website)
+        self.availability = _intern(availability)
+        self.rating = rating
+        self.image_url = image_url
+        self.details = details
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Product":
+        """From a ``to_dict`` result (e.g. a disk cache entry)"""
+        return cls(
+            data.get("link") or "",
+            data.get("price") or "0",
+            data.get("currency") or "",
+            data.get("productName") or "",
+            data.get("website") or "",
+            data.get("availability") or "In Stock",
+            data.get("rating"),
+            data.get("image_url"),
+            data.get("details"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "link": self.link,
+            "price": self.price,
+            "currency": self.currency,
+            "productName": self.productName,
+            "website": self.website,
+            "availability": self.availability,
+            "rating": self.rating,
+            "image_url": self.image_url,
+            "details": self.details,
+        }
+
+    def copy(self) -> "Product":
+        # Shallow, like dict(product): callers may set details on their copy
+        clone = Product.__new__(Product)
+        for name in Product.__slots__:
+            setattr(clone, name, getattr(self, name))
+        return clone
+
+    def __reduce__(self):
+        # Compact pickling for results coming back from parse workers
+        return _restore, tuple(getattr(self, name) for name in Product.__slots__)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Product):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in Product.__slots__
+        )
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (
+            f"Product({self.website} {self.price} {self.currency} "
+            f"{self.productName!r} {self.link})"
+        )
+
+
+def _restore(*values) -> Product:
+    product = Product.__new__(Product)
+    for name, value in zip(Product.__slots__, values):
+        setattr(product, name, value)
+    # Unpickled strings are new objects; share the interned ones again
+    product.currency = _intern(product.currency)
+    product.website = _intern(product.website)
+    product.availability = _intern(product.availability)
+    return product
@@ -0,0 +1,214 @@
+import itertools
+import logging
+import os
+import re
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional
+
+from .ai_validator import TERM_RE, AIValidator
+from .metrics import stage
+from .product import Product
+
+logger = logging.getLogger(__name__)
+
+# "128 GB", "6.3-inch", "120 fps" -> "128gb", "63inch", "120fps"
+UNIT_RE = re.compile(r"\b(\d+(?:\.\d+)?)[\s-]?(gb|tb|mb|fps|hz|mp|mah|inch|mm|nm)\b")
+STORAGE_RE = re.compile(r"\b(\d+)(gb|tb)\b")
+# Numbers that describe a spec rather than name a model: 5g, 20w, 120fps...
+SPEC_RE = re.compile(r"^\d+(?:g|w|k|gb|tb|mb|fps|hz|mp|mah|inch|in|mm|nm|th)$")
+
+# Index slot for "any value" of an attribute, see Signature.blocking_keys
+ANY = "*"
+
+VARIANTS = frozenset(
+    {"pro", "max", "plus", "mini", "ultra", "lite", "fe", "se", "air", "neo"}
+)
+COLORS = {
+    "black": "black",
+    "white": "white",
+    "blue": "blue",
+    "red": "red",
+    "green": "green",
+    "pink": "pink",
+    "purple": "purple",
+    "yellow": "yellow",
+    "orange": "orange",
+    "gold": "gold",
+    "silver": "silver",
+    "gray": "gray",
+    "grey": "gray",
+    "graphite": "graphite",
+    "natural": "natural",
+    "desert": "desert",
+    "midnight": "midnight",
+    "starlight": "starlight",
+    "teal": "teal",
+    "ultramarine": "ultramarine",
+    "lavender": "lavender",
+    "mint": "mint",
+    "cream": "cream",
+    "beige": "beige",
+    "bronze": "bronze",
+}
+
+_BRAND_OF = {
+    variation: brand
+    for brand, variations in AIValidator.BRANDS.items()
+    for variation in variations
+}
+
+
+class Signature:
+    """What a product title says about the item: its words and its attributes"""
+
+    __slots__ = ("tokens", "brand", "models", "variants", "storage", "colors")
+
+    def __init__(self, title: str):
+        text = UNIT_RE.sub(
+            lambda m: m.group(1).replace(".", "") + m.group(2), title.lower()
+        )
+        stop_words = AIValidator.STOP_WORDS
+        tokens = [term for term in TERM_RE.findall(text) if term not in stop_words]
+        self.tokens: FrozenSet[str] = frozenset(tokens)
+        self.brand: Optional[str] = next(
+            (_BRAND_OF[token] for token in tokens if token in _BRAND_OF), None
+        )
+        self.models = frozenset(
+            token
+            for token in tokens
+            if any(c.isdigit() for c in token) and not SPEC_RE.match(token)
+        )
+        self.variants = self.tokens & VARIANTS
+        self.storage = frozenset(
+            f"{size}{unit}" for size, unit in STORAGE_RE.findall(text)
+        )
+        self.colors = frozenset(COLORS[token] for token in tokens if token in COLORS)
+
+    def blocking_keys(self, currency: str, lookup: bool) -> Iterator[tuple]:
+        """Inverted index keys: a matching product must share a model number
+        (or, without one, a title word), currency and variant. Brand, storage
+        and color must agree where both titles state them, so groups are also
+        filed under ``ANY`` for each, which products lacking that attribute
+        look up instead."""
+        attributes = (self.brand, self.storage or None, self.colors or None)
+        if lookup:
+            options = [(value, None) if value else (ANY,) for value in attributes]
+        else:
+            options = [(value, ANY) for value in attributes]
+        for token in self.models or self.tokens:
+            for combination in itertools.product(*options):
+                yield (currency, self.variants, token, *combination)
+
+    def compatible(self, other: "Signature") -> bool:
+        """No attribute both titles state disagrees"""
+        if self.brand and other.brand and self.brand != other.brand:
+            return False
+        if self.variants != other.variants:
+            return False
+        if bool(self.models) != bool(other.models):
+            return False
+        # Extra part numbers are fine (A3083), different models are not
+        if not (self.models <= other.models or other.models <= self.models):
+            return False
+        if self.storage and other.storage and self.storage != other.storage:
+            return False
+        if self.colors and other.colors and self.colors != other.colors:
+            return False
+        return True
+
+    def similarity(self, other: "Signature") -> float:
+        """Jaccard similarity of the title words"""
+        if not self.tokens or not other.tokens:
+            return 0.0
+        shared = len(self.tokens & other.tokens)
+        return shared / (len(self.tokens) + len(other.tokens) - shared)
+
+
+class ProductGroup:
+    """Offers for one item, across sites"""
+
+    __slots__ = ("signature", "offers")
+
+    def __init__(self, signature: Signature, product: Product):
+        self.signature = signature
+        self.offers = [product]
+
+    @property
+    def best_offer(self) -> Product:
+        priced = [offer for offer in self.offers if offer.price_minor > 0]
+        return min(priced or self.offers, key=lambda offer: offer.price_minor)
+
+    def to_dict(self) -> Dict[str, Any]:
+        best = self.best_offer
+        signature = self.signature
+        offers = sorted(self.offers, key=lambda offer: offer.price_minor)
+        return {
+            # Titled after its most relevant listing, which started the group
+            "title": self.offers[0].productName,
+            "brand": signature.brand,
+            "model": " ".join(sorted(signature.models | signature.variants)) or None,
+            "storage": " ".join(sorted(signature.storage)) or None,
+            "color": " ".join(sorted(signature.colors)) or None,
+            "best_price": best.price,
+            "currency": best.currency,
+            "best_offer": best.to_dict(),
+            "websites": sorted({offer.website for offer in self.offers}),
+            "offers": [offer.to_dict() for offer in offers],
+        }
+
+
+class ProductGrouper:
+    """
+    Clusters equivalent listings (the same SKU on Amazon, eBay, Best Buy...)
+    into groups of offers.
+
+    Products are taken in rank order. Each one is compared only against the
+    groups an inverted index files under its blocking keys (model number,
+    variant, brand, storage, color) and joins the most similar one, by
+    title words, whose representative is compatible. The cost grows with
+    candidates times compatible groups, not candidates squared.
+    """
+
+    def __init__(
+        self,
+        min_similarity: float = float(os.getenv("GROUP_MIN_SIMILARITY", "0.5")),
+    ):
+        self.min_similarity = min_similarity
+
+    def group(self, products: List[Product]) -> List[ProductGroup]:
+        """Groups in the order of their first (most relevant) product"""
+        with stage("group", None):
+            groups: List[ProductGroup] = []
+            index: Dict[tuple, List[int]] = {}
+            for product in products:
+                signature = Signature(product.productName or "")
+                match = self._best_match(signature, product.currency, groups, index)
+                if match is not None:
+                    groups[match].offers.append(product)
+                    continue
+                groups.append(ProductGroup(signature, product))
+                for key in signature.blocking_keys(product.currency, lookup=False):
+                    index.setdefault(key, []).append(len(groups) - 1)
+        logger.debug("Grouped %d products into %d groups", len(products), len(groups))
+        return groups
+
+    def _best_match(
+        self,
+        signature: Signature,
+        currency: str,
+        groups: List[ProductGroup],
+        index: Dict[tuple, List[int]],
+    ) -> Optional[int]:
+        candidates = set()
+        for key in signature.blocking_keys(currency, lookup=True):
+            candidates.update(index.get(key, ()))
+
+        best, best_similarity = None, 0.0
+        # Ascending, so ties go to the group of the more relevant product
+        for candidate in sorted(candidates):
+            representative = groups[candidate].signature
+            if not signature.compatible(representative):
+                continue
+            similarity = signature.similarity(representative)
+            if similarity >= self.min_similarity and similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        return best
@@ -0,0 +1,87 @@
+import re
+from typing import Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .product import Product
+
+# Retailer listing IDs embedded in product links
+ASIN_RE = re.compile(r"/(?:dp|gp/product)/([A-Z0-9]{10})(?:[/?]|$)")
+EBAY_ITEM_RE = re.compile(r"/itm/(?:[^/?]+/)?(\d{9,})")
+WALMART_ITEM_RE = re.compile(r"/ip/(?:[^/?]+/)?(\d+)")
+BESTBUY_SKU_RE = re.compile(r"/(\d{6,})\.p")
+
+
+def site_key(website: Optional[str]) -> str:
+    """Scraper key of a site name, e.g. Best Buy -> bestbuy"""
+    return "".join((website or "").lower().split())
+
+
+def extract_asin(link: str) -> Optional[str]:
+    """ASIN from an Amazon product link, including sponsored redirect links"""
+    match = ASIN_RE.search(unquote(link or ""))
+    return match.group(1) if match else None
+
+
+def listing_id(website: str, link: str) -> Optional[str]:
+    """The retailer's own ID in a listing link (ASIN, eBay item, SKU...), if any"""
+    link = unquote(link or "")
+    if not link:
+        return None
+
+    website = site_key(website)
+    if website == "amazon":
+        return extract_asin(link)
+    elif website == "ebay":
+        match = EBAY_ITEM_RE.search(link)
+    elif website == "walmart":
+        match = WALMART_ITEM_RE.search(link)
+    elif website == "bestbuy":
+        sku = parse_qs(urlsplit(link).query).get("skuId")
+        if sku:
+            return sku[0]
+        match = BESTBUY_SKU_RE.search(link)
+    elif website == "flipkart":
+        pid = parse_qs(urlsplit(link).query).get("pid")
+        return pid[0] if pid else None
+    else:
+        match = None
+    return match.group(1) if match else None
+
+
+def product_id(product: Product) -> Optional[str]:
+    """The retailer's own ID for a listing (ASIN, eBay item, SKU...), if the link has one"""
+    return listing_id(product.website, product.link)
+
+
+def listing_key(website: str, link: str, name: str = "") -> Tuple[str, str]:
+    """Key two listings share when they are the same item on the same site.
+
+    Falls back to the link without tracking parameters, then to the name.
+    """
+    website = site_key(website)
+    found = listing_id(website, link)
+    if found:
+        return website, found
+    if link:
+        parts = urlsplit(link)
+        return website, f"{parts.netloc}{parts.path}"
+    return website, (name or "").strip().lower()
+
+
+def identity_key(product: Product) -> Tuple[str, str]:
+    """``listing_key`` of a scraped product"""
+    return listing_key(product.website, product.link, product.productName)
+
+
+def dedupe(
+    products: Iterable[Product], seen: Optional[Set[Tuple[str, str]]] = None
+) -> List[Product]:
+    """Drop listings already in ``seen`` (updated in place), keeping first occurrences"""
+    seen = set() if seen is None else seen
+    unique = []
+    for product in products:
+        key = identity_key(product)
+        if key not in seen:
+            seen.add(key)
+            unique.append(product)
+    return unique
@@ -0,0 +1,304 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .metrics import CACHE_LOOKUPS
+from .product import Product
+from .settings import env_bool, env_mapping
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+
+class CacheEntry:
+    __slots__ = ("value", "stored_at", "fresh_until", "stale_until")
+
+    def __init__(self, value: Any, stored_at: float, ttl: float, stale_ttl: float):
+        self.value = value
+        self.stored_at = stored_at
+        self.fresh_until = stored_at + ttl
+        self.stale_until = self.fresh_until + stale_ttl
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.fresh_until
+
+    def is_usable(self, now: float) -> bool:
+        return now < self.stale_until
+
+
+class LRUCache:
+    """Bounded in-process LRU of CacheEntry objects"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[Any, CacheEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        self._entries.pop(key, None)
+
+
+class DiskCache:
+    """SQLite tier that survives restarts; all calls are blocking"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, "
+            "fresh_until REAL NOT NULL, stale_until REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[List[Product], float, float, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at, fresh_until, stale_until "
+                "FROM search_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        products = [Product.from_dict(data) for data in json.loads(row[0])]
+        return products, row[1], row[2], row[3]
+
+    def set(self, key: str, entry: CacheEntry):
+        payload = json.dumps([product.to_dict() for product in entry.value])
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?)",
+                (key, payload, entry.stored_at, entry.fresh_until, entry.stale_until),
+            )
+            self._conn.commit()
+
+    def purge_expired(self, now: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM search_cache WHERE stale_until < ?", (now,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SearchCache:
+    """Two-tier (memory LRU + SQLite) cache of per-site search results.
+
+    Entries are fresh for the site's TTL and may then be served stale for
+    ``stale_ttl`` seconds while a background refresh replaces them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2048")),
+        db_path: Optional[str] = os.getenv("SEARCH_CACHE_DB", "search_cache.sqlite3"),
+        default_ttl: float = float(os.getenv("SEARCH_CACHE_TTL", "900")),
+        stale_ttl: float = float(os.getenv("SEARCH_CACHE_STALE_TTL", "3600")),
+        site_ttls: Optional[Dict[str, float]] = None,
+        enabled: bool = env_bool("SEARCH_CACHE_ENABLED", True),
+    ):
+        self.enabled = enabled
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.site_ttls = (
+            site_ttls
+            if site_ttls is not None
+            else env_mapping("SEARCH_CACHE_SITE_TTLS")
+        )
+        self.memory = LRUCache(max_entries)
+        self.db_path = db_path
+        # Opened by start(); until then, or if it can't be opened, memory only
+        self.disk: Optional[DiskCache] = None
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+        }
+        self._refreshing: Dict[CacheKey, asyncio.Task] = {}
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Lowercase and collapse punctuation/whitespace so trivial variants share a key"""
+        return " ".join(re.findall(r"\w+", query.lower()))
+
+    def make_key(self, country: str, site: str, query: str, page: int = 1) -> CacheKey:
+        normalized = self.normalize_query(query)
+        # Normalized queries never contain "#", so page keys can't collide
+        if page > 1:
+            normalized = f"{normalized}#page={page}"
+        return (country.upper(), site.lower(), normalized)
+
+    def ttl_for(self, site: str) -> float:
+        return self.site_ttls.get(site.lower(), self.default_ttl)
+
+    async def get_or_fetch(
+        self,
+        country: str,
+        site: str,
+        query: str,
+        fetcher: Callable[[], Awaitable[List[Product]]],
+        page: int = 1,
+    ) -> List[Product]:
+        """Serve from cache when possible, otherwise run ``fetcher`` and store it"""
+        if not self.enabled:
+            return await fetcher()
+
+        key = self.make_key(country, site, query, page)
+        now = time.time()
+        entry = await self._lookup(key, now)
+
+        if entry is not None:
+            if not entry.is_fresh(now):
+                self.counters["stale_hits"] += 1
+                CACHE_LOOKUPS.inc(key[1], "stale")
+                self._schedule_refresh(key, fetcher)
+            else:
+                CACHE_LOOKUPS.inc(key[1], "hit")
+            return self._copy(entry.value)
+
+        self.counters["misses"] += 1
+        CACHE_LOOKUPS.inc(key[1], "miss")
+        value = await fetcher()
+        await self.store(key, value)
+        return self._copy(value)
+
+    async def store(self, key: CacheKey, value: List[Product]):
+        # Empty results are usually a fetch failure; never pin them
+        if not self.enabled or not value:
+            return
+        entry = CacheEntry(value, time.time(), self.ttl_for(key[1]), self.stale_ttl)
+        self.memory.set(key, entry)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.set, self._disk_key(key), entry)
+            except Exception as e:
+                logger.warning(f"Search cache disk write failed: {e}")
+
+    async def _lookup(self, key: CacheKey, now: float) -> Optional[CacheEntry]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            if entry.is_usable(now):
+                self.counters["memory_hits"] += 1
+                return entry
+            self.memory.delete(key)
+
+        if self.disk is None:
+            return None
+
+        try:
+            row = await asyncio.to_thread(self.disk.get, self._disk_key(key))
+        except Exception as e:
+            logger.warning(f"Search cache disk read failed: {e}")
+            return None
+        if row is None:
+            return None
+
+        value, stored_at, fresh_until, stale_until = row
+        if now >= stale_until:
+            return None
+        entry = CacheEntry(
+            value, stored_at, fresh_until - stored_at, stale_until - fresh_until
+        )
+        self.memory.set(key, entry)
+        self.counters["disk_hits"] += 1
+        return entry
+
+    def _schedule_refresh(self, key: CacheKey, fetcher):
+        if key in self._refreshing:
+            return
+        task = asyncio.create_task(self._refresh(key, fetcher))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _refresh(self, key: CacheKey, fetcher):
+        self.counters["refreshes"] += 1
+        try:
+            await self.store(key, await fetcher())
+        except Exception as e:
+            self.counters["refresh_errors"] += 1
+            logger.warning(f"Background refresh failed for {key}: {e}")
+
+    async def start(self):
+        """Open the SQLite tier. A path that can't be opened (e.g. on a
+        read-only filesystem) is logged and the cache runs memory-only."""
+        if not self.enabled or not self.db_path or self.disk is not None:
+            return
+        try:
+            self.disk = await asyncio.to_thread(DiskCache, self.db_path)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(
+                "Search cache disk tier unavailable at %s, using memory only: %s",
+                self.db_path,
+                e,
+            )
+            return
+        logger.info("Search cache disk tier opened at %s", self.db_path)
+
+    async def purge_expired(self) -> int:
+        if self.disk is None:
+            return 0
+        return await asyncio.to_thread(self.disk.purge_expired, time.time())
+
+    async def close(self):
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            "enabled": self.enabled,
+            **self.counters,
+            "hits": hits,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.memory.evictions,
+            "memory_entries": len(self.memory),
+            "memory_capacity": self.memory.max_entries,
+            "refreshing": len(self._refreshing),
+            "disk_path": self.disk.path if self.disk is not None else None,
+        }
+
+    @staticmethod
+    def _disk_key(key: CacheKey) -> str:
+        return "|".join(key)
+
+    @staticmethod
+    def _copy(value: List[Product]) -> List[Product]:
+        # Callers (e.g. enrich) mutate products in place
+        return [product.copy() for product in value]
@@ -0,0 +1,29 @@
+import os
+from typing import Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean flag such as 1/0, true/false, yes/no"""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def parse_mapping(value: str, cast: Callable[[str], T] = float) -> Dict[str, T]:
+    """Parse a comma separated ``key=value`` list, e.g. ``amazon=600,ebay=300``"""
+    mapping = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        key, value = item.split("=", 1)
+        if key.strip():
+            mapping[key.strip().lower()] = cast(value.strip())
+    return mapping
+
+
+def env_mapping(name: str, cast: Callable[[str], T] = float) -> Dict[str, T]:
+    """Read a ``key=value`` list from the environment, see parse_mapping"""
+    return parse_mapping(os.getenv(name, ""), cast)